@@ -3,6 +3,7 @@
 Analyse des métriques de la centrale avec calculs et interprétation
 """
 from app.api_client import HyxiAPIClient
+from app.day_profile import hourly_means
 from app.tempo import TempoAPI
 from config import Config
 from datetime import datetime, timedelta
@@ -149,35 +150,21 @@ def analyze_production_data(data, date, tarif_achat):
 
     print_header("6. Résumé détaillé par période")
 
-    # Analyser par tranches horaires
-    heures = {}
-    for i, ts in enumerate(time_points):
-        dt = datetime.fromtimestamp(ts)
-        heure = dt.hour
-
-        if heure not in heures:
-            heures[heure] = {
-                'production': [],
-                'consommation': [],
-                'achat': [],
-                'vente': []
-            }
-
-        heures[heure]['production'].append(yield_power[i] if i < len(yield_power) else 0)
-        heures[heure]['consommation'].append(consume_power[i] if i < len(consume_power) else 0)
-        heures[heure]['achat'].append(buy_power[i] if i < len(buy_power) else 0)
-        heures[heure]['vente'].append(sell_power[i] if i < len(sell_power) else 0)
+    # Analyser par tranches horaires (moyennes par heure locale, voir app.day_profile)
+    heures = hourly_means(time_points, {
+        'production': yield_power,
+        'consommation': consume_power,
+        'achat': buy_power,
+        'vente': sell_power
+    })
 
     print("\n  Heure | Prod (W) | Conso (W) | Achat (W) | Vente (W) |")
     print("  " + "─" * 58)
 
     for h in sorted(heures.keys()):
-        prod_moy = sum(heures[h]['production']) / len(heures[h]['production'])
-        conso_moy = sum(heures[h]['consommation']) / len(heures[h]['consommation'])
-        achat_moy = sum(heures[h]['achat']) / len(heures[h]['achat'])
-        vente_moy = sum(heures[h]['vente']) / len(heures[h]['vente'])
-
-        print(f"  {h:02d}h   | {prod_moy:7.0f}  | {conso_moy:8.0f}  | {achat_moy:8.0f}  | {vente_moy:8.0f}  |")
+        moyennes = heures[h]
+        print(f"  {h:02d}h   | {moyennes['production']:7.0f}  | {moyennes['consommation']:8.0f}  | "
+              f"{moyennes['achat']:8.0f}  | {moyennes['vente']:8.0f}  |")
 
     print_header("7. Graphique ASCII de production")
 
@@ -187,19 +174,9 @@ def analyze_production_data(data, date, tarif_achat):
     print(f"  Max: {max_prod:.0f}W")
     print()
 
-    # Regrouper par heure pour le graphique
-    hourly_data = {}
-    for i, ts in enumerate(time_points):
-        dt = datetime.fromtimestamp(ts)
-        heure = dt.hour
-        if heure not in hourly_data:
-            hourly_data[heure] = []
-        if i < len(yield_power):
-            hourly_data[heure].append(yield_power[i])
-
     for h in range(24):
-        if h in hourly_data:
-            avg = sum(hourly_data[h]) / len(hourly_data[h])
+        if h in heures:
+            avg = heures[h]['production']
             bar_length = int((avg / max_prod) * 50)
             bar = "█" * bar_length
             print(f"  {h:02d}h |{bar} {avg:.0f}W")
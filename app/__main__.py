@@ -0,0 +1,36 @@
+"""
+Point d'entrée du serveur de développement : python -m app
+(production : gunicorn -c gunicorn.conf.py app.server:app)
+"""
+import time
+
+_started = time.perf_counter()
+
+from config import Config  # noqa: E402
+
+
+def main():
+    # Import dans main : les processus du pool de simulation (forkserver) réimportent ce
+    # module sans l'exécuter, ils ne doivent pas charger le serveur (voir app.battery)
+    from app.server import app, WARM_UP
+
+    print("=" * 50)
+    print("Hyxi Solar Monitor - Démarrage du serveur")
+    print("=" * 50)
+    print(f"URL: http://{Config.HOST}:{Config.PORT}")
+    print(f"Mode debug: {Config.DEBUG}")
+    print(f"API Hyxi: {Config.HYXI_API_BASE_URL}")
+    print(f"Chargement: {time.perf_counter() - _started:.2f} s"
+          + (" (préchauffage en arrière-plan, voir /api/ready)" if Config.WARMUP_ENABLED else ""))
+    print("=" * 50)
+
+    WARM_UP.start()
+    app.run(
+        host=Config.HOST,
+        port=Config.PORT,
+        debug=Config.DEBUG
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -9,14 +9,63 @@ import base64
 import time
 import random
 import string
+import threading
 import requests
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional
+
+from app import metrics, tracing
+
+
+class RateLimiter:
+    """Budget de requêtes partagé par tous les threads (seau à jetons)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Args:
+            rate: Requêtes par seconde autorisées en régime permanent
+            burst: Nombre de requêtes pouvant partir d'un coup (défaut: rate)
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
 
 
 class HyxiAPIClient:
     """Client pour interagir avec l'API Hyxi Cloud"""
 
-    def __init__(self, access_key: str, secret_key: str, base_url: str, debug: bool = False):
+    # Clés du token dans le cache partagé entre workers
+    TOKEN_CACHE_KEY = 'hyxi:token'
+    TOKEN_LOCK_KEY = 'hyxi:token:lock'
+
+    # Noms des endpoints dans les métriques (voir app.metrics)
+    ENDPOINT_NAMES = {
+        '/api/authorization/v1/token': 'token',
+        '/api/plant/v1/page': 'plantList',
+        '/api/plant/v1/info': 'plantInfo',
+        '/api/plant/v1/queryPlantPowerStatistics': 'powerStatistics',
+        '/api/plant/v1/queryPowerGeneration': 'powerGeneration',
+        '/api/plant/v1/queryPlantYieldStatistics': 'yieldStatistics',
+        '/api/plant/v1/weather': 'weather',
+    }
+
+    def __init__(self, access_key: str, secret_key: str, base_url: str, debug: bool = False,
+                 token_cache: Optional[Any] = None, rate_limit: float = 0):
         """
         Initialise le client API
 
@@ -25,12 +74,17 @@ class HyxiAPIClient:
             secret_key: Clé secrète (SK)
             base_url: URL de base de l'API
             debug: Active le mode debug (affiche toutes les requêtes/réponses)
+            token_cache: Cache partagé (voir app.cache) pour réutiliser le token entre workers
+            rate_limit: Requêtes par seconde vers l'API (0 = illimité), partagé entre threads
         """
         self.access_key = access_key
         self.secret_key = secret_key
         self.base_url = base_url.rstrip('/')
         self.token = None
         self.token_expires_at = 0
+        self._token_lock = threading.Lock()
+        self.token_cache = token_cache
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit > 0 else None
         self.debug = debug
 
     def _debug_log(self, message: str, data: Any = None):
@@ -143,12 +197,7 @@ class HyxiAPIClient:
             self._debug_log("Body:", body)
 
         try:
-            response = requests.post(
-                f"{self.base_url}{uri}",
-                headers=headers,
-                json=body,
-                timeout=30
-            )
+            response = self._send('POST', uri, headers=headers, json=body)
             response.raise_for_status()
             data = response.json()
 
@@ -174,10 +223,65 @@ class HyxiAPIClient:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Erreur de connexion: {str(e)}")
 
+    def _send(self, method: str, uri: str, **kwargs) -> requests.Response:
+        """Requête HTTP vers l'API, instrumentée (métriques et span de la trace courante par endpoint)"""
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = requests.request(method, f"{self.base_url}{uri}", timeout=30, **kwargs)
+            failed = not response.ok
+            return response
+        finally:
+            endpoint = self.ENDPOINT_NAMES.get(uri, uri)
+            metrics.observe_upstream('hyxi', endpoint, time.perf_counter() - start, error=failed)
+            tracing.record(f"hyxi.{endpoint}", start, error=failed)
+
     def ensure_token(self):
-        """Vérifie et renouvelle le token si nécessaire"""
-        if not self.token or time.time() >= self.token_expires_at - 60:
-            self.obtain_token()
+        """Vérifie et renouvelle le token si nécessaire (thread-safe)"""
+        if self.token and time.time() < self.token_expires_at - 60:
+            metrics.cache_lookup('token', True)
+            return
+        metrics.cache_lookup('token', False)
+        with self._token_lock:
+            # Un autre thread a pu renouveler le token pendant l'attente
+            if not self.token or time.time() >= self.token_expires_at - 60:
+                if self.token_cache is None:
+                    self.obtain_token()
+                else:
+                    self._ensure_shared_token()
+
+    def _load_shared_token(self) -> bool:
+        """Reprend le token du cache partagé s'il est encore valable"""
+        shared = self.token_cache.get(self.TOKEN_CACHE_KEY)
+        if shared and time.time() < shared['expires_at'] - 60:
+            self.token = shared['token']
+            self.token_expires_at = shared['expires_at']
+            return True
+        return False
+
+    def _ensure_shared_token(self, wait: float = 10.0):
+        """
+        Token partagé entre workers : un seul worker le renouvelle, les autres
+        attendent qu'il soit publié dans le cache (au plus wait secondes)
+        """
+        deadline = time.time() + wait
+        while not self._load_shared_token():
+            if self.token_cache.add(self.TOKEN_LOCK_KEY, True, ttl=30):
+                try:
+                    self.obtain_token()
+                    self.token_cache.set(
+                        self.TOKEN_CACHE_KEY,
+                        {'token': self.token, 'expires_at': self.token_expires_at},
+                        ttl=max(self.token_expires_at - time.time(), 1)
+                    )
+                finally:
+                    self.token_cache.delete(self.TOKEN_LOCK_KEY)
+                return
+            if time.time() >= deadline:
+                # Le worker détenteur du verrou ne répond pas : obtention locale
+                self.obtain_token()
+                return
+            time.sleep(0.2)
 
     def _make_authenticated_request(self, method: str, uri: str,
                                    content: str = '',
@@ -200,6 +304,9 @@ class HyxiAPIClient:
             # S'assurer d'avoir un token valide
             self.ensure_token()
 
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
             # Générer la signature
             timestamp, nonce, signature = self._generate_signature(
                 method, uri, content, self.token
@@ -228,9 +335,9 @@ class HyxiAPIClient:
 
             # Effectuer la requête
             if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params, timeout=30)
+                response = self._send('GET', uri, headers=headers, params=params)
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=body, timeout=30)
+                response = self._send('POST', uri, headers=headers, json=body)
             else:
                 raise ValueError(f"Méthode HTTP non supportée: {method}")
 
@@ -241,6 +348,9 @@ class HyxiAPIClient:
                 self._debug_log(f"Status Code: {response.status_code}")
                 self._debug_log("Response:", result)
 
+            if result.get('success') is False:
+                metrics.observe_upstream('hyxi', self.ENDPOINT_NAMES.get(uri, uri), 0, error=True, timed=False)
+
             return result
 
         except requests.exceptions.RequestException as e:
@@ -302,6 +412,39 @@ class HyxiAPIClient:
         }
         return self._make_authenticated_request('GET', uri, content='', params=params)
 
+    def iter_plants(self, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt toutes les installations du compte, page par page
+        La page suivante est demandée en arrière-plan pendant le traitement de la page courante.
+
+        Args:
+            page_size: Nombre d'installations par page
+
+        Yields:
+            Installation ({'plantId', 'plantName', 'capacity', 'status', ...})
+
+        Raises:
+            Exception: si une page ne peut pas être récupérée
+        """
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='plant-pages') as executor:
+            page = 1
+            pending = executor.submit(self.get_plant_list, page_size, page)
+            while pending is not None:
+                result = pending.result()
+                if result.get('error'):
+                    raise Exception(result.get('message', 'Erreur de récupération des installations'))
+
+                data = result.get('data') or {}
+                plants = data.get('list') or []
+                total = int(data.get('total') or 0)
+
+                # Préchargement de la page suivante
+                page += 1
+                has_next = bool(plants) and (page - 1) * page_size < total
+                pending = executor.submit(self.get_plant_list, page_size, page) if has_next else None
+
+                yield from plants
+
     def get_plant_info(self, plant_id: str) -> Dict[str, Any]:
         """
         Récupère les informations détaillées d'un plant
@@ -0,0 +1,236 @@
+"""
+Ressources statiques et compression des réponses
+- Build : bibliothèques JS copiées localement (vendor/) et vérifiées contre
+  leur empreinte SRI épinglée (vendor.lock.json), fichiers empreintés
+  (nom.<hash>.ext) et précompressés (.gz, .br) dans static/dist/ + manifest.json
+- Exécution : URL des ressources via le manifeste, choix gzip/brotli selon
+  Accept-Encoding (brotli uniquement si le module est installé) ; une
+  bibliothèque absente de vendor/ est chargée depuis le CDN, avec son
+  empreinte SRI si elle est épinglée
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import urllib.request
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Compression brotli optionnelle
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Bibliothèques tierces servies localement : chemin dans static/ -> URL d'origine (téléchargement au build,
+# repli à l'exécution si la bibliothèque n'est pas dans vendor/)
+VENDOR = {
+    'vendor/chart.umd.min.js': 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js',
+    'vendor/chartjs-plugin-annotation.min.js':
+        'https://cdn.jsdelivr.net/npm/chartjs-plugin-annotation@3.0.1/dist/chartjs-plugin-annotation.min.js'
+}
+
+# Empreintes SRI épinglées des bibliothèques tierces ({chemin: 'sha384-...'}, voir pin_vendor)
+VENDOR_LOCK_PATH = os.path.join(STATIC_DIR, 'vendor.lock.json')
+
+# Ressources de l'application à empreinter
+APP_ASSETS = ('style.css', 'script.js')
+
+# Types de réponses compressibles à la volée
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/css', 'text/plain',
+                      'application/javascript', 'text/javascript')
+
+
+class VendorError(Exception):
+    """Bibliothèque tierce absente, non épinglée ou dont le contenu ne correspond pas à l'empreinte"""
+
+
+def integrity(content: bytes) -> str:
+    """Empreinte Subresource Integrity (sha384-<base64>)"""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(content).digest()).decode('ascii')
+
+
+def load_vendor_lock() -> Dict[str, str]:
+    """Empreintes épinglées ({} si vendor.lock.json est absent)"""
+    try:
+        with open(VENDOR_LOCK_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _download(url: str) -> bytes:
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.read()
+    except OSError as e:
+        raise VendorError(f"Téléchargement impossible de {url}: {e}")
+
+
+def pin_vendor() -> Dict[str, str]:
+    """
+    Télécharge les bibliothèques tierces et épingle leur empreinte dans vendor.lock.json
+    (à lancer une fois par changement de version, puis committer vendor/ et le verrou)
+
+    Returns:
+        {chemin: empreinte SRI}
+    """
+    lock = {}
+    for name, url in VENDOR.items():
+        content = _download(url)
+        path = os.path.join(STATIC_DIR, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        lock[name] = integrity(content)
+    with open(VENDOR_LOCK_PATH, 'w', encoding='utf-8') as f:
+        json.dump(lock, f, indent=2)
+        f.write('\n')
+    return lock
+
+
+def fetch_vendor(download: bool = True) -> Dict[str, Optional[str]]:
+    """
+    Vérifie les bibliothèques de static/vendor/ contre leur empreinte épinglée ;
+    une bibliothèque absente est téléchargée (download=True) puis vérifiée.
+    Une bibliothèque non épinglée n'est ni téléchargée ni copiée : elle reste
+    servie depuis le CDN (voir asset_path) jusqu'à python build_assets.py --pin
+
+    Returns:
+        {chemin: empreinte SRI vérifiée, None si non épinglée}
+
+    Raises:
+        VendorError: Bibliothèque épinglée absente (ou non téléchargeable) ou empreinte différente
+    """
+    lock = load_vendor_lock()
+    verified: Dict[str, Optional[str]] = {}
+    for name, url in VENDOR.items():
+        expected = lock.get(name)
+        if not expected:
+            verified[name] = None
+            continue
+        path = os.path.join(STATIC_DIR, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                content = f.read()
+        elif download:
+            content = _download(url)
+        else:
+            raise VendorError(f"{name} absent de static/vendor/")
+        actual = integrity(content)
+        if actual != expected:
+            raise VendorError(f"Empreinte de {name} inattendue : {actual} (attendu {expected})")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(content)
+            os.replace(path + '.tmp', path)
+        verified[name] = actual
+    return verified
+
+
+def build(fetch: bool = True) -> Dict[str, str]:
+    """
+    Génère static/dist/ : copies empreintées + variantes .gz/.br + manifest.json
+
+    Args:
+        fetch: Télécharger les bibliothèques tierces manquantes (sinon, elles doivent être présentes)
+
+    Returns:
+        Manifeste {nom logique: nom empreinté}
+
+    Raises:
+        VendorError: Bibliothèque tierce épinglée absente ou non conforme à son empreinte (voir fetch_vendor)
+    """
+    pinned = fetch_vendor(download=fetch)
+
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for name in APP_ASSETS + tuple(name for name, digest in pinned.items() if digest):
+        source = os.path.join(STATIC_DIR, name)
+        if not os.path.exists(source):
+            continue
+        with open(source, 'rb') as f:
+            content = f.read()
+
+        stem, ext = os.path.splitext(os.path.basename(name))
+        digest = hashlib.sha256(content).hexdigest()[:12]
+        target = f"{stem}.{digest}{ext}"
+        with open(os.path.join(DIST_DIR, target), 'wb') as f:
+            f.write(content)
+        with open(os.path.join(DIST_DIR, target + '.gz'), 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(os.path.join(DIST_DIR, target + '.br'), 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+        manifest[name] = target
+
+    # Suppression des anciennes empreintes
+    keep = set(manifest.values())
+    for filename in os.listdir(DIST_DIR):
+        base = filename[:-3] if filename.endswith(('.gz', '.br')) else filename
+        if filename != 'manifest.json' and base not in keep:
+            os.remove(os.path.join(DIST_DIR, filename))
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest() -> Dict[str, str]:
+    """Manifeste du dernier build ({} si les ressources n'ont pas été construites)"""
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_path(manifest: Dict[str, str], name: str) -> Optional[str]:
+    """
+    Chemin public d'une ressource
+
+    Returns:
+        '/assets/<empreinte>' si construite (et à jour), l'URL du CDN pour une bibliothèque
+        tierce absente de static/vendor/, sinon None (servir depuis /static/)
+    """
+    if name in manifest and not _modified_since_build(name):
+        return f"/assets/{manifest[name]}"
+    if name in VENDOR and not os.path.exists(os.path.join(STATIC_DIR, name)):
+        return VENDOR[name]
+    return None
+
+
+def _modified_since_build(name: str) -> bool:
+    """True si la source a été modifiée après le dernier build (développement)"""
+    try:
+        return os.path.getmtime(os.path.join(STATIC_DIR, name)) > os.path.getmtime(MANIFEST_PATH)
+    except OSError:
+        return False
+
+
+def accepted_encodings(accept_encoding: str) -> Tuple[str, ...]:
+    """Encodages utilisables par ordre de préférence ('br' puis 'gzip')"""
+    accepted = set()
+    for value in accept_encoding.split(','):
+        coding, _, params = value.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        accepted.add(coding.strip().lower())
+
+    encodings = []
+    if 'br' in accepted and brotli is not None:
+        encodings.append('br')
+    if 'gzip' in accepted:
+        encodings.append('gzip')
+    return tuple(encodings)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compression à la volée (niveaux modérés : réponses dynamiques)"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
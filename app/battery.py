@@ -0,0 +1,219 @@
+"""
+Simulateur de dimensionnement de batterie sur l'historique 5 min
+Les flux du stockage local (surplus injecté, soutirage réseau, voir
+app.tariffs.energy_flows) sont rejoués à travers un modèle d'état de charge :
+la batterie absorbe le surplus et couvre le soutirage dans la limite de sa
+capacité, de sa puissance et de son rendement. Chaque scénario est
+séquentiel sur ses créneaux ; une grille de scénarios (capacités × puissances ×
+rendements) est donc répartie sur un pool de processus.
+
+Le pool est unique par processus et créé à la première simulation, avec la
+méthode forkserver : ses processus ne sont pas des copies du worker web
+(threads, connexions SQLite), ce qui évite les interblocages d'un fork après
+threads. Chaque processus reçoit les flux une fois par lot de scénarios.
+
+Le coût de chaque créneau suit une courbe de prix d'achat (Tempo par défaut,
+voir app.tariffs.price_matrix) : les économies tiennent compte des jours
+rouges et des heures creuses.
+"""
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Pool de simulation du processus (voir _get_pool), créé à la première grille
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_WORKERS = 0
+_POOL_LOCK = threading.Lock()
+
+
+def simulate(surplus, deficit, prices, hours, sell_price: float, capacity_kwh: float, power_kw: float,
+             efficiency: float, min_soc: float = 0.0, initial_soc: float = 0.0) -> Dict[str, float]:
+    """
+    Rejoue une période à travers une batterie (stratégie autoconsommation)
+
+    Args:
+        surplus: Énergie injectée sans batterie par créneau (kWh)
+        deficit: Énergie soutirée sans batterie par créneau (kWh)
+        prices: Prix d'achat par créneau (€/kWh)
+        hours: Durée de chaque créneau (h) : 5 min, ou 15 min / 1 h pour une journée compactée
+        sell_price: Prix de revente du surplus (€/kWh)
+        capacity_kwh: Capacité utile
+        power_kw: Puissance maximale de charge et de décharge
+        efficiency: Rendement aller-retour (réparti à parts égales entre charge et décharge)
+        min_soc: État de charge minimal (fraction de la capacité)
+        initial_soc: État de charge initial (fraction de la capacité)
+
+    Returns:
+        {'buy_kwh', 'sell_kwh', 'buy_cost', 'sell_revenue', 'charged_kwh', 'discharged_kwh',
+         'cycles', 'final_soc'}
+    """
+    leg = efficiency ** 0.5
+    floor = capacity_kwh * min_soc
+    soc = capacity_kwh * max(initial_soc, min_soc)
+    buy_kwh = sell_kwh = buy_cost = charged = discharged = 0.0
+
+    # Boucle sur des listes Python : plus rapide que l'indexation NumPy élément par élément
+    for excess, missing, price, duration in zip(surplus, deficit, prices, hours):
+        if excess > 0:
+            charge = min(excess, power_kw * duration, (capacity_kwh - soc) / leg)
+            soc += charge * leg
+            charged += charge
+            sell_kwh += excess - charge
+        elif missing > 0:
+            delivered = min(missing, power_kw * duration, (soc - floor) * leg)
+            if delivered > 0:
+                soc -= delivered / leg
+                discharged += delivered
+                missing -= delivered
+            buy_kwh += missing
+            buy_cost += missing * price
+
+    return {
+        'buy_kwh': buy_kwh,
+        'sell_kwh': sell_kwh,
+        'buy_cost': buy_cost,
+        'sell_revenue': sell_kwh * sell_price,
+        'charged_kwh': charged,
+        'discharged_kwh': discharged,
+        'cycles': discharged / capacity_kwh if capacity_kwh else 0.0,
+        'final_soc': soc / capacity_kwh if capacity_kwh else 0.0
+    }
+
+
+def scenario_grid(capacities: Iterable[float], powers: Iterable[float],
+                  efficiencies: Iterable[float]) -> List[Dict[str, float]]:
+    """Produit cartésien des paramètres : [{'capacity_kwh', 'power_kw', 'efficiency'}]"""
+    return [{'capacity_kwh': float(capacity), 'power_kw': float(power), 'efficiency': float(efficiency)}
+            for capacity, power, efficiency in itertools.product(capacities, powers, efficiencies)]
+
+
+def _run_scenarios(flows: Dict[str, np.ndarray], sell_price: float, min_soc: float,
+                   scenarios: List[Dict[str, float]]) -> List[Dict[str, float]]:
+    """Simulation d'un lot de scénarios (processus du pool ou courant) ; flux convertis une fois par lot"""
+    # Boucle de simulate sur des listes Python : plus rapide que l'indexation NumPy élément par élément
+    surplus, deficit, prices, hours = (flows[key].tolist() for key in ('surplus', 'deficit', 'prices', 'hours'))
+    return [simulate(surplus, deficit, prices, hours, sell_price, min_soc=min_soc, **scenario)
+            for scenario in scenarios]
+
+
+def _pool_context():
+    """Contexte forkserver si disponible (Linux, macOS), sinon None : simulation dans le processus courant"""
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('forkserver')
+    # Le serveur de fork importe NumPy et ce module une fois pour tous les processus du pool
+    context.set_forkserver_preload(['numpy', __name__])
+    return context
+
+
+def _get_pool(workers: int) -> Optional[ProcessPoolExecutor]:
+    """Pool unique du processus (recréé seulement si sa taille change), None sans forkserver"""
+    global _POOL, _POOL_WORKERS
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_WORKERS != workers:
+            context = _pool_context()
+            if context is None:
+                return None
+            if _POOL is not None:
+                _POOL.shutdown(wait=False)
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _POOL_WORKERS = workers
+        return _POOL
+
+
+def shutdown_pool():
+    """Arrête le pool de simulation (arrêt du worker)"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Oublie un pool cassé (processus tué) : le suivant est recréé à la demande"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False)
+
+
+def sweep(flows: Dict[str, Any], prices: np.ndarray, scenarios: List[Dict[str, float]],
+          sell_price: float, workers: Optional[int] = None, min_soc: float = 0.0) -> Dict[str, Any]:
+    """
+    Simule une grille de scénarios de batterie sur les mêmes flux
+
+    Args:
+        flows: Flux d'énergie par créneau (voir app.tariffs.energy_flows)
+        prices: Prix d'achat par créneau (€/kWh)
+        scenarios: Paramètres de chaque scénario (voir scenario_grid)
+        sell_price: Prix de revente du surplus (€/kWh)
+        workers: Processus du pool partagé par les requêtes du processus (None ou 0 ou 1 =
+            processus courant) ; sans forkserver (Windows), ou si le pool est cassé, les
+            scénarios sont simulés dans le processus courant
+        min_soc: État de charge minimal (fraction de la capacité)
+
+    Returns:
+        {'baseline': {...}, 'results': [scénario + simulation + économies] triés par économies décroissantes,
+         'workers': processus utilisés}
+    """
+    surplus = flows['export']
+    deficit = flows['import']
+    baseline = {
+        'buy_kwh': float(deficit.sum()),
+        'sell_kwh': float(surplus.sum()),
+        'buy_cost': float(deficit @ prices),
+        'sell_revenue': float(surplus.sum() * sell_price),
+        'self_consumed_kwh': float(flows['self_consumed'].sum())
+    }
+    baseline['cost'] = baseline['buy_cost'] - baseline['sell_revenue']
+
+    arrays = {'surplus': np.asarray(surplus, dtype=np.float64), 'deficit': np.asarray(deficit, dtype=np.float64),
+              'prices': np.asarray(prices, dtype=np.float64),
+              'hours': np.asarray(flows['hours'], dtype=np.float64)}
+    workers = workers or 1
+    pool = _get_pool(workers) if workers > 1 and len(scenarios) > 1 else None
+    simulations = None
+    if pool is not None:
+        # Un lot par processus : les flux sont transmis une fois par lot, pas par scénario
+        chunks = [scenarios[i::workers] for i in range(min(workers, len(scenarios)))]
+        try:
+            futures = [pool.submit(_run_scenarios, arrays, sell_price, min_soc, chunk) for chunk in chunks]
+            results_by_chunk = [future.result() for future in futures]
+        except BrokenProcessPool:
+            _discard_pool(pool)
+        else:
+            # Remise dans l'ordre des scénarios (lots entrelacés)
+            simulations = [None] * len(scenarios)
+            for i, chunk_results in enumerate(results_by_chunk):
+                simulations[i::len(chunks)] = chunk_results
+            workers = len(chunks)
+    if simulations is None:
+        workers = 1
+        simulations = _run_scenarios(arrays, sell_price, min_soc, scenarios)
+
+    consumption = float(flows['consumption'].sum())
+    results = []
+    for scenario, simulation in zip(scenarios, simulations):
+        cost = simulation['buy_cost'] - simulation['sell_revenue']
+        savings = baseline['cost'] - cost
+        results.append({
+            **scenario,
+            **{key: round(value, 3 if key in ('cycles', 'final_soc') else 2) for key, value in simulation.items()},
+            'self_consumed_kwh': round(consumption - simulation['buy_kwh'], 2),
+            'cost': round(cost, 2),
+            'savings': round(savings, 2) or 0.0,
+            'savings_per_kwh': round(savings / scenario['capacity_kwh'], 2) if scenario['capacity_kwh'] else None
+        })
+    results.sort(key=lambda result: result['savings'], reverse=True)
+    return {
+        'baseline': {key: round(value, 2) for key, value in baseline.items()},
+        'results': results,
+        'workers': workers
+    }
@@ -0,0 +1,199 @@
+"""
+Cache partagé entre workers (token Hyxi, jours Tempo, résultats amont, réponses)
+Backends disponibles, choisis par Config.CACHE_URL :
+- memory://                 : dictionnaire du processus (un seul worker)
+- sqlite:///data/cache.db   : fichier SQLite en mode WAL (workers d'une même machine)
+- redis://host:6379/0       : serveur Redis ou compatible (module redis requis)
+Les valeurs doivent être sérialisables en JSON.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class MemoryCache:
+    """Cache en mémoire du processus (comportement historique)"""
+
+    # Purge des entrées expirées au plus toutes les N écritures (et pas avant len(cache) écritures)
+    PURGE_EVERY = 200
+
+    def __init__(self):
+        self._data = {}  # {clé: (expiration ou None, valeur)}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valeur associée à key, None si absente ou expirée (entrée expirée supprimée)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.time():
+                del self._data[key]
+                return None
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Enregistre une valeur (ttl en secondes, None = sans expiration)"""
+        now = time.time()
+        with self._lock:
+            self._data[key] = (now + ttl if ttl is not None else None, value)
+            # Entrées expirées jamais relues (ex: journées passées lues une seule fois) : purge
+            # complète après au moins len(cache) écritures, soit un coût amorti constant par écriture
+            self._writes += 1
+            if self._writes >= max(self.PURGE_EVERY, len(self._data)):
+                self._writes = 0
+                for expired in [k for k, entry in self._data.items() if entry[0] is not None and entry[0] <= now]:
+                    del self._data[expired]
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Enregistre la valeur seulement si la clé est absente ; True si enregistrée"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                return False
+            self._data[key] = (time.time() + ttl if ttl is not None else None, value)
+            return True
+
+    def delete(self, key: str):
+        """Supprime une clé"""
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteCache:
+    """Cache dans un fichier SQLite partagé par les processus d'une même machine"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache (
+        key        TEXT PRIMARY KEY,
+        value      TEXT NOT NULL,
+        expires_at REAL
+    );
+    """
+
+    # Purge des entrées expirées toutes les N écritures
+    PURGE_EVERY = 200
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Chemin du fichier SQLite (créé si nécessaire)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connexion propre au thread courant (mode WAL : lectures concurrentes)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valeur associée à key, None si absente ou expirée"""
+        row = self._conn().execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Enregistre une valeur (ttl en secondes, None = sans expiration)"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value, ensure_ascii=False), now + ttl if ttl is not None else None)
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Enregistre la valeur seulement si la clé est absente ; True si enregistrée"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache WHERE key = ? AND expires_at IS NOT NULL AND expires_at <= ?', (key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value, ensure_ascii=False), now + ttl if ttl is not None else None)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        """Supprime une clé"""
+        self._conn().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+
+class RedisCache:
+    """Cache sur un serveur Redis (ou compatible : Valkey, KeyDB, Dragonfly...)"""
+
+    def __init__(self, url: str, prefix: str = 'hyxi:'):
+        """
+        Args:
+            url: URL redis://host:port/db
+            prefix: Préfixe des clés (plusieurs applications sur un même serveur)
+        """
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    @staticmethod
+    def _ttl_ms(ttl: Optional[float]) -> Optional[int]:
+        return max(1, math.ceil(ttl * 1000)) if ttl is not None else None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Valeur associée à key, None si absente ou expirée"""
+        raw = self._redis.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Enregistre une valeur (ttl en secondes, None = sans expiration)"""
+        self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), px=self._ttl_ms(ttl))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Enregistre la valeur seulement si la clé est absente ; True si enregistrée"""
+        return bool(self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False),
+                                    px=self._ttl_ms(ttl), nx=True))
+
+    def delete(self, key: str):
+        """Supprime une clé"""
+        self._redis.delete(self.prefix + key)
+
+
+def create_cache(url: str):
+    """
+    Instancie le backend correspondant à une URL
+
+    Args:
+        url: memory://, sqlite:///chemin/vers/cache.db ou redis://host:port/db
+
+    Raises:
+        ValueError: si le schéma n'est pas reconnu
+    """
+    scheme, _, rest = url.partition('://')
+    if scheme == 'memory':
+        return MemoryCache()
+    if scheme == 'sqlite':
+        # sqlite:///data/cache.db -> data/cache.db ; sqlite:////abs/cache.db -> /abs/cache.db
+        return SQLiteCache(rest[1:] if rest.startswith('/') else rest)
+    if scheme in ('redis', 'rediss', 'unix'):
+        return RedisCache(url)
+    raise ValueError(f"Backend de cache inconnu: {url}")
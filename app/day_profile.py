@@ -0,0 +1,173 @@
+"""
+Profils de journée type (production, consommation) par créneau de 5 minutes
+Les journées du stockage local sont rangées dans une matrice journées ×
+créneaux (288 créneaux de l'heure locale) ; moyennes et percentiles de chaque
+groupe (semaine / week-end, couleur Tempo) sont calculés colonne par colonne
+par NumPy, sans boucle sur les points. Un profil sur une année s'obtient en
+quelques millisecondes une fois les journées lues.
+
+Une journée compactée (15 min ou 1 h, voir SeriesStore.compact) contribue sa
+puissance moyenne à chacun des créneaux 5 min couverts ; les jours de
+changement d'heure sont rangés à leur heure locale (heure doublée moyennée,
+heure sautée absente).
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.store import SLOT_SECONDS
+from app.tariffs import MINUTES_PER_DAY, local_minutes
+
+SLOT_MINUTES = SLOT_SECONDS // 60
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+# Découpages possibles des journées (paramètre split)
+SPLITS = ('weekday', 'tempo')
+
+
+def day_matrix(days: List[Dict[str, Any]], tz, channels: Iterable[str]) -> Dict[str, np.ndarray]:
+    """
+    Matrice journées × créneaux 5 min (heure locale) de chaque canal
+
+    Args:
+        days: Journées lues par SeriesStore.get_days
+        tz: Timezone pytz de l'installation
+        channels: Canaux à ranger
+
+    Returns:
+        {canal: tableau (journées, SLOTS_PER_DAY) en W, NaN pour un créneau sans mesure}
+    """
+    channels = list(channels)
+    rows, slots, values = [], [], {channel: [] for channel in channels}
+    for i, day in enumerate(days):
+        points, step = day['points'], day['step']
+        offsets = np.arange(points, dtype=np.int64) * step
+        if day['slots'] * SLOT_SECONDS == 86400:
+            minutes = offsets // 60
+        else:
+            minutes = local_minutes(day['base_ts'] + offsets, tz)
+        # Point de 15 min ou 1 h : répété sur chacun de ses créneaux 5 min
+        factor = step // SLOT_SECONDS
+        day_slots = (np.repeat(minutes // SLOT_MINUTES, factor) + np.tile(np.arange(factor), points)) % SLOTS_PER_DAY
+        slots.append(day_slots)
+        rows.append(np.full(day_slots.size, i, dtype=np.int64))
+        for channel in channels:
+            mean = day.get(channel, {}).get('mean')
+            mean = np.full(points, np.nan) if mean is None else np.asarray(mean, dtype=np.float64)
+            values[channel].append(np.repeat(mean, factor))
+
+    if not days:
+        return {channel: np.empty((0, SLOTS_PER_DAY)) for channel in channels}
+    size = len(days) * SLOTS_PER_DAY
+    cells = np.concatenate(rows) * SLOTS_PER_DAY + np.concatenate(slots)
+    result = {}
+    for channel in channels:
+        flat = np.concatenate(values[channel])
+        valid = ~np.isnan(flat)
+        # Somme et effectif par cellule : l'heure doublée du changement d'heure est moyennée
+        sums = np.bincount(cells[valid], weights=flat[valid], minlength=size)
+        counts = np.bincount(cells[valid], minlength=size)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result[channel] = (sums / counts).reshape(len(days), SLOTS_PER_DAY)
+    return result
+
+
+def day_groups(dates: List[str], split: Iterable[str] = (),
+               tempo: Optional[Dict[str, Dict[str, Any]]] = None) -> List[str]:
+    """
+    Groupe de chaque journée : 'all', ou combinaison de 'weekday' / 'weekend' et de la
+    couleur Tempo ('bleu', 'blanc', 'rouge', 'inconnu'), ex : 'weekend/bleu'
+
+    Args:
+        dates: Dates YYYY-MM-DD
+        split: Découpages (voir SPLITS)
+        tempo: {date: {'couleur', ...}} (découpage 'tempo')
+    """
+    split = list(split)
+    labels = []
+    for date_str in dates:
+        parts = []
+        if 'weekday' in split:
+            parts.append('weekend' if datetime.strptime(date_str, '%Y-%m-%d').weekday() >= 5 else 'weekday')
+        if 'tempo' in split:
+            parts.append(str((tempo or {}).get(date_str, {}).get('couleur') or 'inconnu').lower())
+        labels.append('/'.join(parts) or 'all')
+    return labels
+
+
+def typical_day(matrices: Dict[str, np.ndarray], groups: List[str],
+                quantiles: Iterable[float] = ()) -> Dict[str, Dict[str, Any]]:
+    """
+    Journée type de chaque groupe : moyenne et percentiles par créneau
+
+    Args:
+        matrices: Matrices journées × créneaux (voir day_matrix)
+        groups: Groupe de chaque journée (voir day_groups)
+        quantiles: Rangs entre 0 et 1 (ex : 0.1, 0.5, 0.9)
+
+    Returns:
+        {groupe: {'days': journées, canal: {'mean': tableau, 'p10': tableau, ...}}} (W par créneau)
+    """
+    quantiles = list(quantiles)
+    labels = np.asarray(groups)
+    result = {}
+    for group in dict.fromkeys(groups):
+        selected = labels == group
+        entry: Dict[str, Any] = {'days': int(selected.sum())}
+        for channel, matrix in matrices.items():
+            block = matrix[selected]
+            # Créneau sans aucune mesure dans le groupe : NaN sans avertissement
+            with np.errstate(invalid='ignore', divide='ignore'):
+                counts = np.sum(~np.isnan(block), axis=0)
+                stats = {'mean': np.nansum(block, axis=0) / counts}
+            if quantiles:
+                # Un seul tri par colonne (NaN en fin) puis interpolation linéaire entre rangs,
+                # comme np.nanpercentile mais sans boucle Python sur les colonnes
+                ordered = np.sort(block, axis=0)
+                columns = np.arange(SLOTS_PER_DAY)
+                last = np.maximum(counts - 1, 0)
+                for q in quantiles:
+                    position = q * last
+                    lower = np.floor(position).astype(np.int64)
+                    upper = np.minimum(lower + 1, last)
+                    fraction = position - lower
+                    row = ordered[lower, columns] * (1 - fraction) + ordered[upper, columns] * fraction
+                    stats[f"p{q * 100:g}"] = np.where(counts > 0, row, np.nan)
+            entry[channel] = stats
+        result[group] = entry
+    return result
+
+
+def slot_labels() -> List[str]:
+    """Heure locale de début de chaque créneau : ['00:00', '00:05', ...]"""
+    return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, MINUTES_PER_DAY, SLOT_MINUTES)]
+
+
+def hourly_means(timestamps: Iterable[int], series: Dict[str, Iterable[float]], tz=None) -> Dict[int, Dict[str, float]]:
+    """
+    Moyenne par heure locale d'une série brute (ex : une journée de queryPlantPowerStatistics)
+
+    Args:
+        timestamps: Timestamps (s)
+        series: {nom: valeurs} alignées sur timestamps (valeur manquante = 0)
+        tz: Timezone (None = heure locale de la machine)
+
+    Returns:
+        {heure: {nom: moyenne}} pour les heures présentes
+    """
+    timestamps = np.asarray(list(timestamps), dtype=np.int64)
+    if not timestamps.size:
+        return {}
+    # Une conversion par heure UTC distincte
+    unique_hours, inverse = np.unique(timestamps // 3600, return_inverse=True)
+    hours = np.array([datetime.fromtimestamp(int(hour) * 3600, tz).hour for hour in unique_hours],
+                     dtype=np.int64)[inverse]
+    counts = np.bincount(hours, minlength=24)
+    means = {}
+    for name, values in series.items():
+        values = np.asarray(list(values)[:timestamps.size], dtype=np.float64)
+        values = np.pad(values, (0, timestamps.size - values.size))
+        means[name] = np.bincount(hours, weights=values, minlength=24)
+    present = np.flatnonzero(counts)
+    return {int(hour): {name: float(sums[hour] / counts[hour]) for name, sums in means.items()} for hour in present}
@@ -0,0 +1,112 @@
+"""
+Sous-échantillonnage des séries pour les graphiques longue durée
+S'appuie sur la pyramide min/max/moyenne du stockage local : le nombre de
+points renvoyés reste borné quelle que soit la durée, et les pics sont
+conservés via les enveloppes min/max.
+"""
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.store import LEVELS
+
+# Ordre de recherche du niveau : du plus fin au plus grossier
+LEVEL_ORDER = ('5min', '15min', 'hour', 'day')
+
+
+def choose_level(days: List[Dict[str, Any]], max_points: int, resolution: str = 'auto') -> int:
+    """
+    Choisit le niveau de pyramide le plus fin qui tient dans max_points
+
+    Args:
+        days: Journées à afficher (doivent contenir 'slots')
+        max_points: Nombre maximal de points souhaité
+        resolution: 'auto' ou un niveau imposé ('5min', '15min', 'hour', 'day')
+
+    Returns:
+        Facteur du niveau (1, 3, 12 ou 0 pour la journée)
+    """
+    if resolution != 'auto':
+        return LEVELS[resolution]
+
+    for name in LEVEL_ORDER:
+        factor = LEVELS[name]
+        points = sum(day['slots'] // factor if factor else 1 for day in days)
+        if points <= max_points:
+            return factor
+    return LEVELS['day']
+
+
+def concat_days(day_entries: List[Dict[str, Any]], channels: Iterable[str]) -> Dict[str, Any]:
+    """
+    Concatène les niveaux de plusieurs journées en une série continue
+
+    Returns:
+        {'timestamps': ndarray, 'day_index': ndarray (indice de journée par point),
+         channel: {'mean', 'min', 'max'}}
+    """
+    channels = list(channels)
+    timestamps, day_index = [], []
+    parts = {channel: {'mean': [], 'min': [], 'max': []} for channel in channels}
+
+    for i, entry in enumerate(day_entries):
+        first = entry[channels[0]]['mean'] if channels[0] in entry else None
+        count = first.size if first is not None else 0
+        timestamps.append(entry['base_ts'] + np.arange(count, dtype=np.int64) * entry['step'])
+        day_index.append(np.full(count, i, dtype=np.int32))
+        for channel in channels:
+            for key in ('mean', 'min', 'max'):
+                values = entry[channel][key] if channel in entry else np.full(count, np.nan, dtype=np.float32)
+                parts[channel][key].append(values)
+
+    result = {
+        'timestamps': np.concatenate(timestamps) if timestamps else np.array([], dtype=np.int64),
+        'day_index': np.concatenate(day_index) if day_index else np.array([], dtype=np.int32)
+    }
+    for channel in channels:
+        result[channel] = {
+            key: np.concatenate(values) if values else np.array([], dtype=np.float32)
+            for key, values in parts[channel].items()
+        }
+    return result
+
+
+def rebucket(series: Dict[str, Any], channels: Iterable[str], max_points: int) -> Dict[str, Any]:
+    """
+    Regroupe des points consécutifs si la série dépasse encore max_points
+    (ex: plusieurs années au niveau journée). Moyenne des moyennes,
+    minimum des minima, maximum des maxima.
+    """
+    count = series['timestamps'].size
+    if count <= max_points:
+        return series
+
+    factor = math.ceil(count / max_points)
+    padded = math.ceil(count / factor) * factor
+
+    def blocks(values, fill):
+        out = np.full(padded, fill, dtype=np.float64)
+        out[:count] = values
+        return out.reshape(-1, factor)
+
+    result = {
+        'timestamps': series['timestamps'][::factor],
+        'day_index': series['day_index'][::factor]
+    }
+    for channel in channels:
+        mean = blocks(series[channel]['mean'], np.nan)
+        valid = ~np.isnan(mean)
+        counts = valid.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bucket_mean = np.where(counts > 0, np.where(valid, mean, 0).sum(axis=1) / np.maximum(counts, 1), np.nan)
+        bucket_min = np.where(counts > 0, np.nanmin(np.where(valid, blocks(series[channel]['min'], np.inf), np.inf), axis=1), np.nan)
+        bucket_max = np.where(counts > 0, np.nanmax(np.where(valid, blocks(series[channel]['max'], -np.inf), -np.inf), axis=1), np.nan)
+        result[channel] = {'mean': bucket_mean, 'min': bucket_min, 'max': bucket_max}
+    return result
+
+
+def to_json_list(values: np.ndarray, decimals: int = 1) -> List[Optional[float]]:
+    """Convertit un tableau en liste JSON (NaN -> None)"""
+    rounded = np.round(values.astype(np.float64), decimals)
+    return [None if math.isnan(v) else v for v in rounded.tolist()]
@@ -0,0 +1,136 @@
+"""
+Export en masse des séries 5 min du stockage local
+Les données sont écrites bloc par bloc (mémoire bornée) en CSV, Parquet,
+Arrow IPC (si pyarrow est installé) ou NumPy .npz.
+"""
+import io
+import tempfile
+import zipfile
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from app.store import CHANNELS
+
+COLUMNS = ('timestamp',) + CHANNELS
+
+FORMATS = ('csv', 'parquet', 'arrow', 'npz')
+
+
+def iter_chunks(day_entries: Iterable[Dict], days_per_chunk: int = 7) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Regroupe les journées lues du stockage en blocs colonnaires
+
+    Args:
+        day_entries: Journées au niveau 5 min (voir SeriesStore.get_days)
+        days_per_chunk: Nombre de journées par bloc
+
+    Yields:
+        {colonne: ndarray} avec 'timestamp' (int64, epoch s) et les canaux (float32, W)
+    """
+    buffer: List[Dict] = []
+
+    def flush():
+        # Journées compactées : moins de points, à leur pas propre (voir SeriesStore.compact)
+        chunk = {'timestamp': np.concatenate([
+            entry['base_ts'] + np.arange(entry['points'], dtype=np.int64) * entry['step'] for entry in buffer
+        ])}
+        for channel in CHANNELS:
+            chunk[channel] = np.concatenate([
+                entry[channel]['mean'] if channel in entry else np.full(entry['points'], np.nan, dtype=np.float32)
+                for entry in buffer
+            ]).astype(np.float32, copy=False)
+        return chunk
+
+    for entry in day_entries:
+        buffer.append(entry)
+        if len(buffer) >= days_per_chunk:
+            yield flush()
+            buffer = []
+    if buffer:
+        yield flush()
+
+
+def write_csv(chunks: Iterable[Dict[str, np.ndarray]], path: str) -> int:
+    """Écrit un CSV (valeurs absentes laissées vides) ; retourne le nombre de lignes"""
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(COLUMNS) + '\n')
+        for chunk in chunks:
+            table = np.column_stack([chunk['timestamp']] + [chunk[channel] for channel in CHANNELS])
+            text = io.StringIO()
+            np.savetxt(text, table, fmt=['%d'] + ['%.1f'] * len(CHANNELS), delimiter=',')
+            f.write(text.getvalue().replace('nan', ''))
+            rows += table.shape[0]
+    return rows
+
+
+def write_arrow(chunks: Iterable[Dict[str, np.ndarray]], path: str, fmt: str) -> int:
+    """
+    Écrit un fichier Parquet ou Arrow IPC, un row group / record batch par bloc
+
+    Raises:
+        ImportError: si pyarrow n'est pas installé
+    """
+    import pyarrow as pa
+
+    schema = pa.schema([('timestamp', pa.int64())] + [(channel, pa.float32()) for channel in CHANNELS])
+    rows = 0
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema, compression='zstd')
+        write = writer.write_table
+    else:
+        sink = pa.OSFile(path, 'wb')
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_table
+
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_arrays(
+                [pa.array(chunk[column], from_pandas=True) for column in COLUMNS],
+                schema=schema
+            )
+            write(table)
+            rows += table.num_rows
+    finally:
+        writer.close()
+        if fmt != 'parquet':
+            sink.close()
+    return rows
+
+
+def write_npz(chunks: Iterable[Dict[str, np.ndarray]], path: str) -> int:
+    """
+    Écrit une archive .npz (un tableau par colonne) sans la matérialiser en mémoire
+    Les blocs sont d'abord répartis dans un fichier temporaire par colonne, puis
+    chaque colonne est recopiée en flux dans sa propre entrée .npy.
+    """
+    dtypes = {'timestamp': np.dtype(np.int64), **{channel: np.dtype(np.float32) for channel in CHANNELS}}
+    rows = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parts = {column: open(f"{tmp}/{column}.bin", 'wb') for column in COLUMNS}
+        try:
+            for chunk in chunks:
+                for column in COLUMNS:
+                    parts[column].write(np.ascontiguousarray(chunk[column], dtype=dtypes[column]).tobytes())
+                rows += chunk['timestamp'].size
+        finally:
+            for part in parts.values():
+                part.close()
+
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for column in COLUMNS:
+                with archive.open(f"{column}.npy", 'w', force_zip64=True) as entry:
+                    header = {'descr': np.lib.format.dtype_to_descr(dtypes[column]),
+                              'fortran_order': False, 'shape': (rows,)}
+                    np.lib.format.write_array_header_1_0(entry, header)
+                    with open(f"{tmp}/{column}.bin", 'rb') as part:
+                        while True:
+                            block = part.read(1 << 20)
+                            if not block:
+                                break
+                            entry.write(block)
+    return rows
@@ -0,0 +1,194 @@
+"""
+Parc d'installations
+- Polling : à chaque créneau de 5 minutes, la journée en cours de chaque
+  installation est ingérée dans le stockage local par un pool borné de
+  threads ; le débit vers l'API reste plafonné par le budget partagé du
+  client (RateLimiter).
+- Agrégats : réductions vectorisées sur les cumuls journaliers du stockage
+  (une seule passe locale, aucun appel amont par installation).
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable
+
+import numpy as np
+
+from app.store import SLOT_SECONDS
+
+
+class FleetPoller:
+    """Ingestion périodique de toutes les installations (leader uniquement si un bail est fourni)"""
+
+    def __init__(self, plants: Callable[[], Iterable[str]], poll: Callable[[str], bool],
+                 interval: int = 300, offset: int = 30, workers: int = 16, lease=None,
+                 schedule=None):
+        """
+        Args:
+            plants: Fonction retournant les identifiants d'installations à interroger
+            poll: Fonction d'ingestion d'une installation (True si réussie)
+            interval: Durée d'un créneau en secondes (5 min)
+            offset: Décalage (s) après le début du créneau, le temps que l'amont publie le point
+            workers: Installations interrogées simultanément
+            lease: Bail de leader (app.leader.LeaderLease), None pour une réplique unique
+            schedule: Calendrier par installation (app.schedule.SolarSchedule), None pour
+                interroger chaque installation à chaque créneau
+        """
+        self.plants = plants
+        self.poll = poll
+        self.interval = interval
+        self.offset = offset
+        self.workers = workers
+        self.lease = lease
+        self.schedule = schedule
+        self.last_run: Dict[str, float] = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Démarre le thread de polling (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='fleet-poller', daemon=True)
+                self._thread.start()
+
+    def poll_all(self) -> Dict[str, float]:
+        """
+        Interroge en parallèle les installations dont le créneau est dû
+
+        Returns:
+            {'plants', 'ok', 'failed', 'skipped', 'duration'}
+        """
+        start = time.time()
+        plant_ids = list(self.plants())
+        slot = self.schedule.slot_start(start) if self.schedule is not None else start
+
+        def safe_poll(plant_id):
+            try:
+                # Bail perdu en cours de passe : les installations restantes sont laissées au nouveau leader
+                if self.lease is not None and not self.lease.is_leader:
+                    return None
+                # Nuit : installation interrogée à cadence réduite
+                if self.schedule is not None and not self.schedule.is_due(slot, plant_id):
+                    return None
+                return self.poll(plant_id)
+            except Exception as e:
+                print(f"Erreur polling installation {plant_id}: {e}")
+                return False
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fleet') as executor:
+            results = list(executor.map(safe_poll, plant_ids))
+
+        self.last_run = {
+            'plants': len(plant_ids),
+            'ok': sum(1 for ok in results if ok),
+            'failed': sum(1 for ok in results if ok is False),
+            'skipped': sum(1 for ok in results if ok is None),
+            'duration': round(time.time() - start, 2)
+        }
+        return self.last_run
+
+    def _run(self):
+        """Boucle alignée sur les créneaux de 5 minutes"""
+        while True:
+            try:
+                if self.lease is None:
+                    self.poll_all()
+                elif self.lease.try_acquire():
+                    # Bail renouvelé pendant toute la passe (centaines d'installations)
+                    with self.lease.hold():
+                        self.poll_all()
+            except Exception as e:
+                print(f"Erreur poller parc: {e}")
+
+            now = time.time()
+            time.sleep(self.interval - (now - self.offset) % self.interval)
+
+
+def autoconso_rate(production, consumption, self_consumed, resale: bool) -> np.ndarray:
+    """
+    Taux d'autoconsommation (%), comme _process_aggregated_data
+    - revente : part de la production consommée sur place
+    - simple : production / consommation, plafonné à 100 %
+    """
+    production = np.asarray(production, dtype=np.float64)
+    consumption = np.asarray(consumption, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if resale:
+            rate = np.where(production > 0, np.asarray(self_consumed) / production * 100, 0)
+        else:
+            rate = np.where(production > 0,
+                            np.where(consumption > 0, np.minimum(production / consumption * 100, 100), 100), 0)
+    return rate
+
+
+def rollup_income(rollups: Dict[str, np.ndarray], tarif_hp, tarif_hc, resale: bool,
+                  tarif_vente: float) -> np.ndarray:
+    """
+    Revenu (€) de chaque ligne de cumuls journaliers, aux tarifs HP/HC de son jour
+    - revente : autoconsommation au tarif d'achat + surplus revendu
+    - simple : toute la production au tarif d'achat
+    """
+    if resale:
+        return (rollups['self_consumed_hp'] * tarif_hp
+                + (rollups['self_consumed'] - rollups['self_consumed_hp']) * tarif_hc
+                + rollups['surplus'] * tarif_vente)
+    return (rollups['production_hp'] * tarif_hp
+            + (rollups['production'] - rollups['production_hp']) * tarif_hc)
+
+
+def fleet_metrics(rollups: Dict[str, np.ndarray], tarifs: Dict[str, Dict[str, float]],
+                  capacities: Dict[str, float], resale: bool, tarif_vente: float) -> Dict[str, Any]:
+    """
+    Indicateurs par installation sur une période, en une passe sur les cumuls journaliers
+
+    Args:
+        rollups: Cumuls journaliers en colonnes (voir SeriesStore.get_rollups)
+        tarifs: {date: {'tarif_hp', 'tarif_hc'}} pour les dates des cumuls
+        capacities: {plant_id: puissance crête (kWc)}
+        resale: Mode revente du surplus (sinon toute la production est valorisée au tarif d'achat)
+        tarif_vente: Prix de revente du surplus (€/kWh)
+
+    Returns:
+        {'plant_id': ndarray, 'days', 'production', 'consumption', 'buy', 'sell',
+         'self_consumed', 'income', 'peak_kw', 'autoconso_rate', 'pv_performance'}
+        (énergies en kWh, taux en %)
+    """
+    plant_ids, plant_index = np.unique(rollups['plant_id'], return_inverse=True)
+    days, day_index = np.unique(rollups['day'], return_inverse=True)
+    count = plant_ids.size
+
+    # Tarifs HP/HC de chaque ligne (une recherche par jour distinct)
+    tarif_hp = np.array([tarifs[day]['tarif_hp'] for day in days], dtype=np.float64)[day_index]
+    tarif_hc = np.array([tarifs[day]['tarif_hc'] for day in days], dtype=np.float64)[day_index]
+
+    income = rollup_income(rollups, tarif_hp, tarif_hc, resale, tarif_vente)
+
+    def total(values):
+        return np.bincount(plant_index, weights=values, minlength=count)
+
+    metrics = {
+        'plant_id': plant_ids,
+        'days': np.bincount(plant_index, minlength=count),
+        'production': total(rollups['production']),
+        'consumption': total(rollups['consumption']),
+        'buy': total(rollups['buy']),
+        'sell': total(rollups['sell']),
+        'self_consumed': total(rollups['self_consumed']),
+        'income': total(income)
+    }
+    peak = np.zeros(count)
+    np.maximum.at(peak, plant_index, rollups['peak_w'])
+    metrics['peak_kw'] = peak / 1000
+
+    production = metrics['production']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Rendement PV : production / (capacité × heures productives), faute d'éphémérides locales
+        productive_hours = total(rollups['productive_slots']) * SLOT_SECONDS / 3600
+        capacity = np.array([capacities.get(plant_id, 0) or 0 for plant_id in plant_ids], dtype=np.float64)
+        theoretical = capacity * productive_hours
+        pv_performance = np.where(theoretical > 0, production / theoretical * 100, 0)
+
+    metrics['autoconso_rate'] = autoconso_rate(production, metrics['consumption'], metrics['self_consumed'], resale)
+    metrics['pv_performance'] = pv_performance
+    return metrics
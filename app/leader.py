@@ -0,0 +1,134 @@
+"""
+Élection d'un leader entre répliques (bail SQLite sur un volume partagé)
+Seul le détenteur du bail interroge l'API amont (ingestion, préchargement,
+rafraîchissement Tempo) ; les autres répliques lisent ses résultats. Un bail
+non renouvelé expire après ttl secondes et peut être repris par une autre
+réplique.
+"""
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lease (
+    name       TEXT PRIMARY KEY,
+    holder     TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class LeaseLost(Exception):
+    """Bail perdu pendant une collecte (une autre réplique a repris l'interrogation de l'amont)"""
+
+
+class LeaderLease:
+    """Bail nommé : au plus un détenteur à la fois, renouvelé périodiquement"""
+
+    def __init__(self, path: str, name: str = 'scheduler', ttl: float = 60.0,
+                 holder: Optional[str] = None):
+        """
+        Args:
+            path: Fichier SQLite partagé par les répliques (créé si nécessaire)
+            name: Nom du bail (un bail par rôle)
+            ttl: Durée de validité (s) ; un leader disparu est remplacé au plus après ttl
+            holder: Identifiant de la réplique (défaut: hôte:pid:aléa)
+        """
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._expires_at = 0.0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connexion propre au thread courant (mode WAL)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self) -> bool:
+        """
+        Prend le bail s'il est libre ou expiré, ou le renouvelle si on le détient
+
+        Returns:
+            True si la réplique est leader jusqu'à la prochaine échéance
+        """
+        now = time.time()
+        conn = self._conn()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'INSERT INTO lease (name, holder, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at '
+                'WHERE lease.holder = excluded.holder OR lease.expires_at <= ?',
+                (self.name, self.holder, now + self.ttl, now)
+            )
+            holder, expires_at = conn.execute(
+                'SELECT holder, expires_at FROM lease WHERE name = ?', (self.name,)
+            ).fetchone()
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            print(f"Erreur bail {self.name}: {e}")
+            # Base indisponible : conserver le rôle jusqu'à l'échéance connue
+            return self.is_leader
+
+        self._expires_at = expires_at if holder == self.holder else 0.0
+        return self.is_leader
+
+    @property
+    def is_leader(self) -> bool:
+        """True si le bail détenu n'a pas encore expiré"""
+        return time.time() < self._expires_at
+
+    @contextmanager
+    def hold(self) -> Iterator['LeaderLease']:
+        """
+        Renouvelle le bail en arrière-plan (tous les ttl/3) pendant une collecte longue
+        (rattrapage, réconciliation, compaction, parc de centaines d'installations) ;
+        la collecte vérifie is_leader (ou check) entre ses étapes et s'arrête si le bail est perdu
+        """
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.ttl / 3):
+                if not self.try_acquire():
+                    return
+
+        thread = threading.Thread(target=heartbeat, name=f'lease-{self.name}', daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            stop.set()
+            thread.join()
+
+    def check(self):
+        """Lève LeaseLost si le bail n'est plus détenu"""
+        if not self.is_leader:
+            raise LeaseLost(f"Bail {self.name} perdu par {self.holder}")
+
+    def release(self):
+        """Libère le bail (arrêt propre) pour une reprise immédiate par une autre réplique"""
+        if self._expires_at:
+            self._conn().execute('DELETE FROM lease WHERE name = ? AND holder = ?', (self.name, self.holder))
+            self._expires_at = 0.0
+
+    def current_holder(self) -> Optional[str]:
+        """Détenteur actuel du bail (None si libre ou expiré)"""
+        row = self._conn().execute(
+            'SELECT holder FROM lease WHERE name = ? AND expires_at > ?', (self.name, time.time())
+        ).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,211 @@
+"""
+Métriques au format d'exposition Prometheus (texte 0.0.4), sans dépendance
+Compteurs, jauges et histogrammes à étiquettes, protégés par un verrou :
+une observation coûte une recherche dichotomique et quelques additions,
+l'instrumentation peut donc rester active en production.
+
+Les métriques sont propres au processus : avec plusieurs workers Gunicorn,
+chaque collecte reflète le worker qui l'a servie.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bornes (s) adaptées aux routes locales comme aux appels amont
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    """Base : nom, aide et étiquettes"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Valeur croissante par combinaison d'étiquettes"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+                                for key, value in sorted(self.values().items())]
+
+
+class Gauge(Counter):
+    """Valeur instantanée (peut diminuer)"""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Répartition cumulée des observations par bornes, avec somme et nombre"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # {étiquettes: [compteurs par borne, somme, nombre]}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe la durée du bloc (s)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {key: ([*counts], total, count) for key, (counts, total, count) in self._series.items()}
+        lines = self.header()
+        for key, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Ensemble des métriques exposées par /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(_cache_ratio_lines())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Histogram(
+    'hyxi_http_request_duration_seconds', 'Durée de traitement des requêtes HTTP par route',
+    ('route', 'method', 'status')))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'hyxi_http_requests_in_flight', 'Requêtes HTTP en cours par route (flux SSE inclus)', ('route',)))
+UPSTREAM_REQUESTS = REGISTRY.register(Histogram(
+    'hyxi_upstream_request_duration_seconds', 'Durée des appels aux API Hyxi et Tempo par endpoint',
+    ('api', 'endpoint')))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    'hyxi_upstream_errors_total', 'Appels amont en échec (réseau, HTTP ou réponse en erreur)', ('api', 'endpoint')))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'hyxi_cache_requests_total', 'Consultations des caches (hit ou miss)', ('cache', 'result')))
+PROCESSING = REGISTRY.register(Histogram(
+    'hyxi_processing_duration_seconds', 'Durée des étapes de calcul locales', ('step',)))
+PROCESS_START = REGISTRY.register(Gauge(
+    'hyxi_process_start_time_seconds', 'Démarrage du processus (epoch s)'))
+PROCESS_START.set(time.time())
+
+
+def observe_upstream(api: str, endpoint: str, seconds: float, error: bool = False, timed: bool = True):
+    """
+    Enregistre un appel amont (durée et échec éventuel)
+    timed=False signale seulement une erreur applicative d'un appel déjà chronométré.
+    """
+    if timed:
+        UPSTREAM_REQUESTS.observe(seconds, api=api, endpoint=endpoint)
+    if error:
+        UPSTREAM_ERRORS.inc(api=api, endpoint=endpoint)
+
+
+def cache_lookup(cache: str, hit: bool):
+    """Enregistre une consultation de cache"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def _cache_ratio_lines() -> List[str]:
+    """Taux de succès par cache, dérivé des compteurs (lisible sans requête PromQL)"""
+    totals: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        totals.setdefault(cache, {})[result] = value
+    lines = ['# HELP hyxi_cache_hit_ratio Part des consultations servies par le cache depuis le démarrage',
+             '# TYPE hyxi_cache_hit_ratio gauge']
+    for cache, counts in sorted(totals.items()):
+        total = counts.get('hit', 0) + counts.get('miss', 0)
+        ratio = counts.get('hit', 0) / total if total else 0
+        lines.append(f'hyxi_cache_hit_ratio{{cache="{_escape(cache)}"}} {_format_value(round(ratio, 4))}')
+    return lines
+
+
+def render(registry: Optional[Registry] = None) -> str:
+    """Texte d'exposition Prometheus du registre (défaut: REGISTRY)"""
+    return (registry or REGISTRY).render()
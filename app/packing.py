@@ -0,0 +1,121 @@
+"""
+Encodage compact des données de graphique (alternative aux listes JSON)
+- Horodatages : epoch de base + pas fixe (ou décalages int32 si irréguliers)
+- Valeurs : float32 en base64, ou int16 delta-encodés (entiers de 'scale' unités)
+Le décodage côté navigateur se trouve dans script.js (unpackChartData).
+"""
+import base64
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Type de contenu négociable via l'en-tête Accept
+PACKED_MEDIA_TYPE = 'application/vnd.hyxi.chart+json'
+
+ENCODINGS = ('f32', 'i16')
+
+# Valeur int16 réservée aux points absents (None/NaN)
+I16_MISSING = -32768
+
+
+def _b64(values: np.ndarray) -> str:
+    """Sérialise un tableau en base64 (little-endian)"""
+    return base64.b64encode(values.astype(values.dtype.newbyteorder('<'), copy=False).tobytes()).decode('ascii')
+
+
+def _to_float_array(values) -> np.ndarray:
+    """Liste JSON (None possible) -> float64 avec NaN"""
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def encode_f32(values) -> Dict[str, Any]:
+    """Valeurs en float32 (NaN pour les points absents)"""
+    return {'dtype': 'f32', 'data': _b64(_to_float_array(values).astype(np.float32))}
+
+
+def encode_i16_delta(values, scale: float = 1.0) -> Optional[Dict[str, Any]]:
+    """
+    Valeurs quantifiées (arrondi à 'scale' près) puis delta-encodées en int16
+    Chaque entier est l'écart avec la dernière valeur présente ; I16_MISSING
+    marque un point absent.
+
+    Returns:
+        Série encodée, ou None si un écart dépasse la plage int16
+    """
+    array = _to_float_array(values)
+    valid = ~np.isnan(array)
+    quantized = np.zeros(array.size, dtype=np.int64)
+    quantized[valid] = np.round(array[valid] / scale).astype(np.int64)
+
+    # Dernière valeur présente avant chaque point (0 au départ)
+    last_index = np.maximum.accumulate(np.where(valid, np.arange(array.size), -1))
+    previous = np.zeros(array.size, dtype=np.int64)
+    previous[1:] = np.where(last_index[:-1] >= 0, quantized[np.maximum(last_index[:-1], 0)], 0)
+
+    deltas = quantized - previous
+    if valid.any() and np.abs(deltas[valid]).max() > 32767:
+        return None
+    encoded = np.where(valid, deltas, I16_MISSING).astype(np.int16)
+    return {'dtype': 'i16d', 'scale': scale, 'data': _b64(encoded)}
+
+
+def pack_chart_data(chart_data: Dict[str, Any], encoding: str = 'f32',
+                    scale: float = 1.0, timezone: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convertit un chart_data en forme compacte
+
+    Args:
+        chart_data: {'labels', 'timestamps'?, <séries numériques>..., 'tempo_zones', ...}
+        encoding: 'f32' ou 'i16' (repli en f32 pour une série hors plage int16)
+        scale: Quantum des valeurs en int16 (1 pour des W, 0.01 pour des kWh)
+        timezone: Fuseau de l'installation, pour reconstituer les libellés côté client
+
+    Returns:
+        {'packed': True, 'count', 'base_ts'/'step' ou 'offsets' (si horodatages),
+         'labels' (sinon), 'series': {nom: {'dtype', 'data', 'scale'?}}, + clés non tabulaires}
+    """
+    labels = chart_data.get('labels', [])
+    count = len(labels)
+    timestamps = chart_data.get('timestamps')
+
+    packed = {'packed': True, 'count': count}
+    if timestamps is not None and len(timestamps) == count:
+        stamps = np.asarray(timestamps, dtype=np.int64)
+        steps = np.diff(stamps)
+        packed['base_ts'] = int(stamps[0]) if count else 0
+        if count < 2 or (steps == steps[0]).all():
+            packed['step'] = int(steps[0]) if count > 1 else int(chart_data.get('step', 0))
+        else:
+            packed['offsets'] = {'dtype': 'i32', 'data': _b64((stamps - stamps[0]).astype(np.int32))}
+        packed['timezone'] = timezone
+        packed['label_format'] = _label_format(stamps, int(chart_data.get('step', 0)))
+    else:
+        packed['labels'] = labels
+
+    series = {}
+    for key, value in chart_data.items():
+        if key in ('labels', 'timestamps', 'step'):
+            continue
+        if isinstance(value, list) and len(value) == count and all(
+            v is None or isinstance(v, (int, float)) for v in value
+        ):
+            encoded = encode_i16_delta(value, scale) if encoding == 'i16' else None
+            series[key] = encoded or encode_f32(value)
+        else:
+            packed[key] = value
+    packed['series'] = series
+    return packed
+
+
+def _label_format(stamps: np.ndarray, step: int = 0) -> str:
+    """
+    Forme des libellés à reconstituer : 'time' (HH:MM), 'datetime' ou 'date'
+    Avec moins de deux horodatages, le pas est celui de chart_data (step), faute d'écart mesurable
+    """
+    if stamps.size >= 2:
+        step = int(stamps[1] - stamps[0])
+    if step >= 86400:
+        return 'date'
+    if stamps.size < 2:
+        return 'time'
+    return 'time' if stamps[-1] - stamps[0] < 86400 else 'datetime'
@@ -0,0 +1,226 @@
+"""
+Planificateur de requêtes : choisit les sources de données d'une plage de dates
+Pour une plage de journées et des indicateurs demandés, le planificateur
+retient la combinaison de sources la moins coûteuse (appels amont d'abord,
+puis lecture locale) qui respecte la précision exigée :
+
+- rollup : cumuls journaliers du stockage local (énergies, répartition HP/HC,
+  esquisses de puissance) ;
+- store : séries 5 min du stockage local (seule source des courbes) ;
+- yield_cache : blocs queryPlantYieldStatistics déjà en cache (mois = valeurs
+  journalières, année = valeurs mensuelles) ;
+- day_upstream : journées 5 min récupérées en amont puis stockées (exactes,
+  un appel par jour) ;
+- yield_month / yield_year : blocs queryPlantYieldStatistics récupérés en amont
+  (un appel par mois ou par année, sans répartition HP/HC ni puissance).
+
+Le plan est une liste d'étapes (source, journées servies, blocs
+yieldStatistics lus, appels, coût estimé) ; explain le rend lisible. L'exécution (lectures et appels) est
+faite par le serveur.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+# Indicateurs : énergies (production, consommation, achat, vente), revenus
+# (tarifs Tempo HP/HC), puissance de pointe et percentiles, courbes 5 min
+METRICS = ('energy', 'income', 'peak', 'curve')
+
+ACCURACIES = ('exact', 'approx')
+
+# Précision de chaque source par indicateur (indicateur absent = non servi)
+_YIELD_METRICS = {'energy': 'exact', 'income': 'approx', 'peak': 'approx'}
+_EXACT_METRICS = {'energy': 'exact', 'income': 'exact', 'peak': 'exact'}
+SOURCES = {
+    'rollup': _EXACT_METRICS,
+    'store': {**_EXACT_METRICS, 'curve': 'exact'},
+    'yield_cache': _YIELD_METRICS,
+    'day_upstream': {**_EXACT_METRICS, 'curve': 'exact'},
+    'yield_month': _YIELD_METRICS,
+    'yield_year': _YIELD_METRICS
+}
+
+# Coûts estimés (ms) : appel amont (voir Config.PLANNER_UPSTREAM_MS), lectures locales
+DEFAULT_COSTS = {
+    'upstream_call': 250.0,
+    'rollup_day': 0.05,
+    'store_day': 0.5,
+    'cache_block': 0.5
+}
+
+
+def _accepts(source: str, metrics: Iterable[str], accuracy: str) -> bool:
+    """La source sert-elle tous les indicateurs à la précision demandée ?"""
+    provided = SOURCES[source]
+    return all(metric in provided and (accuracy == 'approx' or provided[metric] == 'exact')
+               for metric in metrics)
+
+
+def plan_range(days: List[str], metrics: Iterable[str], accuracy: str = 'approx', granularity: str = 'day',
+               stored: Iterable[str] = (), cached: Iterable[str] = (),
+               costs: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Choisit les sources d'une plage de journées
+
+    Args:
+        days: Dates YYYY-MM-DD, croissantes
+        metrics: Indicateurs demandés (voir METRICS)
+        accuracy: 'exact' (sources exactes uniquement) ou 'approx'
+        granularity: 'day' (une valeur par jour) ou 'month' (une valeur par mois :
+            les blocs annuels deviennent utilisables)
+        stored: Journées présentes et à jour dans le stockage local
+        cached: Blocs yieldStatistics en cache ('YYYY-MM' ou 'YYYY')
+        costs: Coûts estimés (voir DEFAULT_COSTS)
+
+    Returns:
+        {'metrics', 'accuracy', 'granularity', 'days', 'steps': [{'source', 'days', 'blocks'?, 'calls',
+         'cost_ms', 'accuracy'}], 'upstream_calls', 'cost_ms', 'result_accuracy', 'alternatives'}
+        ('blocks' : blocs yieldStatistics lus, 'YYYY-MM' pour un mois, 'YYYY' pour une année)
+
+    Raises:
+        ValueError: Indicateur, précision ou granularité inconnus, ou plan impossible
+    """
+    metrics = list(dict.fromkeys(metrics))
+    unknown = [metric for metric in metrics if metric not in METRICS]
+    if unknown or not metrics:
+        raise ValueError(f"Indicateurs attendus parmi {', '.join(METRICS)}")
+    if accuracy not in ACCURACIES:
+        raise ValueError(f"Précision attendue : {' ou '.join(ACCURACIES)}")
+    if granularity not in ('day', 'month'):
+        raise ValueError("Granularité attendue : day ou month")
+    costs = {**DEFAULT_COSTS, **(costs or {})}
+    stored = set(stored)
+    cached = set(cached)
+    allowed = {source: _accepts(source, metrics, accuracy) for source in SOURCES}
+    local_source = 'store' if 'curve' in metrics else 'rollup'
+    local_cost = costs[f'{local_source}_day']
+
+    # Unités de décision : le jour, ou le mois (un bloc annuel ne donne que des totaux mensuels)
+    by_month: Dict[str, List[str]] = {}
+    for day in days:
+        by_month.setdefault(day[:7], []).append(day)
+
+    assignments = []  # (source, jours, blocs yieldStatistics)
+    pending: Dict[str, List[str]] = {}  # mois -> journées à récupérer en amont
+    for month, month_days in by_month.items():
+        missing = [day for day in month_days if day not in stored]
+        present = [day for day in month_days if day in stored]
+        if granularity == 'month':
+            if not missing:
+                assignments.append((local_source, month_days, []))
+            elif allowed['yield_cache'] and (month in cached or month[:4] in cached):
+                assignments.append(('yield_cache', month_days, [month if month in cached else month[:4]]))
+            else:
+                pending[month] = month_days
+            continue
+        if present:
+            assignments.append((local_source, present, []))
+        if missing and allowed['yield_cache'] and month in cached:
+            assignments.append(('yield_cache', missing, [month]))
+        elif missing:
+            pending[month] = missing
+
+    # Récupération amont : par année, blocs annuels (vue mensuelle) ou, par mois, le moins
+    # d'appels entre un bloc mensuel et les journées manquantes (à égalité, la source exacte)
+    by_year: Dict[str, List[str]] = {}
+    for month in pending:
+        by_year.setdefault(month[:4], []).append(month)
+    for year, months in by_year.items():
+        month_choices = []
+        for month in months:
+            month_days = pending[month]
+            missing = [day for day in month_days if day not in stored]
+            options = []
+            if allowed['day_upstream']:
+                options.append((len(missing), 0, 'day_upstream'))
+            if allowed['yield_month']:
+                options.append((1, 1, 'yield_month'))
+            if not options:
+                raise ValueError(f"Aucune source ne fournit {', '.join(metrics)} avec la précision {accuracy}")
+            month_choices.append((month, min(options)))
+        if (granularity == 'month' and allowed['yield_year']
+                and sum(choice[0] for _, choice in month_choices) > 1):
+            assignments.append(('yield_year', [day for month in months for day in pending[month]], [year]))
+            continue
+        for month, (_, _, source) in month_choices:
+            month_days = pending[month]
+            if source == 'day_upstream':
+                assignments.append(('day_upstream', month_days, []))
+            else:
+                assignments.append(('yield_month', month_days, [month]))
+
+    steps = _merge_steps(assignments, stored, costs, local_cost)
+    total_calls = sum(step['calls'] for step in steps)
+    worst = 'exact' if all(step['accuracy'] == 'exact' for step in steps) else 'approx'
+    return {
+        'metrics': metrics,
+        'accuracy': accuracy,
+        'granularity': granularity,
+        'days': len(days),
+        'steps': steps,
+        'upstream_calls': total_calls,
+        'cost_ms': round(sum(step['cost_ms'] for step in steps), 2),
+        'result_accuracy': worst,
+        'alternatives': _alternatives(days, by_month, allowed, granularity, costs, local_cost)
+    }
+
+
+def _merge_steps(assignments, stored, costs, local_cost) -> List[Dict[str, Any]]:
+    """Regroupe les affectations par source (ordre chronologique) et chiffre chaque étape"""
+    steps: Dict[str, Dict[str, Any]] = {}
+    for source, step_days, blocks in sorted(assignments, key=lambda item: item[1][0]):
+        step = steps.setdefault(source, {'source': source, 'days': [], 'blocks': [], 'calls': 0, 'cost_ms': 0.0})
+        step['days'].extend(step_days)
+        step['blocks'].extend(block for block in blocks if block not in step['blocks'])
+
+    result = []
+    for step in steps.values():
+        source = step['source']
+        if source in ('rollup', 'store'):
+            step['cost_ms'] = len(step['days']) * local_cost
+        elif source == 'yield_cache':
+            step['cost_ms'] = len(step['blocks']) * costs['cache_block']
+        elif source == 'day_upstream':
+            step['calls'] = sum(1 for day in step['days'] if day not in stored)
+            step['cost_ms'] = step['calls'] * costs['upstream_call'] + len(step['days']) * local_cost
+        else:
+            step['calls'] = len(step['blocks'])
+            step['cost_ms'] = step['calls'] * costs['upstream_call']
+        step['accuracy'] = 'exact' if all(value == 'exact' for value in SOURCES[source].values()) else 'approx'
+        step['cost_ms'] = round(step['cost_ms'], 2)
+        if not step['blocks']:
+            del step['blocks']
+        result.append(step)
+    return result
+
+
+def _alternatives(days, by_month, allowed, granularity, costs, local_cost) -> Dict[str, Dict[str, Any]]:
+    """Coût des plans à source unique, sans stockage ni cache (pour comparaison dans explain)"""
+    call = costs['upstream_call']
+    alternatives = {}
+    if allowed['day_upstream']:
+        alternatives['day_upstream'] = {'calls': len(days), 'cost_ms': round(len(days) * (call + local_cost), 2)}
+    if allowed['yield_month']:
+        alternatives['yield_month'] = {'calls': len(by_month), 'cost_ms': round(len(by_month) * call, 2)}
+    if allowed['yield_year'] and granularity == 'month':
+        years = len({month[:4] for month in by_month})
+        alternatives['yield_year'] = {'calls': years, 'cost_ms': round(years * call, 2)}
+    return alternatives
+
+
+def _span(values: List[str]) -> str:
+    return values[0] if len(values) == 1 else f"{values[0]}..{values[-1]}"
+
+
+def explain(plan: Dict[str, Any]) -> List[str]:
+    """Plan lisible, une ligne par étape (à la manière d'un EXPLAIN SQL)"""
+    lines = [
+        f"Plan {', '.join(plan['metrics'])} ({plan['accuracy']}, {plan['granularity']}) sur {plan['days']} jours : "
+        f"{plan['upstream_calls']} appel(s) amont, coût estimé {plan['cost_ms']} ms, résultat {plan['result_accuracy']}"
+    ]
+    for step in plan['steps']:
+        blocks = f", blocs {', '.join(step['blocks'])}" if step.get('blocks') else ''
+        lines.append(f"  -> {step['source']:<13} {_span(step['days'])} : {len(step['days'])} jour(s){blocks}, "
+                     f"{step['calls']} appel(s), {step['cost_ms']} ms ({step['accuracy']})")
+    for source, alternative in plan['alternatives'].items():
+        lines.append(f"  (sans stockage ni cache, {source} : {alternative['calls']} appel(s), "
+                     f"{alternative['cost_ms']} ms)")
+    return lines
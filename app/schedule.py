@@ -0,0 +1,105 @@
+"""
+Calendrier de polling adapté à l'ensoleillement
+Pendant les heures de production (lever - marge à coucher + marge), chaque
+créneau de 5 minutes est interrogé ; la nuit, seul un créneau sur
+night_interval l'est (suivi de la consommation nocturne). Aucun point n'est
+perdu : chaque collecte récupère la journée entière, et la fin de la veille
+est rattrapée à la première collecte du jour.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+
+class SolarSchedule:
+    """Créneaux à interroger selon le lever et le coucher du soleil de chaque installation"""
+
+    def __init__(self, sun_times: Callable[[str, Optional[str]], Tuple[float, float, bool]], tz,
+                 interval: int = 300, night_interval: int = 1800, offset: int = 30,
+                 margin: int = 1800, enabled: bool = True, fallback_ttl: float = 300):
+        """
+        Args:
+            sun_times: Fonction (date YYYY-MM-DD, plant_id) -> (lever, coucher, exact), lever et
+                coucher en timestamps, exact=False pour des horaires de repli (météo indisponible)
+            tz: Fuseau horaire des installations (pytz)
+            interval: Durée d'un créneau en secondes (5 min)
+            night_interval: Période de collecte nocturne (s), multiple de interval
+            offset: Décalage (s) après le début du créneau, le temps que l'amont publie le point
+            margin: Marge (s) à pleine cadence avant le lever et après le coucher
+            enabled: False pour interroger tous les créneaux (comportement historique)
+            fallback_ttl: Durée (s) de mémorisation d'horaires de repli (redemandés ensuite)
+        """
+        self.sun_times = sun_times
+        self.tz = tz
+        self.interval = interval
+        self.night_interval = max(interval, night_interval - night_interval % interval)
+        self.offset = offset
+        self.margin = margin
+        self.enabled = enabled
+        self.fallback_ttl = fallback_ttl
+        # {(date, plant_id): ((lever, coucher), expiration)} ; partagé par les threads du poller de parc
+        self._sun_cache: Dict[Tuple[str, Optional[str]], Tuple[Tuple[float, float], float]] = {}
+        self._sun_lock = threading.Lock()
+
+    def _sun(self, timestamp: float, plant_id: Optional[str]) -> Tuple[float, float]:
+        """
+        Lever et coucher du jour de timestamp, mémorisés par jour et installation
+        (pour la journée si exacts, fallback_ttl secondes pour des horaires de repli)
+        """
+        date_str = datetime.fromtimestamp(timestamp, tz=self.tz).strftime('%Y-%m-%d')
+        key = (date_str, plant_id)
+        now = time.time()
+        with self._sun_lock:
+            entry = self._sun_cache.get(key)
+        if entry is not None and now < entry[1]:
+            return entry[0]
+
+        # Appel hors verrou (API météo) : deux threads peuvent résoudre la même clé, sans conséquence
+        sunrise, sunset, exact = self.sun_times(date_str, plant_id)
+        expires_at = float('inf') if exact else now + self.fallback_ttl
+        with self._sun_lock:
+            if len(self._sun_cache) > 4096:
+                self._sun_cache.clear()
+            self._sun_cache[key] = ((sunrise, sunset), expires_at)
+        return sunrise, sunset
+
+    def is_daytime(self, timestamp: float, plant_id: Optional[str] = None) -> bool:
+        """True si timestamp tombe dans la plage de production (marges incluses)"""
+        sunrise, sunset = self._sun(timestamp, plant_id)
+        return sunrise - self.margin <= timestamp < sunset + self.margin
+
+    def slot_start(self, timestamp: float) -> float:
+        """Début (décalage inclus) du créneau contenant timestamp"""
+        return timestamp - (timestamp - self.offset) % self.interval
+
+    def is_due(self, slot: float, plant_id: Optional[str] = None) -> bool:
+        """True si le créneau commençant à slot doit être interrogé"""
+        if not self.enabled or self.is_daytime(slot, plant_id):
+            return True
+        # Nuit : créneaux alignés sur night_interval
+        return (slot - self.offset) % self.night_interval < self.interval
+
+    def next_due(self, now: Optional[float] = None, plant_id: Optional[str] = None) -> float:
+        """Prochain créneau à interroger, strictement après now"""
+        now = time.time() if now is None else now
+        slot = self.slot_start(now) + self.interval
+        # Au plus une journée de créneaux à parcourir
+        for _ in range(int(86400 // self.interval) + 1):
+            if self.is_due(slot, plant_id):
+                return slot
+            slot += self.interval
+        return slot
+
+    def describe(self, now: Optional[float] = None, plant_id: Optional[str] = None) -> Dict[str, float]:
+        """État du calendrier pour les clients (cadence et prochaine collecte)"""
+        now = time.time() if now is None else now
+        sunrise, sunset = self._sun(now, plant_id)
+        daytime = not self.enabled or self.is_daytime(now, plant_id)
+        return {
+            'daytime': daytime,
+            'interval': self.interval if daytime else self.night_interval,
+            'next_poll': self.next_due(now, plant_id),
+            'sunrise': sunrise,
+            'sunset': sunset
+        }
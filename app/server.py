@@ -2,19 +2,35 @@
 Serveur Flask pour Hyxi Solar Monitor
 Expose les données de télémétrie via API REST et interface web
 """
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request, send_file, stream_with_context, url_for
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+from werkzeug.exceptions import HTTPException
+import atexit
+import contextvars
+import functools
+import hmac
+import mimetypes
+import json
+import numpy as np
 import pytz
-import sys
 import os
+import threading
 import time
 
-# Ajouter le répertoire parent au path pour les imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from config import Config
 from app.api_client import HyxiAPIClient
 from app.tempo import TempoAPI
+from app.stream import EventBroker, SlotPoller
+from app.schedule import SolarSchedule
+from app import assets, battery, day_profile, metrics, planner, tariffs, tracing
+from app.warmup import WarmUp
+from app.cache import SQLiteCache, create_cache
+from app.leader import LeaderLease
+from app.fleet import FleetPoller, autoconso_rate, fleet_metrics, rollup_income
+from app.store import CHANNELS, LEVELS as LEVELS_BY_NAME, SeriesStore, day_grid
+from app.packing import ENCODINGS as PACKED_ENCODINGS, PACKED_MEDIA_TYPE, pack_chart_data
+from app.downsample import choose_level, concat_days, rebucket, to_json_list
 
 # Timezone configuré
 TIMEZONE = pytz.timezone(Config.TIMEZONE)
@@ -28,71 +44,643 @@ def from_timestamp_tz(timestamp):
     return datetime.fromtimestamp(timestamp, tz=pytz.UTC).astimezone(TIMEZONE)
 
 
+def current_plant():
+    """
+    Installation concernée par la requête ou la tâche en cours
+    Fixée par les routes /api/plants/<id>/... (et propagée aux tâches parallèles),
+    sinon Config.PLANT_ID.
+    """
+    return CURRENT_PLANT.get() or Config.PLANT_ID
+
+
+def current_plant_name():
+    """Nom de l'installation courante (découverte, ou Config.PLANT_NAME pour l'installation configurée)"""
+    plant_id = current_plant()
+    if plant_id == Config.PLANT_ID:
+        return Config.PLANT_NAME
+    plant = discover_plants().get(plant_id) or {}
+    return plant.get('plantName', plant_id)
+
+
+def discover_plants(refresh=False):
+    """
+    Installations accessibles avec les clés API (pages parcourues avec préchargement)
+    Résultat partagé entre workers pendant Config.PLANT_DISCOVERY_TTL ; en cas
+    d'échec, seule l'installation configurée est connue.
+    Returns:
+        dict: {plant_id: {'plantId', 'plantName', 'capacity', 'status'}} (ordre de l'API)
+    """
+    plants = None if refresh else SHARED_CACHE.get('plants')
+    if not refresh:
+        metrics.cache_lookup('plants', plants is not None)
+    if plants is None:
+        try:
+            plants = {
+                str(plant.get('plantId')): {
+                    'plantId': str(plant.get('plantId')),
+                    'plantName': plant.get('plantName'),
+                    'capacity': plant.get('capacity', 0),
+                    'status': plant.get('status')
+                }
+                for plant in hyxi_client.iter_plants(page_size=Config.PLANT_PAGE_SIZE)
+                if plant.get('plantId')
+            }
+            SHARED_CACHE.set('plants', plants, ttl=Config.PLANT_DISCOVERY_TTL)
+        except Exception as e:
+            print(f"Erreur découverte des installations: {e}")
+            plants = {}
+
+    if Config.PLANT_ID and Config.PLANT_ID not in plants:
+        plants = {Config.PLANT_ID: {'plantId': Config.PLANT_ID, 'plantName': Config.PLANT_NAME,
+                                    'capacity': 0, 'status': None}, **plants}
+    return plants
+
+
+def _fetch_tempo_tarif(date_str):
+    """
+    Tarifs Tempo d'une date depuis le cache partagé, sinon l'API Tempo
+    Returns:
+        tuple: (tarifs, True si définitifs, False pour le repli temporaire)
+    """
+    tarif_data = SHARED_CACHE.get(f"tempo:{date_str}")
+    metrics.cache_lookup('tempo_shared', tarif_data is not None)
+    if tarif_data is not None:
+        return tarif_data, tarif_data.get('couleur') != 'INCONNU'
+
+    # Appel API
+    day_info = TempoAPI.get_day_info(date_str)
+    if day_info.get('success'):
+        tarif_data = {
+            'tarif_hp': day_info['tarif_hp'],
+            'tarif_hc': day_info['tarif_hc'],
+            'couleur': day_info.get('couleur', 'INCONNU'),
+            'couleur_css': day_info.get('couleur_css', 'gray')
+        }
+        SHARED_CACHE.set(f"tempo:{date_str}", tarif_data)
+        return tarif_data, True
+
+    tarif_data = {
+        'tarif_hp': Config.TARIF_ACHAT,
+        'tarif_hc': Config.TARIF_ACHAT * 0.6,
+        'couleur': 'INCONNU',
+        'couleur_css': 'gray'
+    }
+    # Repli : conservé une heure seulement, le temps que l'API Tempo revienne
+    SHARED_CACHE.set(f"tempo:{date_str}", tarif_data, ttl=3600)
+    return tarif_data, False
+
+
 def get_tempo_tarif(date_str):
     """
     Récupère les tarifs Tempo pour une date avec cache global
+    (copie locale au processus devant le cache partagé entre workers)
     Args:
         date_str: Date au format YYYY-MM-DD
     Returns:
         dict: {tarif_hp, tarif_hc, couleur, couleur_css}
     """
+    tarif_data = TEMPO_CACHE.get(date_str)
+    metrics.cache_lookup('tempo', tarif_data is not None)
+    if tarif_data is not None:
+        return tarif_data
+
     with TEMPO_CACHE_LOCK:
         if date_str in TEMPO_CACHE:
             return TEMPO_CACHE[date_str]
-        
-        # Appel API
-        day_info = TempoAPI.get_day_info(date_str)
-        if day_info.get('success'):
-            tarif_data = {
-                'tarif_hp': day_info['tarif_hp'],
-                'tarif_hc': day_info['tarif_hc'],
-                'couleur': day_info.get('couleur', 'INCONNU'),
-                'couleur_css': day_info.get('couleur_css', 'gray')
-            }
-        else:
-            tarif_data = {
-                'tarif_hp': Config.TARIF_ACHAT,
-                'tarif_hc': Config.TARIF_ACHAT * 0.6,
-                'couleur': 'INCONNU',
-                'couleur_css': 'gray'
-            }
-        
-        TEMPO_CACHE[date_str] = tarif_data
+
+        tarif_data, final = _fetch_tempo_tarif(date_str)
+        if final:
+            TEMPO_CACHE[date_str] = tarif_data
         return tarif_data
 
 
-def get_daylight_hours(date_str):
+def get_tempo_tarifs(days):
     """
-    Récupère les heures d'ensoleillement depuis l'API météo Hyxi
+    Tarifs Tempo de plusieurs dates, les dates inconnues étant récupérées en parallèle
+    Returns:
+        dict: {date_str: {tarif_hp, tarif_hc, couleur, couleur_css}}
+    """
+    unique = set(days)
+    missing = [day for day in unique if day not in TEMPO_CACHE]
+    metrics.CACHE_REQUESTS.inc(len(unique) - len(missing), cache='tempo', result='hit')
+    metrics.CACHE_REQUESTS.inc(len(missing), cache='tempo', result='miss')
+    contexts = [contextvars.copy_context() for _ in missing]
+    fetched = dict(zip(missing, INGEST_EXECUTOR.map(lambda ctx, day: ctx.run(_fetch_tempo_tarif, day), contexts, missing)))
+    with TEMPO_CACHE_LOCK:
+        for day, (tarif_data, final) in fetched.items():
+            if final:
+                TEMPO_CACHE[day] = tarif_data
+    return {day: TEMPO_CACHE.get(day) or fetched[day][0] for day in days}
+
+
+def _memoize(key, fn, *args):
+    """
+    Partage un résultat amont entre les sous-requêtes d'un même batch
+    Hors batch, l'appel est effectué directement.
+    Args:
+        key: Clé identifiant l'appel amont (ex: ('plant_info',))
+        fn: Fonction à appeler si le résultat n'est pas encore connu
+    Returns:
+        Résultat de fn(*args), calculé une seule fois par batch
+    """
+    memo = BATCH_MEMO.get()
+    if memo is None:
+        return fn(*args)
+
+    with memo['lock']:
+        future = memo['futures'].get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            memo['futures'][key] = future
+    metrics.cache_lookup('batch', not owner)
+
+    if owner:
+        # Le premier demandeur effectue l'appel, les autres attendent son résultat
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+    return future.result()
+
+
+def _slot_ttl():
+    """Secondes restantes avant le créneau de 5 minutes suivant (+ décalage de publication amont)"""
+    interval = Config.STREAM_POLL_INTERVAL
+    return interval - (time.time() - Config.STREAM_POLL_OFFSET) % interval
+
+
+def _slot_cached(key, fn, *args, refresh=False):
+    """
+    Met en cache un résultat amont jusqu'au créneau de 5 minutes suivant
+    Les données Hyxi n'évoluent qu'une fois par créneau : tous les clients
+    (et tous les workers, via le cache partagé) d'un même créneau partagent
+    donc un seul appel amont.
+    Args:
+        key: Clé du cache (tuple)
+        fn: Fonction d'appel amont
+        refresh: Force l'appel amont (utilisé par le poller SSE)
+    Returns:
+        Résultat de fn(*args) (les erreurs ne sont pas mises en cache)
+    """
+    cache_key = 'slot:' + ':'.join(str(part) for part in key)
+    if not refresh:
+        result = SHARED_CACHE.get(cache_key)
+        metrics.cache_lookup('slot', result is not None)
+        if result is not None:
+            return result
+
+    result = fn(*args)
+    if isinstance(result, dict) and not result.get('error') and result.get('success') is not False:
+        SHARED_CACHE.set(cache_key, result, ttl=_slot_ttl())
+    return result
+
+
+def invalidate_responses():
+    """Invalide les réponses mises en cache de l'installation courante (tous workers)"""
+    SHARED_CACHE.set(f"generation:{current_plant()}", time.time_ns())
+
+
+def cached_response(view):
+    """
+    Décorateur : met en cache la réponse JSON rendue d'une route GET jusqu'au créneau suivant
+    La clé inclut l'URL complète, l'encodage compact éventuellement négocié et la
+    génération des données de l'installation (voir invalidate_responses).
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        # Profilage : la réponse doit être recalculée (et ne pas être mise en cache)
+        if 'hyxi.profiler' in request.environ:
+            return view(*args, **kwargs)
+
+        # La génération de l'installation change quand la réconciliation révise des données
+        generation = SHARED_CACHE.get(f"generation:{current_plant()}") or 0
+        key = f"response:{generation}:{request.full_path}|{_chart_encoding() or ''}"
+        cached = SHARED_CACHE.get(key)
+        metrics.cache_lookup('response', cached is not None)
+        if cached is not None:
+            response = app.response_class(cached, mimetype='application/json')
+            response.vary.add('Accept')
+            return response
+
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.mimetype == 'application/json':
+            payload = response.get_json(silent=True)
+            if isinstance(payload, dict) and not payload.get('error') and payload.get('success') is not False:
+                SHARED_CACHE.set(key, response.get_data(as_text=True), ttl=_slot_ttl())
+        return response
+    return wrapper
+
+
+def fetch_plant_info(refresh=False):
+    """Informations de l'installation (partagées au sein d'un batch et d'un créneau)"""
+    plant_id = current_plant()
+    key = ('plant_info', plant_id)
+    return _memoize(key, lambda: _slot_cached(key, hyxi_client.get_plant_info, plant_id, refresh=refresh))
+
+
+def fetch_day_statistics(date_str, refresh=False):
+    """Statistiques 5 min d'une journée (partagées au sein d'un batch et d'un créneau)"""
+    plant_id = current_plant()
+    key = ('power_statistics', plant_id, date_str)
+    return _memoize(key, lambda: _slot_cached(key, hyxi_client.get_plant_power_statistics, plant_id, date_str, refresh=refresh))
+
+
+def fetch_weather():
+    """Données météo de l'installation (partagées au sein d'un batch et d'un créneau)"""
+    plant_id = current_plant()
+    key = ('weather', plant_id)
+    return _memoize(key, lambda: _slot_cached(key, hyxi_client.get_plant_weather, plant_id))
+
+
+def fetch_tempo_now(refresh=False):
+    """Informations Tempo actuelles (partagées au sein d'un batch et d'un créneau)"""
+    key = ('tempo_now',)
+    return _memoize(key, lambda: _slot_cached(key, TempoAPI.get_current_info, refresh=refresh))
+
+
+def _yield_block_key(time_type, period):
+    """
+    Clé du cache partagé d'un bloc yieldStatistics et durée de conservation :
+    Config.YIELD_CACHE_TTL pour un mois ou une année clos, jusqu'au créneau suivant sinon
+    """
+    current = now_tz().strftime('%Y-%m' if time_type == 2 else '%Y')
+    ttl = Config.YIELD_CACHE_TTL if str(period) < current else _slot_ttl()
+    return f"yield:{current_plant()}:{time_type}:{period}", ttl
+
+
+def fetch_yield_block(time_type, period):
+    """
+    Bloc queryPlantYieldStatistics (partagé au sein d'un batch, mis en cache)
+    Args:
+        time_type: 2 = mois ('YYYY-MM', valeurs journalières), 3 = année ('YYYY', valeurs mensuelles)
+    """
+    plant_id = current_plant()
+
+    def load():
+        cache_key, ttl = _yield_block_key(time_type, period)
+        result = SHARED_CACHE.get(cache_key)
+        metrics.cache_lookup('yield', result is not None)
+        if result is None:
+            result = hyxi_client.get_plant_yield_statistics(plant_id, time_type, period)
+            if isinstance(result, dict) and not result.get('error'):
+                SHARED_CACHE.set(cache_key, result, ttl=ttl)
+        return result
+    return _memoize(('yield', plant_id, time_type, period), load)
+
+
+def cached_yield_blocks(days):
+    """Blocs yieldStatistics ('YYYY-MM' ou 'YYYY') des journées données déjà présents dans le cache"""
+    months = sorted({day[:7] for day in days})
+    blocks = [(2, month) for month in months] + [(3, year) for year in sorted({month[:4] for month in months})]
+    return {str(period) for time_type, period in blocks
+            if SHARED_CACHE.get(_yield_block_key(time_type, period)[0]) is not None}
+
+
+def get_sun_times(date_str):
+    """
+    Lever et coucher du soleil de l'installation courante depuis l'API météo Hyxi
+    (mis en cache par installation et par jour ; repli 06:00 - 18:00)
     Args:
         date_str: Date au format YYYY-MM-DD
     Returns:
-        float: Nombre d'heures d'ensoleillement (sunrise à sunset)
+        tuple: (lever, coucher) en timestamps
+    """
+    return sun_times_info(date_str)[:2]
+
+
+def sun_times_info(date_str):
+    """
+    Comme get_sun_times, en indiquant si les horaires viennent de l'API météo
+    Returns:
+        tuple: (lever, coucher, exact) ; exact=False pour le repli 06:00 - 18:00
     """
+    key = f"sun:{current_plant()}:{date_str}"
+    cached = SHARED_CACHE.get(key)
+    metrics.cache_lookup('sun', cached is not None)
+    if cached is not None:
+        # [lever, coucher, exact] ; entrées antérieures sans indicateur : horaires météo
+        return cached[0], cached[1], bool(cached[2]) if len(cached) > 2 else True
+
+    sunrise, sunset, found = '06:00', '18:00', False
     try:
-        weather_data = hyxi_client.get_plant_weather(Config.PLANT_ID)
+        weather_data = fetch_weather()
         if weather_data.get('success') and 'data' in weather_data:
-            days = weather_data['data'].get('days', [])
-            for day in days:
+            for day in weather_data['data'].get('days', []):
                 if day.get('date') == date_str:
-                    sunrise = day.get('sunrise', '06:00')  # Format "HH:MM"
-                    sunset = day.get('sunset', '18:00')
-                    
-                    # Calculer la différence en heures
-                    sunrise_h, sunrise_m = map(int, sunrise.split(':'))
-                    sunset_h, sunset_m = map(int, sunset.split(':'))
-                    
-                    sunrise_minutes = sunrise_h * 60 + sunrise_m
-                    sunset_minutes = sunset_h * 60 + sunset_m
-                    
-                    daylight_minutes = sunset_minutes - sunrise_minutes
-                    return daylight_minutes / 60.0
-        
-        # Fallback: moyenne de 12h
-        return 12.0
+                    sunrise = day.get('sunrise', sunrise)  # Format "HH:MM"
+                    sunset = day.get('sunset', sunset)
+                    found = True
+                    break
     except Exception as e:
         print(f"Erreur récupération météo: {e}")
-        return 12.0
+
+    day = datetime.strptime(date_str, '%Y-%m-%d')
+
+    def to_timestamp(hour_minute):
+        hour, minute = map(int, hour_minute.split(':'))
+        return TIMEZONE.localize(day.replace(hour=hour, minute=minute)).timestamp()
+
+    sun_times = (to_timestamp(sunrise), to_timestamp(sunset), found)
+    # Repli conservé une heure seulement (prévisions disponibles plus tard)
+    SHARED_CACHE.set(key, list(sun_times), ttl=2 * 86400 if found else 3600)
+    return sun_times
+
+
+def get_daylight_hours(date_str):
+    """
+    Récupère les heures d'ensoleillement depuis l'API météo Hyxi
+    Args:
+        date_str: Date au format YYYY-MM-DD
+    Returns:
+        float: Nombre d'heures d'ensoleillement (sunrise à sunset, 12h par défaut)
+    """
+    sunrise, sunset = get_sun_times(date_str)
+    return (sunset - sunrise) / 3600
+
+
+def ingest_day(date_str, refresh=False):
+    """
+    Récupère une journée 5 min en amont et l'enregistre dans le stockage local
+    (installation courante, voir current_plant)
+    Args:
+        date_str: Date au format YYYY-MM-DD
+        refresh: Ignorer le cache de créneau (polling)
+    Returns:
+        bool: True si la journée a pu être enregistrée
+    """
+    stats = fetch_day_statistics(date_str, refresh=refresh)
+    if stats.get('error'):
+        return False
+
+    base_ts, slots = day_grid(date_str, TIMEZONE)
+    complete = date_str < now_tz().strftime('%Y-%m-%d')
+    SERIES_STORE.put_day(current_plant(), date_str, base_ts, slots, stats.get('data', {}), complete)
+    return True
+
+
+def reconcile_recent_days():
+    """
+    Revérifie les Config.RECONCILE_DAYS journées closes précédentes de l'installation
+    courante : l'amont complète ou révise parfois des points après coup. Seuls
+    les créneaux modifiés sont réécrits (empreintes par jour et canal), puis le
+    cumul journalier et les réponses en cache sont invalidés.
+    Returns:
+        dict: {date: {canal: créneaux modifiés}} pour les journées révisées
+    """
+    today = now_tz()
+    window = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, Config.RECONCILE_DAYS + 1)]
+    stored = SERIES_STORE.day_status(current_plant(), window)
+
+    revised = {}
+    for day in window:
+        # Journées jamais lues : récupérées entières à la première demande (load_days)
+        if day not in stored:
+            continue
+        stats = fetch_day_statistics(day, refresh=True)
+        if stats.get('error'):
+            continue
+        base_ts, slots = day_grid(day, TIMEZONE)
+        changes = SERIES_STORE.merge_day(current_plant(), day, base_ts, slots, stats.get('data', {}), complete=True)
+        if changes:
+            revised[day] = changes
+
+    if revised:
+        invalidate_responses()
+        print(f"🔄 Données révisées pour {current_plant()}: {revised}")
+    return revised
+
+
+def reconcile_if_due():
+    """Réconciliation au plus une fois par Config.RECONCILE_INTERVAL et par installation (tous workers)"""
+    if Config.RECONCILE_DAYS <= 0:
+        return
+    if SHARED_CACHE.add(f"reconcile:{current_plant()}", time.time(), ttl=Config.RECONCILE_INTERVAL):
+        try:
+            reconcile_recent_days()
+        except Exception as e:
+            print(f"Erreur réconciliation {current_plant()}: {e}")
+
+
+def compact_store():
+    """
+    Compacte l'historique local selon les fenêtres de rétention configurées
+    (5 min pendant RETENTION_5MIN_DAYS jours, 15 min pendant RETENTION_15MIN_DAYS)
+    Returns:
+        dict: {'15min': journées compactées, 'hour': journées compactées}
+    """
+    today = now_tz()
+
+    def cutoff(days):
+        return (today - timedelta(days=days)).strftime('%Y-%m-%d') if days > 0 else None
+
+    counts = SERIES_STORE.compact(before_15min=cutoff(Config.RETENTION_5MIN_DAYS),
+                                  before_hour=cutoff(Config.RETENTION_15MIN_DAYS))
+    if any(counts.values()):
+        print(f"🗜️ Compaction du stockage: {counts}")
+    return counts
+
+
+def compact_store_if_due():
+    """Compaction au plus une fois par jour (tous workers et répliques)"""
+    if SHARED_CACHE.add('compact', time.time(), ttl=86400):
+        try:
+            compact_store()
+        except Exception as e:
+            print(f"Erreur compaction du stockage: {e}")
+
+
+def stale_days(days):
+    """
+    Journées absentes du stockage local, ou non closes (journée en cours) et non
+    mises à jour depuis le début du créneau
+    Args:
+        days: Dates YYYY-MM-DD
+    Returns:
+        list: Dates à récupérer en amont
+    """
+    # Une journée en cours déjà enregistrée pendant ce créneau (ex: par le leader) est à jour
+    fresh_since = time.time() - Config.STREAM_POLL_INTERVAL + _slot_ttl()
+    status = SERIES_STORE.day_status(current_plant(), days)
+    return [
+        day for day in days
+        if not status.get(day, {}).get('complete') and status.get(day, {}).get('updated_at', 0) < fresh_since
+    ]
+
+
+def ensure_days(days):
+    """
+    Récupère en parallèle les journées absentes du stockage local ou non closes
+    (journée en cours) qui n'ont pas été mises à jour depuis le début du créneau
+    Args:
+        days: Dates YYYY-MM-DD
+    """
+    missing = stale_days(days)
+    if missing:
+        contexts = [contextvars.copy_context() for _ in missing]
+        list(INGEST_EXECUTOR.map(lambda ctx, day: ctx.run(ingest_day, day), contexts, missing))
+
+
+def load_days(days, level=1, channels=CHANNELS):
+    """
+    Lit des journées depuis le stockage local, après avoir récupéré celles qui
+    manquent ou ne sont pas à jour (voir ensure_days)
+    Args:
+        days: Dates YYYY-MM-DD
+        level: Niveau de pyramide (1, 3, 12 ou 0)
+    Returns:
+        list: Journées lues (voir SeriesStore.get_days)
+    """
+    ensure_days(days)
+    return SERIES_STORE.get_days(current_plant(), days, level, channels)
+
+
+def plan_period(days, metrics_wanted, accuracy='approx', granularity='day'):
+    """
+    Plan de lecture d'une plage de journées (voir app.planner.plan_range) d'après
+    l'état du stockage local et du cache des blocs yieldStatistics
+    Raises:
+        ValueError: Paramètres invalides ou plan impossible
+    """
+    stale = set(stale_days(days))
+    return planner.plan_range(
+        days, metrics_wanted, accuracy, granularity,
+        stored=[day for day in days if day not in stale],
+        cached=cached_yield_blocks(days),
+        costs={'upstream_call': Config.PLANNER_UPSTREAM_MS}
+    )
+
+
+def _yield_rows(result, wanted):
+    """Lignes {date: valeurs} d'un bloc yieldStatistics, limitées aux dates voulues"""
+    data = result.get('data', {}) if not result.get('error') else {}
+    rows = {}
+    for i, ts in enumerate(data.get('timePoint', [])):
+        date_str = from_timestamp_tz(ts).strftime('%Y-%m-%d')
+        if date_str in wanted:
+            rows[date_str] = {key: (data.get(key) or [])[i] if i < len(data.get(key) or []) else 0
+                              for key in ('yield', 'consume', 'buyYield', 'sellYield')}
+    return rows
+
+
+def execute_plan(plan):
+    """
+    Exécute un plan : lectures locales, blocs yieldStatistics et journées récupérées en amont
+    Returns:
+        tuple: (lignes triées [{'date', 'timePoint', 'yield', 'consume', 'buyYield', 'sellYield',
+                'income' (None si approché), 'source'}], erreurs amont)
+        Une ligne par jour, ou par mois (premier jour du mois) en granularité 'month'
+    """
+    daily = {}  # date -> ligne journalière
+    monthly = {}  # 'YYYY-MM' -> ligne mensuelle (blocs annuels)
+    errors = []
+
+    exact_days = []
+    for step in plan['steps']:
+        source = step['source']
+        if source == 'day_upstream':
+            ensure_days(step['days'])
+        if source in ('rollup', 'store', 'day_upstream'):
+            exact_days += step['days']
+            continue
+        wanted = set(step['days'])
+        month_blocks = {block for block in step['blocks'] if len(block) == 7}
+        for block in step['blocks']:
+            # Bloc mensuel : valeurs journalières ; bloc annuel : totaux mensuels
+            result = fetch_yield_block(2 if len(block) == 7 else 3, block)
+            if result.get('error'):
+                errors.append(result)
+                continue
+            if len(block) == 7:
+                for date_str, values in _yield_rows(result, wanted).items():
+                    daily[date_str] = {**values, 'income': None, 'source': source}
+            else:
+                # Mois non couverts par un bloc mensuel de la même étape
+                firsts = {f"{day[:7]}-01" for day in wanted if day.startswith(block) and day[:7] not in month_blocks}
+                for date_str, values in _yield_rows(result, firsts).items():
+                    monthly[date_str[:7]] = {**values, 'income': None, 'source': source}
+
+    if exact_days:
+        rollups = SERIES_STORE.get_rollups(exact_days, plant_ids=[current_plant()])
+        if rollups['day'].size:
+            tarifs = get_tempo_tarifs(list(rollups['day']))
+            tarif_hp = np.array([tarifs[day]['tarif_hp'] for day in rollups['day']], dtype=np.float64)
+            tarif_hc = np.array([tarifs[day]['tarif_hc'] for day in rollups['day']], dtype=np.float64)
+            income = rollup_income(rollups, tarif_hp, tarif_hc, Config.RESALE_ENABLED, Config.TARIF_VENTE)
+            for i, day in enumerate(rollups['day']):
+                daily[str(day)] = {
+                    'yield': float(rollups['production'][i]), 'consume': float(rollups['consumption'][i]),
+                    'buyYield': float(rollups['buy'][i]), 'sellYield': float(rollups['sell'][i]),
+                    'income': float(income[i]), 'source': 'rollup'
+                }
+
+    if plan['granularity'] == 'month':
+        for date_str in sorted(daily):
+            row = daily[date_str]
+            month = monthly.setdefault(date_str[:7], {'yield': 0.0, 'consume': 0.0, 'buyYield': 0.0,
+                                                      'sellYield': 0.0, 'income': 0.0, 'source': row['source']})
+            for key in ('yield', 'consume', 'buyYield', 'sellYield'):
+                month[key] += row[key]
+            month['income'] = None if month['income'] is None or row['income'] is None else month['income'] + row['income']
+        rows = {f"{month}-01": row for month, row in monthly.items()}
+    else:
+        rows = daily
+
+    return [
+        {'date': date_str, 'timePoint': int(TIMEZONE.localize(datetime.strptime(date_str, '%Y-%m-%d')).timestamp()),
+         **rows[date_str]}
+        for date_str in sorted(rows)
+    ], errors
+
+
+# Percentiles de puissance par défaut (esquisses des cumuls journaliers)
+POWER_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def power_statistics(days, channels=('yieldPower', 'consumePower'), quantiles=POWER_QUANTILES):
+    """
+    Pointe et percentiles de puissance d'une période, par fusion des esquisses
+    journalières du stockage local (installation courante, sans relire le 5 min)
+    Les percentiles de production ignorent les créneaux sans production (nuit).
+    Args:
+        days: Dates YYYY-MM-DD (jours absents du stockage ignorés)
+        channels: Canaux de puissance
+        quantiles: Rangs entre 0 et 1
+    Returns:
+        dict: {'days': jours couverts, 'coverage': part de la période couverte,
+               canal: {'peak', 'min', 'p50', 'p95', ...}} en kW
+    """
+    merged = SERIES_STORE.get_sketches(current_plant(), days, channels)
+    result = {
+        'days': len(merged['days']),
+        'coverage': round(len(merged['days']) / len(days), 3) if days else 0
+    }
+    for channel, sketch in merged['sketches'].items():
+        if not sketch.count:
+            result[channel] = None
+            continue
+        stats = {'peak': round(sketch.max / 1000, 3), 'min': round(sketch.min / 1000, 3)}
+        for q in quantiles:
+            value = sketch.quantile(q, nonzero=channel == 'yieldPower')
+            stats[f"p{q * 100:g}"] = round(value / 1000, 3) if value is not None else None
+        result[channel] = stats
+    return result
+
+
+def iter_days(days, level=1, channels=CHANNELS, chunk_days=7, fetch=True):
+    """
+    Parcourt des journées du stockage local par blocs de chunk_days
+    Seul le bloc en cours est en mémoire ; avec fetch, les journées manquantes
+    d'un bloc sont récupérées en parallèle juste avant d'être lues (sinon ignorées).
+    Yields:
+        dict: Journée lue (voir SeriesStore.get_days)
+    """
+    for i in range(0, len(days), chunk_days):
+        chunk = days[i:i + chunk_days]
+        if fetch:
+            yield from load_days(chunk, level, channels)
+        else:
+            yield from SERIES_STORE.get_days(current_plant(), chunk, level, channels)
 
 
 # Initialisation de l'application Flask
@@ -102,18 +690,189 @@ app.config.from_object(Config)
 # Cache global pour les tarifs Tempo (partagé entre toutes les requêtes)
 # {date_str: {tarif_hp, tarif_hc, couleur, couleur_css}}
 TEMPO_CACHE = {}
-TEMPO_CACHE_LOCK = __import__('threading').Lock()
+TEMPO_CACHE_LOCK = threading.Lock()
+
+# Installation de la requête en cours (routes /api/plants/<id>/...), None = Config.PLANT_ID
+CURRENT_PLANT = contextvars.ContextVar('current_plant', default=None)
+
+# Résultats amont partagés pendant l'exécution d'un batch
+# {'lock': Lock, 'futures': {clé: Future}} ou None hors batch
+BATCH_MEMO = contextvars.ContextVar('batch_memo', default=None)
+BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='batch')
+
+# Cache partagé entre workers : token Hyxi, jours Tempo, résultats amont
+# du créneau de 5 minutes en cours, réponses rendues (voir app.cache)
+SHARED_CACHE = create_cache(Config.CACHE_URL)
+
+# Stockage local des séries 5 min (+ pyramides min/max/moyenne)
+SERIES_STORE = SeriesStore(Config.STORE_PATH, tz=TIMEZONE)
+INGEST_EXECUTOR = ThreadPoolExecutor(max_workers=Config.INGEST_WORKERS, thread_name_prefix='ingest')
+
+# Ressources statiques empreintées (manifeste du dernier build, vide sinon)
+ASSET_MANIFEST = assets.load_manifest()
+# Empreintes SRI des bibliothèques tierces épinglées (attribut integrity, y compris depuis le CDN)
+VENDOR_LOCK = assets.load_vendor_lock()
+
+# Flux SSE : un seul poller amont pour tous les clients connectés
+STREAM_BROKER = EventBroker(history_size=Config.STREAM_HISTORY_SIZE)
 
 
 # Initialisation du client Hyxi
 hyxi_client = HyxiAPIClient(
     access_key=Config.HYXI_ACCESS_KEY,
     secret_key=Config.HYXI_SECRET_KEY,
-    base_url=Config.HYXI_API_BASE_URL
+    base_url=Config.HYXI_API_BASE_URL,
+    token_cache=SHARED_CACHE,
+    rate_limit=Config.HYXI_RATE_LIMIT
 )
 
 
 # Routes pour l'interface web
+@app.template_global()
+def asset_url(name):
+    """
+    URL d'une ressource statique : version empreintée si construite, sinon /static/ ;
+    CDN pour une bibliothèque tierce absente de static/vendor/
+    """
+    return assets.asset_path(ASSET_MANIFEST, name) or url_for('static', filename=name)
+
+
+@app.template_global()
+def asset_integrity(name):
+    """Empreinte SRI épinglée d'une bibliothèque tierce (None si non épinglée)"""
+    return VENDOR_LOCK.get(name)
+
+
+def _metrics_route():
+    """Gabarit de la route (cardinalité bornée), 'unmatched' pour les URL inconnues"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _profile_authorized():
+    """?profile=1 accepté seulement avec le jeton Config.PROFILE_TOKEN (en-tête X-Profile-Token)"""
+    # Comparaison en temps constant (pas de fuite du jeton par mesure du temps de réponse)
+    return bool(Config.PROFILE_TOKEN) and hmac.compare_digest(
+        request.headers.get('X-Profile-Token', '').encode(), Config.PROFILE_TOKEN.encode())
+
+
+@app.before_request
+def start_request_metrics():
+    """
+    Début de requête : horodatage, requêtes en cours, trace et profilage à la demande
+    L'état est rangé dans request.environ : les sous-requêtes d'un batch partagent g
+    avec la requête parente, et ajoutent leurs spans à sa trace.
+    """
+    if Config.TRACING_ENABLED and tracing.current_trace() is None:
+        request.environ['hyxi.trace'] = tracing.start_trace(_metrics_route())
+    if request.args.get('profile') == '1':
+        if not _profile_authorized():
+            return jsonify({'error': True, 'message': 'Profilage non autorisé'}), 403
+        import cProfile  # Chargé à la première requête profilée seulement
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Un autre profileur est actif dans ce thread
+            return jsonify({'error': True, 'message': f"Profilage indisponible: {e}"}), 409
+        request.environ['hyxi.profiler'] = profiler
+    if Config.METRICS_ENABLED:
+        route = _metrics_route()
+        request.environ['hyxi.metrics'] = (time.perf_counter(), route)
+        metrics.HTTP_IN_FLIGHT.inc(route=route)
+
+
+@app.after_request
+def observe_request_metrics(response):
+    """Durée de traitement par route (jusqu'au premier octet pour les réponses en streaming)"""
+    started = request.environ.get('hyxi.metrics')
+    if started is not None:
+        metrics.HTTP_REQUESTS.observe(time.perf_counter() - started[0], route=started[1],
+                                      method=request.method, status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def end_request_metrics(error=None):
+    """Fin de requête (après la fin du flux pour SSE et NDJSON) : requêtes en cours et trace"""
+    started = request.environ.pop('hyxi.metrics', None)
+    if started is not None:
+        metrics.HTTP_IN_FLIGHT.dec(route=started[1])
+    trace = request.environ.pop('hyxi.trace', None)
+    if trace is not None:
+        tracing.end_trace(trace)
+
+
+@app.after_request
+def compress_response(response):
+    """
+    Compression gzip/brotli des réponses au-delà de Config.COMPRESS_MIN_SIZE
+    Les réponses en streaming (SSE, NDJSON) et déjà encodées sont laissées telles quelles.
+    """
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in assets.COMPRESSIBLE_TYPES or not 200 <= response.status_code < 300):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encodings = assets.accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    if len(body) < Config.COMPRESS_MIN_SIZE or not encodings:
+        return response
+
+    response.set_data(assets.compress(body, encodings[0]))
+    response.headers['Content-Encoding'] = encodings[0]
+    return response
+
+
+@app.after_request
+def finish_trace(response):
+    """
+    Fin de trace : en-tête Server-Timing, journal JSON éventuel et, avec ?profile=1,
+    remplacement de la réponse par le résumé cProfile de la requête
+    """
+    profiler = request.environ.pop('hyxi.profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        if not response.is_streamed:
+            summary = tracing.profile_summary(profiler, Config.PROFILE_TOP)
+            response = jsonify({'success': True, 'profile': summary, 'status': response.status_code,
+                                'path': request.path})
+
+    # Trace ouverte par cette requête (pas celle d'un batch parent)
+    trace = request.environ.get('hyxi.trace')
+    if trace is not None:
+        response.headers['Server-Timing'] = trace.server_timing()
+        if Config.TRACE_LOG and trace.elapsed() * 1000 >= Config.TRACE_LOG_MIN_MS:
+            print(trace.to_json(method=request.method, path=request.full_path.rstrip('?'),
+                                status=response.status_code), flush=True)
+    return response
+
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """
+    Ressource empreintée (contenu immuable pour un nom donné)
+    Sert la variante précompressée .br/.gz acceptée par le client, avec un cache d'un an.
+    """
+    if filename not in ASSET_MANIFEST.values():
+        return jsonify({'error': True, 'message': 'Ressource inconnue'}), 404
+
+    path = os.path.join(assets.DIST_DIR, filename)
+    encoding = None
+    for candidate in assets.accepted_encodings(request.headers.get('Accept-Encoding', '')):
+        suffix = '.br' if candidate == 'br' else '.gz'
+        if os.path.exists(path + suffix):
+            path, encoding = path + suffix, candidate
+            break
+
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], max_age=31536000, etag=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route('/')
 def index():
     """Page d'accueil - Dashboard de télémétrie"""
@@ -121,17 +880,25 @@ def index():
 
 
 # Routes API pour récupérer les données
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métriques au format Prometheus (routes, appels amont, caches, requêtes en cours)"""
+    if not Config.METRICS_ENABLED:
+        return jsonify({'error': True, 'message': 'Métriques désactivées (METRICS_ENABLED)'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/status')
 def api_status():
     """Test de connexion à l'API Hyxi"""
-    result = hyxi_client.test_connection()
+    result = _memoize(('test_connection',), hyxi_client.test_connection)
     return jsonify(result)
 
 
 @app.route('/api/tempo/now')
 def api_tempo_now():
     """Informations Tempo actuelles (couleur + tarif)"""
-    result = TempoAPI.get_current_info()
+    result = fetch_tempo_now()
     return jsonify(result)
 
 
@@ -153,7 +920,7 @@ def api_tempo_tomorrow():
 def api_config():
     """Retourne la configuration de l'installation (PLANT_NAME uniquement pour affichage)"""
     return jsonify({
-        'plant_name': Config.PLANT_NAME,
+        'plant_name': current_plant_name(),
         'tarif_vente': Config.TARIF_VENTE
     })
 
@@ -161,14 +928,14 @@ def api_config():
 @app.route('/api/plant/info')
 def api_plant_info():
     """Informations détaillées de l'installation configurée"""
-    result = hyxi_client.get_plant_info(Config.PLANT_ID)
+    result = fetch_plant_info()
     return jsonify(result)
 
 
 @app.route('/api/plant/power-generation')
 def api_plant_power_generation():
     """Production d'énergie (jour/mois/année/total)"""
-    result = hyxi_client.get_plant_power_generation(Config.PLANT_ID)
+    result = hyxi_client.get_plant_power_generation(current_plant())
     return jsonify(result)
 
 
@@ -177,7 +944,7 @@ def api_plant_yield_statistics():
     """Statistiques de production par période"""
     time_type = int(request.args.get('time_type', 1))  # 1=mois, 2=année, 3=total
     start_time = request.args.get('start_time', now_tz().strftime('%Y-%m'))
-    result = hyxi_client.get_plant_yield_statistics(Config.PLANT_ID, time_type, start_time)
+    result = hyxi_client.get_plant_yield_statistics(current_plant(), time_type, start_time)
     return jsonify(result)
 
 
@@ -190,7 +957,7 @@ def api_plant_statistics():
     if not start_time:
         start_time = now_tz().strftime('%Y-%m-%d')
 
-    result = hyxi_client.get_plant_power_statistics(Config.PLANT_ID, start_time)
+    result = fetch_day_statistics(start_time)
     return jsonify(result)
 
 
@@ -200,16 +967,32 @@ def api_plant_realtime():
     Données en temps réel de l'installation configurée
     Combine les infos de l'installation et les statistiques du jour
     """
+    since = request.args.get('since', type=int)
+    payload = build_realtime_payload()
+
+    # Rien de nouveau depuis le curseur client : réponse minimale
+    if since is not None and payload.get('success') and payload.get('cursor') is not None and payload['cursor'] <= since:
+        return jsonify({'success': True, 'changed': False, 'cursor': payload['cursor']})
+
+    return jsonify(payload)
+
+
+def build_realtime_payload():
+    """
+    Calcule le payload temps réel (partagé par la route REST et le flux SSE)
+    Returns:
+        dict: {'success': True, 'data': {...}} ou {'error': True, 'message': ...}
+    """
     try:
         # Récupérer les infos de base de l'installation
-        plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
+        plant_info = fetch_plant_info()
         
         if plant_info.get('error'):
-            return jsonify(plant_info)
+            return plant_info
         
         # Récupérer les statistiques du jour pour les données en temps réel
         today = now_tz().strftime('%Y-%m-%d')
-        stats = hyxi_client.get_plant_power_statistics(Config.PLANT_ID, today)
+        stats = fetch_day_statistics(today)
         
         plant_data = plant_info.get('data', {})
         stats_data = stats.get('data', {}) if not stats.get('error') else {}
@@ -237,7 +1020,7 @@ def api_plant_realtime():
         last_measurement_datetime = from_timestamp_tz(last_measurement_time).strftime('%Y-%m-%d %H:%M:%S') if last_measurement_time else None
         
         # Récupérer le tarif Tempo actuel
-        tempo_info = TempoAPI.get_current_info()
+        tempo_info = fetch_tempo_now()
         tarif_achat = tempo_info.get('tarif_kwh', Config.TARIF_ACHAT)
         
         # Calculer le revenu du jour
@@ -268,8 +1051,10 @@ def api_plant_realtime():
             energy_autoconsummed_kwh = energy_produced_kwh
             revenu_jour = energy_autoconsummed_kwh * tarif_achat
         
-        return jsonify({
+        return {
             'success': True,
+            'changed': True,
+            'cursor': last_measurement_time,
             'data': {
                 # Puissances actuelles (W)
                 'currentPowerProduced': round(current_power_produced, 0),
@@ -291,33 +1076,37 @@ def api_plant_realtime():
                 'lastMeasurementTime': last_measurement_datetime,
                 
                 # Infos installation
-                'plantName': plant_data.get('plantName', Config.PLANT_NAME),
+                'plantName': plant_data.get('plantName', current_plant_name()),
                 'capacity': plant_data.get('capacity', 0),
                 'status': 1 if current_power_produced > 0 else 0,
                 
                 # Tarif utilisé
                 'tarifAchat': round(tarif_achat, 4)
             }
-        })
+        }
         
     except Exception as e:
-        return jsonify({
+        return {
             'error': True,
             'message': str(e)
-        })
+        }
 
 
 @app.route('/api/energy/production')
+@cached_response
 def api_energy_production():
     """
     Production d'énergie pour une période donnée
     - Jour : données toutes les 5 min (queryPlantPowerStatistics)
-    - Semaine : données agrégées par jour sur 7 jours glissants (queryPlantYieldStatistics type=2)
-    - Mois : données agrégées par jour sur 30 jours glissants (queryPlantYieldStatistics type=2)
-    - Année : données agrégées par mois sur 12 mois glissants (queryPlantYieldStatistics type=3)
+    - Semaine : données agrégées par jour sur 7 jours glissants
+    - Mois : données agrégées par jour sur 30 jours glissants
+    - Année : données agrégées par mois sur 12 mois glissants
+    Semaine, mois et année : sources choisies par le planificateur (cumuls du stockage
+    local, blocs queryPlantYieldStatistics en cache ou en amont), voir _handle_planned_period
     """
     period = request.args.get('period', 'day')
     selected_date = request.args.get('date', None)
+    since = request.args.get('since', type=int)  # Curseur (epoch s) : ne renvoyer que les points plus récents
 
     now = now_tz()
     
@@ -329,30 +1118,158 @@ def api_energy_production():
     else:
         reference_date = now
     
+    # Courbe de puissance sous-échantillonnée (niveau de détail borné)
+    resolution = request.args.get('resolution')
+    max_points = request.args.get('max_points', type=int)
+    if resolution or max_points:
+        if resolution and resolution not in ('auto',) + tuple(LEVELS_BY_NAME):
+            return jsonify({'error': True, 'message': 'Résolution invalide'}), 400
+        since = None
+
+    # Précision des périodes agrégées (voir _handle_planned_period), validée avant les transformations
+    if request.args.get('accuracy', 'approx') not in planner.ACCURACIES:
+        return jsonify({'error': True, 'message': f"Précision attendue : {' ou '.join(planner.ACCURACIES)}"}), 400
+    
     # Router vers la fonction appropriée
     if period == 'day':
-        return _handle_day_period(reference_date)
+        response = _handle_day_period(reference_date, since)
     elif period == 'week':
-        return _handle_week_period(reference_date)
+        response = _handle_week_period(reference_date)
     elif period == 'month':
-        return _handle_month_period(reference_date)
+        response = _handle_month_period(reference_date)
     elif period == 'year':
-        return _handle_year_period(reference_date)
+        response = _handle_year_period(reference_date)
     else:
         return jsonify({'error': True, 'message': 'Période invalide'}), 400
 
+    if resolution or max_points:
+        response = _with_power_chart(response, reference_date, resolution or 'auto', max_points or Config.CHART_MAX_POINTS)
+
+    encoding = _chart_encoding()
+    if encoding:
+        # Courbes de puissance en W, agrégats semaine/mois/année en kWh
+        scale = 1 if period == 'day' or resolution or max_points else 0.01
+        response = _with_packed_chart(response, encoding, scale)
+    return response
 
-def _handle_day_period(reference_date):
-    """Période 'jour' : données toutes les 5 min"""
+
+def _chart_encoding():
+    """
+    Encodage compact demandé par le client, ou None pour les listes JSON
+    - Paramètre ?encoding=f32|i16
+    - ou en-tête Accept: application/vnd.hyxi.chart+json[; encoding=i16]
+    """
+    encoding = request.args.get('encoding')
+    if encoding is None:
+        for value in request.headers.get('Accept', '').split(','):
+            media_type, _, params = value.strip().partition(';')
+            if media_type.strip() == PACKED_MEDIA_TYPE:
+                encoding = 'i16' if 'encoding=i16' in params.replace(' ', '') else 'f32'
+                break
+    return encoding if encoding in PACKED_ENCODINGS else None
+
+
+def _with_packed_chart(response, encoding, scale):
+    """Remplace chart_data par sa forme compacte (voir app.packing) ; réponse d'erreur inchangée"""
+    response = app.make_response(response)
+    if not 200 <= response.status_code < 300:
+        return response
+    payload = response.get_json(silent=True)
+    if not payload or not payload.get('chart_data'):
+        return response
+
+    payload['chart_data'] = pack_chart_data(payload['chart_data'], encoding, scale, Config.TIMEZONE)
+    packed = jsonify(payload)
+    packed.vary.add('Accept')
+    return packed
+
+
+def _with_power_chart(response, reference_date, resolution, max_points):
+    """
+    Remplace chart_data par la courbe de puissance (W) issue de la pyramide
+    du stockage local, bornée à max_points points
+    - production/consumption : moyenne par point
+    - production_min/max, consumption_min/max : enveloppes (pics conservés)
+    - tempo_zones : avec start_index/end_index (si la période couvre au plus 62 jours)
+    Une réponse d'erreur (tuple ou statut hors 2xx) est renvoyée inchangée.
+    """
+    response = app.make_response(response)
+    if not 200 <= response.status_code < 300:
+        return response
+    payload = response.get_json()
+    if not payload or not payload.get('success'):
+        return response
+
+    max_points = max(10, min(max_points, Config.CHART_MAX_POINTS_LIMIT))
+    start = datetime.strptime(payload['start_time'], '%Y-%m-%d').date()
+    end = min(reference_date.date(), now_tz().date())
+    days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+    channels = ('yieldPower', 'consumePower')
+    grids = [{'slots': day_grid(day, TIMEZONE)[1]} for day in days]
+    level = choose_level(grids, max_points, resolution)
+    loaded = load_days(days, level, channels)
+    series = rebucket(concat_days(loaded, channels), channels, max_points)
+
+    timestamps = series['timestamps'].tolist()
+    step = int(timestamps[1] - timestamps[0]) if len(timestamps) > 1 else 86400
+    if step >= 86400:
+        label_format = '%d/%m/%y' if len(days) > 366 else '%d/%m'
+    else:
+        label_format = '%H:%M' if len(days) == 1 else '%d/%m %H:%M'
+
+    tempo_zones = []
+    if len(days) <= 62:
+        # day_index désigne les journées effectivement lues (croissant) : bornes par recherche dichotomique
+        entries = np.arange(len(loaded))
+        starts = np.searchsorted(series['day_index'], entries, side='left')
+        ends = np.searchsorted(series['day_index'], entries, side='right') - 1
+        for entry, start_index, end_index in zip(loaded, starts.tolist(), ends.tolist()):
+            if end_index >= start_index:
+                tarif_data = get_tempo_tarif(entry['day'])
+                tempo_zones.append({
+                    'date': entry['day'],
+                    'couleur': tarif_data.get('couleur', 'INCONNU'),
+                    'couleur_css': tarif_data.get('couleur_css', 'gray'),
+                    'start_index': start_index,
+                    'end_index': end_index
+                })
+
+    # Résolution effective (après regroupement éventuel au-delà de max_points)
+    step_names = {factor * 300: name for name, factor in LEVELS_BY_NAME.items() if factor}
+    payload['resolution'] = step_names.get(step, 'day' if step == 86400 else f'{step}s')
+    payload['chart_data'] = {
+        'labels': [from_timestamp_tz(ts).strftime(label_format) for ts in timestamps],
+        'timestamps': timestamps,
+        'step': step,
+        'production': to_json_list(series['yieldPower']['mean']),
+        'production_min': to_json_list(series['yieldPower']['min']),
+        'production_max': to_json_list(series['yieldPower']['max']),
+        'consumption': to_json_list(series['consumePower']['mean']),
+        'consumption_min': to_json_list(series['consumePower']['min']),
+        'consumption_max': to_json_list(series['consumePower']['max']),
+        'tempo_zones': tempo_zones
+    }
+    return jsonify(payload)
+
+
+def _handle_day_period(reference_date, since=None):
+    """
+    Période 'jour' : données toutes les 5 min
+    Avec since (epoch s), chart_data ne contient que les points ajoutés après
+    ce curseur ; les totaux restent ceux de la journée complète.
+    """
     start_time = reference_date.strftime('%Y-%m-%d')
-    result = hyxi_client.get_plant_power_statistics(Config.PLANT_ID, start_time)
-    
-    # Récupérer la capacité installée depuis l'API
-    plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
+    with tracing.span('fetch'):
+        result = fetch_day_statistics(start_time)
+
+        # Récupérer la capacité installée depuis l'API
+        plant_info = fetch_plant_info()
     plant_capacity_kw = plant_info.get('data', {}).get('capacity', 0) if not plant_info.get('error') else 0
     
     # Traiter les données pour le graphique en courbes (points de 5 min)
     if not result.get('error'):
+        phase_start = time.perf_counter()
         stats_data = result.get('data', {})
         yield_power = stats_data.get('yieldPower', [])
         consume_power = stats_data.get('consumePower', [])
@@ -385,6 +1302,7 @@ def _handle_day_period(reference_date):
         
         chart_data = {
             'labels': labels,
+            'timestamps': time_points,
             'production': production_power,  # En W pour affichage direct
             'consumption': consumption_power  # En W pour affichage direct
         }
@@ -488,13 +1406,35 @@ def _handle_day_period(reference_date):
         # Rendement des panneaux (%)
         # Pour une journée : production réelle / (puissance crête × heures ensoleillement) × 100
         # Exemple : 3 kWc qui produit 10 kWh sur 10h = 10 / (3 × 10) = 33.3%
-        daylight_hours = get_daylight_hours(start_time)
+        tracing.record('compute', phase_start)
+        with tracing.span('daylight'):
+            daylight_hours = get_daylight_hours(start_time)
         theoretical_max = plant_capacity_kw * daylight_hours  # kWh théorique max sur les heures d'ensoleillement
         pv_performance = (total_production / theoretical_max * 100) if theoretical_max > 0 else 0
         
-        return jsonify({
+        # Curseur : timestamp du dernier point, à renvoyer via since au prochain rafraîchissement
+        cursor = time_points[-1] if time_points else since
+        
+        # Delta : uniquement les points postérieurs au curseur client
+        # (un curseur antérieur au premier point, ex: changement de jour, renvoie tout)
+        delta = since is not None and bool(time_points) and since >= time_points[0]
+        if delta:
+            first_new = next((i for i, ts in enumerate(time_points) if ts > since), len(time_points))
+            new_dates = {from_timestamp_tz(ts).strftime('%Y-%m-%d') for ts in time_points[first_new:]}
+            chart_data = {
+                'labels': labels[first_new:],
+                'timestamps': time_points[first_new:],
+                'production': production_power[first_new:],
+                'consumption': consumption_power[first_new:],
+                'tempo_zones': [zone for zone in tempo_zones if zone['date'] in new_dates]
+            }
+        
+        phase_start = time.perf_counter()
+        response = jsonify({
             'success': True,
             'period': 'day',
+            'delta': delta,
+            'cursor': cursor,
             'start_time': reference_date.strftime('%Y-%m-%d'),
             'data': {
                 'energy': round(total_production, 2),
@@ -507,166 +1447,79 @@ def _handle_day_period(reference_date):
             },
             'chart_data': chart_data
         })
+        tracing.record('encode', phase_start)
+        return response
     
     return jsonify(result)
 
 
-def _handle_week_period(reference_date):
-    """Période 'semaine' : données agrégées par jour sur 7 jours glissants"""
+def _period_days(start_date, end_date):
+    """Dates YYYY-MM-DD de start_date à end_date inclus, limitées à aujourd'hui"""
+    start = start_date.date() if isinstance(start_date, datetime) else start_date
+    end = min(end_date.date() if isinstance(end_date, datetime) else end_date, now_tz().date())
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+
+def _handle_planned_period(period_type, start_date, end_date, granularity):
+    """
+    Périodes agrégées (semaine, mois, année) : sources choisies par le planificateur
+    (cumuls du stockage local, blocs yieldStatistics en cache ou en amont, voir app.planner)
+    - accuracy=exact : revenus aux tarifs HP/HC exacts (journées récupérées si nécessaire)
+    - explain=1 : plan retenu dans la réponse
+    """
+    accuracy = request.args.get('accuracy', 'approx')
+    try:
+        with tracing.span('plan'):
+            plan = plan_period(_period_days(start_date, end_date), ('energy', 'income', 'peak'),
+                               accuracy, granularity)
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
     # Récupérer la capacité installée depuis l'API
-    plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
+    plant_info = fetch_plant_info()
     plant_capacity_kw = plant_info.get('data', {}).get('capacity', 0) if not plant_info.get('error') else 0
-    
-    # Calculer la période de 7 jours
+
+    with tracing.span('fetch'):
+        rows, errors = execute_plan(plan)
+    if not rows and errors:
+        return jsonify(errors[0])
+
+    data = {key: [row[key] for row in rows] for key in ('timePoint', 'yield', 'consume', 'buyYield', 'sellYield', 'income')}
+    explained = None
+    if request.args.get('explain') == '1':
+        explained = {**plan, 'explain': planner.explain(plan)}
+    return _process_aggregated_data(data, period_type, start_date, end_date, plant_capacity_kw, explained)
+
+
+def _handle_week_period(reference_date):
+    """Période 'semaine' : données agrégées par jour sur 7 jours glissants"""
     end_date = reference_date
     start_date = end_date - timedelta(days=6)  # 7 jours incluant today
-    
-    # Récupérer les données agrégées par jour
-    # On doit potentiellement appeler pour 2 mois si la semaine chevauche 2 mois
-    results = []
-    current_month = start_date.replace(day=1)
-    
-    while current_month <= end_date:
-        month_str = current_month.strftime('%Y-%m')
-        result = hyxi_client.get_plant_yield_statistics(Config.PLANT_ID, 2, month_str)
-        if not result.get('error'):
-            results.append(result.get('data', {}))
-        current_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
-    
-    # Fusionner et filtrer les données pour les 7 derniers jours
-    all_data = {
-        'yield': [],
-        'consume': [],
-        'buyYield': [],
-        'sellYield': [],
-        'timePoint': []
-    }
-    
-    for data in results:
-        for key in all_data.keys():
-            all_data[key].extend(data.get(key, []))
-    
-    # Filtrer pour garder uniquement les 7 derniers jours
-    filtered_data = {
-        'yield': [],
-        'consume': [],
-        'buyYield': [],
-        'sellYield': [],
-        'timePoint': []
-    }
-    
-    # Les timestamps de queryPlantYieldStatistics sont en SECONDES (pas ms)
-    start_ts = int(start_date.timestamp())
-    end_ts = int((end_date + timedelta(days=1)).timestamp())
-    
-    for i, ts in enumerate(all_data['timePoint']):
-        if start_ts <= ts < end_ts:
-            for key in filtered_data.keys():
-                if i < len(all_data[key]):
-                    filtered_data[key].append(all_data[key][i])
-    
-    return _process_aggregated_data(filtered_data, 'week', start_date, end_date, plant_capacity_kw)
+    return _handle_planned_period('week', start_date, end_date, 'day')
 
 
 def _handle_month_period(reference_date):
     """Période 'mois' : données agrégées par jour sur 30 jours glissants"""
-    # Récupérer la capacité installée depuis l'API
-    plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
-    plant_capacity_kw = plant_info.get('data', {}).get('capacity', 0) if not plant_info.get('error') else 0
-    
     end_date = reference_date
     start_date = end_date - timedelta(days=29)  # 30 jours incluant today
-    
-    # Récupérer les données pour les mois concernés (potentiellement 2 mois)
-    results = []
-    current_month = start_date.replace(day=1)
-    
-    while current_month <= end_date:
-        month_str = current_month.strftime('%Y-%m')
-        result = hyxi_client.get_plant_yield_statistics(Config.PLANT_ID, 2, month_str)
-        if not result.get('error'):
-            results.append(result.get('data', {}))
-        current_month = (current_month.replace(day=28) + timedelta(days=4)).replace(day=1)
-    
-    # Fusionner et filtrer les données
-    all_data = {
-        'yield': [],
-        'consume': [],
-        'buyYield': [],
-        'sellYield': [],
-        'timePoint': []
-    }
-    
-    for data in results:
-        for key in all_data.keys():
-            all_data[key].extend(data.get(key, []))
-    
-    filtered_data = {
-        'yield': [],
-        'consume': [],
-        'buyYield': [],
-        'sellYield': [],
-        'timePoint': []
-    }
-    
-    # Les timestamps de queryPlantYieldStatistics sont en SECONDES
-    start_ts = int(start_date.timestamp())
-    end_ts = int((end_date + timedelta(days=1)).timestamp())
-    
-    for i, ts in enumerate(all_data['timePoint']):
-        if start_ts <= ts < end_ts:
-            for key in filtered_data.keys():
-                if i < len(all_data[key]):
-                    filtered_data[key].append(all_data[key][i])
-    
-    return _process_aggregated_data(filtered_data, 'month', start_date, end_date, plant_capacity_kw)
+    return _handle_planned_period('month', start_date, end_date, 'day')
 
 
 def _handle_year_period(reference_date):
     """Période 'année' : données agrégées par mois sur 12 mois glissants"""
-    # Récupérer la capacité installée depuis l'API
-    plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
-    plant_capacity_kw = plant_info.get('data', {}).get('capacity', 0) if not plant_info.get('error') else 0
-    
     end_date = reference_date
-    year = end_date.year
-    
-    # Pour l'année, utiliser type=3 qui retourne les données mensuelles
-    result = hyxi_client.get_plant_yield_statistics(Config.PLANT_ID, 3, year)
-    
-    if result.get('error'):
-        return jsonify(result)
-    
-    data = result.get('data', {})
-    
-    # Filtrer pour garder les 12 derniers mois
-    filtered_data = {
-        'yield': [],
-        'consume': [],
-        'buyYield': [],
-        'sellYield': [],
-        'timePoint': []
-    }
-    
-    # Calculer le timestamp de début (12 mois avant)
-    start_date = end_date.replace(day=1) - timedelta(days=365)
-    # Les timestamps de queryPlantYieldStatistics sont en SECONDES
-    start_ts = int(start_date.timestamp())
-    end_ts = int((end_date + timedelta(days=1)).timestamp())
-    
-    timePoints = data.get('timePoint', [])
-    for i, ts in enumerate(timePoints):
-        if start_ts <= ts < end_ts:
-            for key in filtered_data.keys():
-                values = data.get(key, [])
-                if i < len(values):
-                    filtered_data[key].append(values[i])
-    
-    return _process_aggregated_data(filtered_data, 'year', start_date, end_date, plant_capacity_kw)
+    # Début de période : premier jour du mois, 12 mois avant
+    start_date = (end_date.replace(day=1) - timedelta(days=365)).replace(day=1)
+    return _handle_planned_period('year', start_date, end_date, 'month')
 
 
-def _process_aggregated_data(data, period_type, start_date, end_date, plant_capacity_kw):
-    """Traite les données agrégées (semaine/mois/année) et calcule les revenus"""
+def _process_aggregated_data(data, period_type, start_date, end_date, plant_capacity_kw, plan=None):
+    """
+    Traite les données agrégées (semaine/mois/année) et calcule les revenus
+    data['income'] (optionnel) : revenu exact par point (aux tarifs HP/HC), None si le
+    point doit être valorisé au tarif HP de sa date
+    plan : plan du planificateur à inclure dans la réponse (explain=1)
+    """
     start_time_processing = time.time()
     
     timePoints = data.get('timePoint', [])
@@ -674,6 +1527,7 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
     consumes = data.get('consume', [])
     buyYields = data.get('buyYield', [])
     sellYields = data.get('sellYield', [])
+    incomes = data.get('income') or [None] * len(timePoints)
     
     if not timePoints:
         return jsonify({
@@ -692,10 +1546,12 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
                 'production': [],
                 'consumption': [],
                 'tempo_zones': []
-            }
+            },
+            **({'plan': plan} if plan else {})
         })
     
     # Préparer les données pour le graphique
+    phase_start = time.perf_counter()
     labels = []
     production_values = []
     consumption_values = []
@@ -724,7 +1580,10 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
         if date_str not in tarifs_cache:
             tarifs_cache[date_str] = get_tempo_tarif(date_str)
     
+    tracing.record('tarifs', phase_start)
+
     # Calcul des totaux
+    phase_start = time.perf_counter()
     total_production = sum(production_values)
     total_consumption = sum(consumption_values)
     total_buy = sum(buyYields) if buyYields else 0
@@ -736,6 +1595,10 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
         revenu_vente = 0
         
         for i, ts in enumerate(timePoints):
+            if incomes[i] is not None:
+                # Revenu exact (cumuls journaliers aux tarifs HP/HC)
+                revenu_autoconso += incomes[i]
+                continue
             dt = from_timestamp_tz(ts)
             date_str = dt.strftime('%Y-%m-%d')
             
@@ -756,6 +1619,9 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
         # Mode simple : toute la production est valorisée au tarif achat
         revenu = 0
         for i, ts in enumerate(timePoints):
+            if incomes[i] is not None:
+                revenu += incomes[i]
+                continue
             dt = from_timestamp_tz(ts)
             date_str = dt.strftime('%Y-%m-%d')
             tarif_achat = tarifs_cache.get(date_str, {}).get('tarif_hp', Config.TARIF_ACHAT)
@@ -778,8 +1644,19 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
         'tempo_zones': tempo_zones
     }
     
-    # Puissance de pointe (approximation sur données agrégées)
-    peak_power_kw = max(production_values) if production_values else 0
+    # Puissance de pointe : esquisses journalières du stockage local si la période est couverte,
+    # sinon approximation par la plus forte production journalière
+    today_str = now_tz().strftime('%Y-%m-%d')
+    period_days = []
+    current_date = start_date
+    while current_date <= end_date and current_date.strftime('%Y-%m-%d') <= today_str:
+        period_days.append(current_date.strftime('%Y-%m-%d'))
+        current_date += timedelta(days=1)
+    power = power_statistics(period_days)
+    if power['coverage'] == 1 and power['yieldPower']:
+        peak_power_kw = power['yieldPower']['peak']
+    else:
+        peak_power_kw = max(production_values) if production_values else 0
     
     # Calcul du taux d'autoconsommation (%)
     if total_production > 0:
@@ -793,8 +1670,11 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
     else:
         autoconso_rate = 0
     
+    tracing.record('compute', phase_start)
+
     # Rendement des panneaux (%)
     # Calculer les heures d'ensoleillement totales pour la période
+    phase_start = time.perf_counter()
     total_daylight_hours = 0
     current_date = start_date
     while current_date <= end_date:
@@ -805,10 +1685,11 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
     theoretical_max = plant_capacity_kw * total_daylight_hours  # kWh théorique max sur les heures d'ensoleillement
     pv_performance = (total_production / theoretical_max * 100) if theoretical_max > 0 else 0
     
-    elapsed = time.time() - start_time_processing
-    print(f"[PERF] _process_aggregated_data took {elapsed*1000:.0f}ms for {len(timePoints)} points, {len(tarifs_cache)} tempo calls")
+    tracing.record('daylight', phase_start)
+    metrics.PROCESSING.observe(time.time() - start_time_processing, step='aggregated')
     
-    return jsonify({
+    phase_start = time.perf_counter()
+    response = jsonify({
         'success': True,
         'period': period_type,
         'start_time': start_date.strftime('%Y-%m-%d'),
@@ -819,13 +1700,99 @@ def _process_aggregated_data(data, period_type, start_date, end_date, plant_capa
             'peakPower': round(peak_power_kw, 3),
             'income': round(revenu, 2),
             'autoconsoRate': round(autoconso_rate, 1),
-            'pvPerformance': round(pv_performance, 1)
+            'pvPerformance': round(pv_performance, 1),
+            'power': power
         },
-        'chart_data': chart_data
+        'chart_data': chart_data,
+        **({'plan': plan} if plan else {})
     })
+    tracing.record('encode', phase_start)
+    return response
+
+
+@app.route('/api/energy/range')
+def api_energy_range():
+    """
+    Séries de puissance sur une plage de dates quelconque, en streaming
+    - start, end : YYYY-MM-DD (end inclus, borné à aujourd'hui)
+    - resolution : 5min (défaut), 15min, hour, day
+    - format : ndjson (défaut, une ligne JSON par journée) ou json (tableau JSON envoyé par morceaux)
+    - backfill=1 : journées absentes du stockage récupérées en amont (sinon ignorées)
+    Période limitée à Config.ANALYSIS_MAX_DAYS jours.
+    Lignes : {"type": "meta"}, puis {"type": "day"} par journée, puis {"type": "summary"}
+    """
+    try:
+        start = datetime.strptime(request.args.get('start', ''), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': True, 'message': 'Paramètres start/end invalides (YYYY-MM-DD)'}), 400
+
+    resolution = request.args.get('resolution', '5min')
+    if resolution not in LEVELS_BY_NAME:
+        return jsonify({'error': True, 'message': 'Résolution invalide'}), 400
+
+    output_format = request.args.get('format', 'ndjson')
+    if output_format not in ('ndjson', 'json'):
+        return jsonify({'error': True, 'message': 'Format invalide'}), 400
+
+    end = min(end, now_tz().date())
+    if start > end:
+        return jsonify({'error': True, 'message': 'start doit précéder end'}), 400
+    if (end - start).days + 1 > Config.ANALYSIS_MAX_DAYS:
+        return jsonify({'error': True,
+                        'message': f'Période limitée à {Config.ANALYSIS_MAX_DAYS} jours (ANALYSIS_MAX_DAYS)'}), 400
+
+    days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+    backfill = _wants_backfill(request.args)
+    level = LEVELS_BY_NAME[resolution]
+    channels = ('yieldPower', 'consumePower', 'buyPower', 'sellPower')
+    names = {'yieldPower': 'production', 'consumePower': 'consumption', 'buyPower': 'buy', 'sellPower': 'sell'}
+
+    def generate_records():
+        totals = {name: 0.0 for name in names.values()}
+        yield {
+            'type': 'meta',
+            'start': days[0],
+            'end': days[-1],
+            'resolution': resolution,
+            'unit': 'W',
+            'channels': list(names.values())
+        }
+        served = 0
+        for entry in iter_days(days, level, channels, fetch=backfill):
+            served += 1
+            record = {'type': 'day', 'date': entry['day'], 't0': entry['base_ts'], 'step': entry['step']}
+            energy = {}
+            for channel, name in names.items():
+                values = entry[channel]['mean'] if channel in entry else None
+                if values is None:
+                    continue
+                record[name] = to_json_list(values)
+                # Énergie (kWh) = somme des puissances moyennes × durée d'un point
+                energy[name] = round(float(np.nansum(values)) * entry['step'] / 3600 / 1000, 3)
+                totals[name] += energy[name]
+            record['energy_kwh'] = energy
+            yield record
+        yield {'type': 'summary', 'days': len(days), 'missing_days': len(days) - served,
+               'energy_kwh': {k: round(v, 3) for k, v in totals.items()}}
+
+    def generate():
+        if output_format == 'ndjson':
+            for record in generate_records():
+                yield json.dumps(record, separators=(',', ':')) + '\n'
+        else:
+            separator = '['
+            for record in generate_records():
+                yield separator + json.dumps(record, separators=(',', ':'))
+                separator = ',\n'
+            yield ']\n'
+
+    mimetype = 'application/x-ndjson' if output_format == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/energy/cost')
+@cached_response
 def api_energy_cost():
     """
     Calcul du coût de l'énergie pour l'installation configurée
@@ -833,8 +1800,8 @@ def api_energy_cost():
     period = request.args.get('period', 'day')
     tariff = request.args.get('tariff', type=float, default=0.15)  # €/kWh par défaut
 
-    # Calculer la date de début selon la période
-    now = datetime.now()
+    # Calculer la date de début selon la période (timezone configuré, comme les autres routes)
+    now = now_tz()
     if period == 'day':
         start_time = now.strftime('%Y-%m-%d')
     elif period == 'week':
@@ -847,7 +1814,7 @@ def api_energy_cost():
         start_time = now.strftime('%Y-%m-%d')
 
     # Récupérer les données de production
-    production_data = hyxi_client.get_plant_power_statistics(Config.PLANT_ID, start_time)
+    production_data = fetch_day_statistics(start_time)
 
     # Calculer le coût si les données sont disponibles
     if not production_data.get('error'):
@@ -883,21 +1850,344 @@ def api_energy_cost():
         return jsonify(production_data)
 
 
+def default_tariff_plans():
+    """Contrats comparés par défaut : prix unique Config.TARIF_ACHAT et Tempo (tarifs de l'API)"""
+    return [
+        {'name': 'Base', 'type': 'base', 'price': Config.TARIF_ACHAT},
+        {'name': 'Tempo', 'type': 'tempo'}
+    ]
+
+
+def _analysis_params():
+    """Paramètres des analyses longues : query string fusionnée avec le corps JSON d'un POST (None si corps invalide)"""
+    body = (request.get_json(silent=True) or {}) if request.method == 'POST' else {}
+    if not isinstance(body, dict):
+        return None
+    return {**request.args.to_dict(), **body}
+
+
+def _analysis_period(params):
+    """
+    Période analysée : start, end (YYYY-MM-DD), par défaut les 365 journées closes précédentes
+
+    Returns:
+        (start, end, [jours 'YYYY-MM-DD'])
+
+    Raises:
+        ValueError: Dates invalides, période inversée ou plus longue que Config.ANALYSIS_MAX_DAYS
+    """
+    today = now_tz().date()
+    try:
+        end = datetime.strptime(params['end'], '%Y-%m-%d').date() if params.get('end') else today - timedelta(days=1)
+        start = (datetime.strptime(params['start'], '%Y-%m-%d').date() if params.get('start')
+                 else end - timedelta(days=364))
+    except (TypeError, ValueError):
+        raise ValueError('Paramètres start/end invalides (YYYY-MM-DD)')
+    end = min(end, today)
+    if start > end:
+        raise ValueError('start doit précéder end')
+    if (end - start).days + 1 > Config.ANALYSIS_MAX_DAYS:
+        raise ValueError(f'Période limitée à {Config.ANALYSIS_MAX_DAYS} jours (ANALYSIS_MAX_DAYS)')
+    days = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+    return start, end, days
+
+
+def _analysis_days(days, params, channels):
+    """
+    Journées d'une analyse longue : celles du stockage local seulement, ou, avec
+    backfill=1, après récupération en amont des journées manquantes (voir load_days)
+    Returns:
+        list: Journées lues (voir SeriesStore.get_days)
+    """
+    if _wants_backfill(params):
+        return load_days(days, channels=channels)
+    return SERIES_STORE.get_days(current_plant(), days, channels=channels)
+
+
+def _wants_backfill(params):
+    """backfill=1 : les journées absentes du stockage sont récupérées en amont"""
+    return str(params.get('backfill', '')).lower() in ('1', 'true')
+
+
+def _float_list(value, default, name):
+    """Liste de nombres : liste JSON ou valeurs séparées par des virgules (ValueError si invalide)"""
+    if value is None:
+        return list(default)
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list):
+        value = [value]
+    try:
+        return [float(item) for item in value]
+    except (TypeError, ValueError):
+        raise ValueError(f'Valeurs invalides ({name})')
+
+
+@app.route('/api/energy/tariffs', methods=['GET', 'POST'])
+def api_energy_tariffs():
+    """
+    Comparaison de contrats d'électricité sur les données 5 min du stockage local
+    - start, end : YYYY-MM-DD (défaut : les 365 journées closes précédentes)
+    - sell : prix de revente séparés par des virgules (défaut : Config.TARIF_VENTE)
+    - POST {"plans": [...], "sell_prices": [...], "start", "end"} : contrats à comparer (voir app.tariffs)
+    - backfill=1 : récupère en amont les journées absentes du stockage (défaut : journées stockées seulement)
+    """
+    params = _analysis_params()
+    if params is None:
+        return jsonify({'error': True, 'message': 'Corps JSON invalide'}), 400
+    try:
+        start, end, days = _analysis_period(params)
+        sell_prices = _float_list(params.get('sell_prices', params.get('sell')), [Config.TARIF_VENTE], 'sell')
+        plans = tariffs.parse_plans(params.get('plans') or default_tariff_plans(), sell_prices)
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+    try:
+        with tracing.span('fetch'):
+            series = _analysis_days(days, params, ('yieldPower', 'consumePower'))
+        with tracing.span('tarifs'):
+            tempo = (get_tempo_tarifs([day['day'] for day in series])
+                     if any(plan['type'] == 'tempo' for plan in plans) else None)
+        compute_start = time.perf_counter()
+        flows = tariffs.energy_flows(series, TIMEZONE)
+        comparison = tariffs.compare_plans(plans, flows, tempo)
+        compute_seconds = time.perf_counter() - compute_start
+        metrics.PROCESSING.observe(compute_seconds, step='tariffs')
+        tracing.record('compute', compute_start)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+    return jsonify({
+        'success': True,
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'plans': len(plans),
+        'missing_days': len(days) - len(series),
+        'compute_ms': round(compute_seconds * 1000, 1),
+        **comparison
+    })
+
+
+# Grille de batteries simulée par défaut
+BATTERY_CAPACITIES = (2.5, 5, 7.5, 10, 12.5, 15, 20)  # kWh utiles
+BATTERY_POWERS = (2.5, 5)  # kW
+BATTERY_EFFICIENCIES = (0.9, 0.95)  # Rendement aller-retour
+
+# Pool de simulation unique par worker, créé à la première requête (voir app.battery)
+atexit.register(battery.shutdown_pool)
+
+
+@app.route('/api/energy/battery', methods=['GET', 'POST'])
+def api_energy_battery():
+    """
+    Dimensionnement de batterie : rejoue les données 5 min du stockage local pour une grille de batteries
+    - start, end : YYYY-MM-DD (défaut : les 365 journées closes précédentes)
+    - capacities, powers, efficiencies : valeurs séparées par des virgules (kWh, kW, rendement aller-retour)
+    - sell : prix de revente du surplus (défaut : Config.TARIF_VENTE)
+    - plan : tempo (défaut) ou base ; en POST, un contrat au format de /api/energy/tariffs
+    - min_soc : état de charge minimal (fraction de la capacité, défaut 0)
+    - backfill=1 : récupère en amont les journées absentes du stockage (défaut : journées stockées seulement)
+    """
+    params = _analysis_params()
+    if params is None:
+        return jsonify({'error': True, 'message': 'Corps JSON invalide'}), 400
+    try:
+        start, end, days = _analysis_period(params)
+        capacities = _float_list(params.get('capacities'), BATTERY_CAPACITIES, 'capacities')
+        powers = _float_list(params.get('powers'), BATTERY_POWERS, 'powers')
+        efficiencies = _float_list(params.get('efficiencies'), BATTERY_EFFICIENCIES, 'efficiencies')
+        sell_price = _float_list(params.get('sell'), [Config.TARIF_VENTE], 'sell')[0]
+        min_soc = _float_list(params.get('min_soc'), [0], 'min_soc')[0]
+        plan = params.get('plan') or 'tempo'
+        if plan == 'base':
+            plan = {'name': 'Base', 'type': 'base', 'price': Config.TARIF_ACHAT}
+        elif plan == 'tempo':
+            plan = {'name': 'Tempo', 'type': 'tempo'}
+        elif not isinstance(plan, dict):
+            raise ValueError("'plan' attend tempo, base ou un contrat JSON (voir /api/energy/tariffs)")
+        plan = tariffs.parse_plans([plan], [sell_price])[0]
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    if any(capacity < 0 for capacity in capacities) or any(power <= 0 for power in powers):
+        return jsonify({'error': True, 'message': 'Capacités positives et puissances strictement positives attendues'}), 400
+    if any(not 0 < efficiency <= 1 for efficiency in efficiencies) or not 0 <= min_soc < 1:
+        return jsonify({'error': True, 'message': 'Rendements dans ]0, 1] et min_soc dans [0, 1[ attendus'}), 400
+    scenarios = battery.scenario_grid(capacities, powers, efficiencies)
+    if len(scenarios) > Config.BATTERY_MAX_SCENARIOS:
+        return jsonify({'error': True,
+                        'message': f'Trop de scénarios ({len(scenarios)} > {Config.BATTERY_MAX_SCENARIOS})'}), 400
+
+    try:
+        with tracing.span('fetch'):
+            series = _analysis_days(days, params, ('yieldPower', 'consumePower'))
+        with tracing.span('tarifs'):
+            tempo = get_tempo_tarifs([day['day'] for day in series]) if plan['type'] == 'tempo' else None
+        compute_start = time.perf_counter()
+        flows = tariffs.energy_flows(series, TIMEZONE)
+        prices = tariffs.price_matrix([plan], flows, tempo)[0]
+        simulation = battery.sweep(flows, prices, scenarios, sell_price,
+                                   workers=Config.BATTERY_WORKERS, min_soc=min_soc)
+        compute_seconds = time.perf_counter() - compute_start
+        metrics.PROCESSING.observe(compute_seconds, step='battery')
+        tracing.record('simulate', compute_start)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+    return jsonify({
+        'success': True,
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'days': len(flows['days']),
+        'missing_days': len(days) - len(flows['days']),
+        'plan': plan['name'],
+        'sell_price': sell_price,
+        'scenarios': len(scenarios),
+        'compute_ms': round(compute_seconds * 1000, 1),
+        **simulation
+    })
+
+
+@app.route('/api/energy/power')
+def api_energy_power():
+    """
+    Pointe et percentiles de puissance sur une période, par fusion des esquisses journalières
+    - start, end : YYYY-MM-DD (défaut : les 365 journées closes précédentes)
+    - channels : canaux séparés par des virgules (défaut : yieldPower,consumePower)
+    - q : rangs séparés par des virgules (défaut : 0.5,0.95,0.99)
+    - backfill=1 : récupère en amont les journées absentes du stockage (défaut : journées stockées seulement)
+    """
+    params = request.args.to_dict()
+    try:
+        start, end, days = _analysis_period(params)
+        quantiles = _float_list(params.get('q'), POWER_QUANTILES, 'q')
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    channels = params['channels'].split(',') if params.get('channels') else ['yieldPower', 'consumePower']
+    unknown = [channel for channel in channels if channel not in CHANNELS]
+    if unknown:
+        return jsonify({'error': True, 'message': f"Canaux inconnus : {', '.join(unknown)} ({', '.join(CHANNELS)})"}), 400
+    if any(not 0 <= q <= 1 for q in quantiles):
+        return jsonify({'error': True, 'message': 'Rangs q attendus entre 0 et 1'}), 400
+
+    try:
+        if _wants_backfill(params):
+            with tracing.span('fetch'):
+                ensure_days(days)
+        compute_start = time.perf_counter()
+        power = power_statistics(days, channels, quantiles)
+        metrics.PROCESSING.observe(time.perf_counter() - compute_start, step='power')
+        tracing.record('sketches', compute_start)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+    return jsonify({
+        'success': True,
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        **power
+    })
+
+
+@app.route('/api/energy/profile')
+def api_energy_profile():
+    """
+    Journée type : puissance moyenne (et percentiles) par créneau de 5 minutes sur une période
+    - start, end : YYYY-MM-DD (défaut : les 365 journées closes précédentes)
+    - channels : canaux séparés par des virgules (défaut : yieldPower,consumePower)
+    - q : percentiles séparés par des virgules (ex : 0.1,0.5,0.9 ; défaut : moyenne seule)
+    - split : weekday (semaine / week-end) et/ou tempo (couleur du jour), séparés par des virgules
+    - backfill=1 : récupère en amont les journées absentes du stockage (défaut : journées stockées seulement)
+    """
+    params = request.args.to_dict()
+    try:
+        start, end, days = _analysis_period(params)
+        quantiles = _float_list(params.get('q'), (), 'q')
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    channels = params['channels'].split(',') if params.get('channels') else ['yieldPower', 'consumePower']
+    unknown = [channel for channel in channels if channel not in CHANNELS]
+    if unknown:
+        return jsonify({'error': True, 'message': f"Canaux inconnus : {', '.join(unknown)} ({', '.join(CHANNELS)})"}), 400
+    if any(not 0 <= q <= 1 for q in quantiles):
+        return jsonify({'error': True, 'message': 'Rangs q attendus entre 0 et 1'}), 400
+    split = [item for item in params.get('split', '').split(',') if item]
+    if any(item not in day_profile.SPLITS for item in split):
+        return jsonify({'error': True, 'message': f"Découpage attendu parmi {', '.join(day_profile.SPLITS)}"}), 400
+
+    try:
+        with tracing.span('fetch'):
+            series = _analysis_days(days, params, channels)
+        dates = [day['day'] for day in series]
+        with tracing.span('tarifs'):
+            tempo = get_tempo_tarifs(dates) if 'tempo' in split else None
+        compute_start = time.perf_counter()
+        groups = day_profile.typical_day(day_profile.day_matrix(series, TIMEZONE, channels),
+                                         day_profile.day_groups(dates, split, tempo), quantiles)
+        compute_seconds = time.perf_counter() - compute_start
+        metrics.PROCESSING.observe(compute_seconds, step='profile')
+        tracing.record('compute', compute_start)
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+    return jsonify({
+        'success': True,
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        'days': len(series),
+        'missing_days': len(days) - len(series),
+        'split': split,
+        'slots': day_profile.slot_labels(),
+        'compute_ms': round(compute_seconds * 1000, 1),
+        'groups': {
+            group: {'days': entry['days'],
+                    **{channel: {stat: to_json_list(values) for stat, values in entry[channel].items()}
+                       for channel in channels}}
+            for group, entry in groups.items()
+        }
+    })
+
+
+@app.route('/api/energy/plan')
+def api_energy_plan():
+    """
+    Plan de lecture d'une plage de dates, sans l'exécuter (voir app.planner)
+    - start, end : YYYY-MM-DD (défaut : les 365 journées closes précédentes)
+    - metrics : indicateurs séparés par des virgules (energy, income, peak, curve ; défaut energy,income)
+    - accuracy : approx (défaut) ou exact ; granularity : day (défaut) ou month
+    """
+    params = request.args.to_dict()
+    try:
+        start, end, days = _analysis_period(params)
+        plan = plan_period(days, params.get('metrics', 'energy,income').split(','),
+                           params.get('accuracy', 'approx'), params.get('granularity', 'day'))
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'start_date': start.strftime('%Y-%m-%d'),
+        'end_date': end.strftime('%Y-%m-%d'),
+        **plan,
+        'explain': planner.explain(plan)
+    })
+
+
 @app.route('/api/summary')
+@cached_response
 def api_summary():
     """
     Résumé de l'installation configurée
     """
     try:
         # Récupérer les infos de l'installation
-        plant_info = hyxi_client.get_plant_info(Config.PLANT_ID)
+        plant_info = fetch_plant_info()
 
         if plant_info.get('error'):
             return jsonify(plant_info)
 
         return jsonify({
-            'plant_id': Config.PLANT_ID,
-            'plant_name': Config.PLANT_NAME,
+            'plant_id': current_plant(),
+            'plant_name': current_plant_name(),
             'plant_info': plant_info
         })
 
@@ -908,6 +2198,546 @@ def api_summary():
         })
 
 
+def plant_context(plant_id):
+    """Contexte d'exécution (contextvars) dans lequel current_plant() vaut plant_id"""
+    ctx = contextvars.copy_context()
+    ctx.run(CURRENT_PLANT.set, plant_id)
+    return ctx
+
+
+def _iter_for_plant(plant_id, iterable):
+    """Exécute chaque étape d'une réponse en streaming pour l'installation plant_id"""
+    iterator = iter(iterable)
+    try:
+        while True:
+            token = CURRENT_PLANT.set(plant_id)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                CURRENT_PLANT.reset(token)
+            yield item
+    finally:
+        if hasattr(iterator, 'close'):
+            iterator.close()
+
+
+@app.route('/api/plants')
+def api_plants():
+    """
+    Installations accessibles (découverte paginée, mise en cache)
+    - refresh=1 : relancer la découverte
+    """
+    plants = discover_plants(refresh=request.args.get('refresh') == '1')
+    return jsonify({
+        'success': True,
+        'default_plant_id': Config.PLANT_ID,
+        'count': len(plants),
+        'plants': list(plants.values()),
+        'polling': FLEET_POLLER.last_run if FLEET_POLLER else None
+    })
+
+
+@app.route('/api/plants/<plant_id>/<path:subpath>')
+def api_plant_route(plant_id, subpath):
+    """
+    Routes de /api/... appliquées à une installation donnée
+    Ex: /api/plants/<id>/energy/production?period=day équivaut à
+    /api/energy/production?period=day pour l'installation <id>.
+    """
+    if subpath.split('/')[0] in ('plants', 'fleet', 'batch', 'stream'):
+        return jsonify({'error': True, 'message': f'Route non disponible par installation: /api/{subpath}'}), 404
+    if plant_id not in discover_plants():
+        return jsonify({'error': True, 'message': f'Installation inconnue: {plant_id}'}), 404
+
+    try:
+        endpoint, view_args = app.url_map.bind('localhost').match(f'/api/{subpath}', method='GET')
+    except HTTPException:
+        return jsonify({'error': 'Route non trouvée'}), 404
+
+    token = CURRENT_PLANT.set(plant_id)
+    try:
+        response = app.make_response(app.view_functions[endpoint](**view_args))
+    finally:
+        CURRENT_PLANT.reset(token)
+    if response.is_streamed:
+        response.response = _iter_for_plant(plant_id, response.response)
+    return response
+
+
+def _fleet_period_days(period, reference_date):
+    """
+    Dates d'une période du parc (jour, mois ou année calendaire), limitées à aujourd'hui
+    Returns:
+        list: Dates YYYY-MM-DD
+    """
+    if period == 'day':
+        start = end = reference_date
+    elif period == 'month':
+        start = reference_date.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    elif period == 'year':
+        start = reference_date.replace(month=1, day=1)
+        end = reference_date.replace(month=12, day=31)
+    else:
+        raise ValueError(f"Période inconnue: {period}")
+
+    end = min(end, now_tz().date())
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+
+def _fleet_period():
+    """
+    Paramètres period/date de la requête, validés avant toute lecture
+    Returns:
+        tuple: (period, days) ; days n'est jamais vide
+    Raises:
+        ValueError: Période inconnue, date invalide ou postérieure à aujourd'hui
+    """
+    period = request.args.get('period', 'day')
+    if period not in ('day', 'month', 'year'):
+        raise ValueError('Période invalide (day, month ou year)')
+    today = now_tz().date()
+    date_param = request.args.get('date')
+    try:
+        reference_date = datetime.strptime(date_param, '%Y-%m-%d').date() if date_param else today
+    except ValueError:
+        raise ValueError('Format de date invalide (YYYY-MM-DD)')
+    if reference_date > today:
+        raise ValueError('La date ne peut pas être postérieure à aujourd\'hui')
+    return period, _fleet_period_days(period, reference_date)
+
+
+def _fleet_query(days):
+    """
+    Indicateurs par installation sur des journées (voir _fleet_period)
+    Une seule lecture des cumuls journaliers stockés (SERIES_STORE.get_rollups)
+    puis des réductions vectorisées, sans appel amont par installation.
+    Returns:
+        tuple: (plants, metrics)
+    """
+    plants = discover_plants()
+    rollups = SERIES_STORE.get_rollups(days, plant_ids=list(plants))
+    tarifs = get_tempo_tarifs(sorted(set(rollups['day'].tolist())))
+    capacities = {plant_id: plant.get('capacity') or 0 for plant_id, plant in plants.items()}
+    metrics = fleet_metrics(rollups, tarifs, capacities, Config.RESALE_ENABLED, Config.TARIF_VENTE)
+    return plants, metrics
+
+
+def _fleet_plant_row(plants, metrics, i):
+    """Indicateurs d'une installation (ligne i de fleet_metrics) au format JSON"""
+    plant_id = str(metrics['plant_id'][i])
+    return {
+        'plantId': plant_id,
+        'plantName': (plants.get(plant_id) or {}).get('plantName', plant_id),
+        'days': int(metrics['days'][i]),
+        'production': round(float(metrics['production'][i]), 2),
+        'consumption': round(float(metrics['consumption'][i]), 2),
+        'income': round(float(metrics['income'][i]), 2),
+        'peakKw': round(float(metrics['peak_kw'][i]), 2),
+        'autoconsoRate': round(float(metrics['autoconso_rate'][i]), 1),
+        'pvPerformance': round(float(metrics['pv_performance'][i]), 1)
+    }
+
+
+@app.route('/api/fleet/summary')
+def api_fleet_summary():
+    """
+    Totaux du parc sur une période
+    - period : day (défaut), month ou year
+    - date : date de référence YYYY-MM-DD (défaut: aujourd'hui)
+    """
+    try:
+        period, days = _fleet_period()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    try:
+        plants, metrics = _fleet_query(days)
+        production = float(metrics['production'].sum())
+        consumption = float(metrics['consumption'].sum())
+        self_consumed = float(metrics['self_consumed'].sum())
+        return jsonify({
+            'success': True,
+            'period': period,
+            'start_date': days[0],
+            'end_date': days[-1],
+            'plants': len(plants),
+            'plants_with_data': int(metrics['plant_id'].size),
+            'totals': {
+                'production': round(production, 2),
+                'consumption': round(consumption, 2),
+                'buy': round(float(metrics['buy'].sum()), 2),
+                'sell': round(float(metrics['sell'].sum()), 2),
+                'self_consumed': round(self_consumed, 2),
+                'income': round(float(metrics['income'].sum()), 2),
+                'autoconso_rate': round(float(autoconso_rate(production, consumption, self_consumed,
+                                                             Config.RESALE_ENABLED)), 1)
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+
+@app.route('/api/fleet/self-consumption')
+def api_fleet_self_consumption():
+    """
+    Distribution du taux d'autoconsommation des installations du parc
+    - period, date : comme /api/fleet/summary
+    - bins : nombre de classes de l'histogramme entre 0 et 100 % (défaut: 10)
+    """
+    try:
+        period, days = _fleet_period()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    try:
+        bins = max(1, min(request.args.get('bins', type=int, default=10), 100))
+        plants, metrics = _fleet_query(days)
+        rates = metrics['autoconso_rate'][metrics['production'] > 0]
+        counts, edges = np.histogram(rates, bins=bins, range=(0, 100))
+        percentiles = np.percentile(rates, [10, 25, 50, 75, 90]) if rates.size else [0] * 5
+        return jsonify({
+            'success': True,
+            'period': period,
+            'start_date': days[0],
+            'end_date': days[-1],
+            'plants': int(rates.size),
+            'histogram': {
+                'edges': [round(float(edge), 1) for edge in edges],
+                'counts': counts.tolist()
+            },
+            'percentiles': {f"p{p}": round(float(value), 1)
+                            for p, value in zip((10, 25, 50, 75, 90), percentiles)},
+            'mean': round(float(rates.mean()), 1) if rates.size else 0
+        })
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+
+@app.route('/api/fleet/ranking')
+def api_fleet_ranking():
+    """
+    Meilleures et moins bonnes installations selon le rendement PV (pvPerformance)
+    - period, date : comme /api/fleet/summary
+    - n : nombre d'installations par classement (défaut: 10)
+    """
+    try:
+        period, days = _fleet_period()
+    except ValueError as e:
+        return jsonify({'error': True, 'message': str(e)}), 400
+    try:
+        n = max(1, request.args.get('n', type=int, default=10))
+        plants, metrics = _fleet_query(days)
+        # Installations de capacité connue uniquement (rendement non défini sinon)
+        rated = np.flatnonzero(metrics['pv_performance'] > 0)
+        order = rated[np.argsort(-metrics['pv_performance'][rated], kind='stable')]
+        return jsonify({
+            'success': True,
+            'period': period,
+            'start_date': days[0],
+            'end_date': days[-1],
+            'plants': int(order.size),
+            'top': [_fleet_plant_row(plants, metrics, i) for i in order[:n]],
+            'bottom': [_fleet_plant_row(plants, metrics, i) for i in order[::-1][:n]]
+        })
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+
+def check_leader():
+    """
+    Entre les étapes d'une collecte : LeaseLost si le bail de leader a été perdu
+    (une autre réplique interroge désormais l'amont)
+    """
+    if LEADER_LEASE is not None:
+        LEADER_LEASE.check()
+
+
+def catch_up_previous_day():
+    """
+    Rattrapage après un intervalle sans collecte (cadence nocturne, arrêt) :
+    la veille enregistrée mais non close est récupérée en entier une dernière fois
+    """
+    yesterday = (now_tz() - timedelta(days=1)).strftime('%Y-%m-%d')
+    status = SERIES_STORE.day_status(current_plant(), [yesterday]).get(yesterday)
+    if status and not status['complete']:
+        ingest_day(yesterday, refresh=True)
+
+
+def collect_stream_snapshot():
+    """
+    Collecte unique par créneau pour le flux SSE
+    Rafraîchit le cache de créneau : les requêtes REST du même créneau en profitent.
+    Returns:
+        dict: {'realtime': payload temps réel, 'points': nouveaux points du jour, 'tempo': Tempo actuel}
+    """
+    catch_up_previous_day()
+    check_leader()
+    reconcile_if_due()
+    check_leader()
+    compact_store_if_due()
+    check_leader()
+    today = now_tz().strftime('%Y-%m-%d')
+    fetch_plant_info(refresh=True)
+    stats = fetch_day_statistics(today, refresh=True)
+    tempo = fetch_tempo_now(refresh=True)
+
+    points = []
+    if not stats.get('error'):
+        stats_data = stats.get('data', {})
+        base_ts, slots = day_grid(today, TIMEZONE)
+        SERIES_STORE.put_day(current_plant(), today, base_ts, slots, stats_data, complete=False)
+        yield_power = stats_data.get('yieldPower', [])
+        consume_power = stats_data.get('consumePower', [])
+        for i, timestamp in enumerate(stats_data.get('timePoint', [])):
+            points.append({
+                't': timestamp,
+                'label': from_timestamp_tz(timestamp).strftime('%H:%M'),
+                'production': yield_power[i] if i < len(yield_power) else 0,
+                'consumption': consume_power[i] if i < len(consume_power) else 0
+            })
+
+    return {
+        'realtime': build_realtime_payload(),
+        'points': points,
+        'tempo': tempo
+    }
+
+
+# Cadence amont : chaque créneau de jour, un créneau sur POLL_NIGHT_INTERVAL la nuit
+POLL_SCHEDULE = SolarSchedule(
+    lambda date_str, plant_id: plant_context(plant_id).run(sun_times_info, date_str),
+    TIMEZONE,
+    interval=Config.STREAM_POLL_INTERVAL,
+    night_interval=Config.POLL_NIGHT_INTERVAL,
+    offset=Config.STREAM_POLL_OFFSET,
+    margin=Config.POLL_DAYLIGHT_MARGIN,
+    enabled=Config.ADAPTIVE_POLLING
+)
+
+# Plusieurs répliques/workers : un seul leader (bail sur le volume partagé) interroge l'amont
+if Config.LEADER_ELECTION:
+    LEADER_LEASE = LeaderLease(Config.COORDINATION_PATH, 'scheduler', ttl=Config.LEADER_LEASE_TTL)
+    atexit.register(LEADER_LEASE.release)
+else:
+    LEADER_LEASE = None
+
+STREAM_POLLER = SlotPoller(
+    STREAM_BROKER,
+    collect_stream_snapshot,
+    interval=Config.STREAM_POLL_INTERVAL,
+    offset=Config.STREAM_POLL_OFFSET,
+    lease=LEADER_LEASE,
+    shared=SQLiteCache(Config.COORDINATION_PATH) if LEADER_LEASE else None,
+    check_interval=Config.LEADER_LEASE_TTL / 3,
+    schedule=POLL_SCHEDULE
+)
+
+# Avec élection, le poller tourne en permanence : le leader ingère la journée en cours
+# et rafraîchit les caches à chaque créneau, même sans client SSE connecté
+if LEADER_LEASE:
+    STREAM_POLLER.start()
+
+
+def _poll_current_plant():
+    """Rattrapage de la veille, réconciliation et compaction périodiques puis ingestion de la journée en cours"""
+    catch_up_previous_day()
+    check_leader()
+    reconcile_if_due()
+    check_leader()
+    compact_store_if_due()
+    check_leader()
+    return ingest_day(now_tz().strftime('%Y-%m-%d'), True)
+
+
+def poll_plant(plant_id):
+    """Ingestion de la journée en cours d'une installation (polling du parc)"""
+    return plant_context(plant_id).run(_poll_current_plant)
+
+
+# Polling concurrent de toutes les installations découvertes (budget amont partagé)
+if Config.FLEET_POLLING:
+    FLEET_POLLER = FleetPoller(
+        lambda: list(discover_plants()),
+        poll_plant,
+        interval=Config.STREAM_POLL_INTERVAL,
+        offset=Config.STREAM_POLL_OFFSET,
+        workers=Config.FLEET_WORKERS,
+        lease=LEADER_LEASE,
+        schedule=POLL_SCHEDULE
+    )
+    FLEET_POLLER.start()
+else:
+    FLEET_POLLER = None
+
+
+def tempo_season_days(today=None):
+    """Journées de la saison Tempo en cours (du 1er septembre à aujourd'hui)"""
+    today = today or now_tz().date()
+    start = today.replace(year=today.year if today.month >= 9 else today.year - 1, month=9, day=1)
+    return [(start + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range((today - start).days + 1)]
+
+
+def _warm_month_rollups():
+    """Agrégats horaires des journées closes du mois en cours (récupérées en amont si absentes)"""
+    today = now_tz().date()
+    days = [today.replace(day=day).strftime('%Y-%m-%d') for day in range(1, today.day)]
+    if days:
+        load_days(days, level=LEVELS_BY_NAME['hour'])
+
+
+# Préchauffage du worker : ce que la première requête paierait sinon (token,
+# installations, journée en cours, saison Tempo, agrégats du mois)
+# Un seul worker préchauffe depuis l'amont, les autres depuis le cache partagé (voir app.warmup)
+WARM_UP = WarmUp(timeout=Config.WARMUP_TIMEOUT, workers=Config.WARMUP_WORKERS, shared=SHARED_CACHE)
+WARM_UP.add('token', hyxi_client.ensure_token)
+WARM_UP.add('plants', lambda: (discover_plants(), fetch_plant_info()))
+WARM_UP.add('today', lambda: (load_days([now_tz().strftime('%Y-%m-%d')]),
+                              get_sun_times(now_tz().strftime('%Y-%m-%d'))))
+WARM_UP.add('tempo_now', fetch_tempo_now)
+WARM_UP.add('tempo_season', lambda: get_tempo_tarifs(tempo_season_days()))
+WARM_UP.add('month_rollups', _warm_month_rollups)
+if not Config.WARMUP_ENABLED:
+    WARM_UP.skip()
+
+
+@app.before_request
+def start_warm_up():
+    """
+    Lance le préchauffage à la première requête si le serveur ne l'a pas fait au démarrage
+    (python -m app et Gunicorn le lancent dès le chargement du worker)
+    """
+    WARM_UP.start()
+
+
+@app.route('/api/ready')
+def api_ready():
+    """
+    Disponibilité du worker : 200 une fois le préchauffage terminé (ou sa limite
+    de temps atteinte), 503 pendant le préchauffage
+    """
+    state = WARM_UP.describe()
+    return jsonify({'success': state['ready'], **state}), 200 if state['ready'] else 503
+
+
+@app.route('/api/schedule')
+def api_schedule():
+    """
+    Calendrier de polling de l'installation : cadence actuelle et prochaine collecte
+    Les clients sans flux SSE planifient leur rafraîchissement sur next_poll.
+    """
+    try:
+        return jsonify({'success': True, **POLL_SCHEDULE.describe(plant_id=CURRENT_PLANT.get())})
+    except Exception as e:
+        return jsonify({'error': True, 'message': str(e)})
+
+
+@app.route('/api/stream')
+def api_stream():
+    """
+    Flux Server-Sent Events : realtime, points (nouveaux points 5 min), tempo (changement couleur/horaire)
+    Un client qui se reconnecte avec l'en-tête Last-Event-ID reçoit les événements manqués.
+    """
+    STREAM_POLLER.start()
+
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    return Response(
+        stream_with_context(STREAM_BROKER.listen(last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _run_batch_query(query):
+    """
+    Exécute une sous-requête du batch dans son propre contexte de requête
+    Args:
+        query: {'id', 'path', 'params'} normalisé par api_batch
+    Returns:
+        dict: {'status': code HTTP, 'data': corps JSON décodé}
+    """
+    with app.test_request_context(query['path'], method='GET', query_string=query['params']):
+        response = app.full_dispatch_request()
+    return {
+        'status': response.status_code,
+        'data': response.get_json(silent=True)
+    }
+
+
+@app.route('/api/batch', methods=['GET', 'POST'])
+def api_batch():
+    """
+    Exécute plusieurs requêtes API en une seule fois
+    - POST : {"queries": ["/api/status", {"id": "prod", "path": "/api/energy/production", "params": {"period": "day"}}]}
+    - GET  : /api/batch?q=/api/status&q=/api/tempo/now
+    Les sous-requêtes s'exécutent en parallèle et partagent les appels amont
+    communs (token, infos installation, statistiques du jour, Tempo actuel).
+    Au plus Config.BATCH_MAX_QUERIES sous-requêtes (400 au-delà).
+    """
+    if request.method == 'POST':
+        raw_queries = (request.get_json(silent=True) or {}).get('queries', [])
+    else:
+        raw_queries = request.args.getlist('q')
+
+    if not isinstance(raw_queries, list):
+        return jsonify({'error': True, 'message': "'queries' attend une liste de sous-requêtes"}), 400
+    if len(raw_queries) > Config.BATCH_MAX_QUERIES:
+        return jsonify({'error': True,
+                        'message': f'Au plus {Config.BATCH_MAX_QUERIES} sous-requêtes par batch (BATCH_MAX_QUERIES)'}), 400
+
+    queries = []
+    for raw in raw_queries:
+        if isinstance(raw, str):
+            raw = {'path': raw}
+        if not isinstance(raw, dict):
+            return jsonify({'error': True, 'message': 'Sous-requête invalide'}), 400
+
+        path, _, query_string = str(raw.get('path', '')).partition('?')
+        if not path.startswith('/api/') or path.startswith('/api/batch'):
+            return jsonify({'error': True, 'message': f'Chemin non autorisé: {path}'}), 400
+
+        params = raw.get('params') or query_string
+        query_id = str(raw.get('id', raw.get('path')))
+        if any(query['id'] == query_id for query in queries):
+            return jsonify({'error': True, 'message': f'Identifiant de sous-requête en double: {query_id} (préciser "id")'}), 400
+        queries.append({'id': query_id, 'path': path, 'params': params})
+
+    if not queries:
+        return jsonify({'error': True, 'message': 'Aucune sous-requête'}), 400
+
+    # Mémo limité à ce batch : les threads du serveur (gunicorn gthread) sont réutilisés
+    memo_token = BATCH_MEMO.set({'lock': threading.Lock(), 'futures': {}})
+    try:
+        # Le token est obtenu (ou lu en cache) une seule fois avant le lancement en parallèle ;
+        # en cas d'échec, chaque sous-requête rapporte sa propre erreur
+        try:
+            hyxi_client.ensure_token()
+        except Exception:
+            pass
+
+        futures = {
+            query['id']: BATCH_EXECUTOR.submit(contextvars.copy_context().run, _run_batch_query, query)
+            for query in queries
+        }
+
+        results = {}
+        for query_id, future in futures.items():
+            try:
+                results[query_id] = future.result()
+            except Exception as e:
+                results[query_id] = {'status': 500, 'data': {'error': True, 'message': str(e)}}
+    finally:
+        BATCH_MEMO.reset(memo_token)
+
+    # Compression gzip/brotli assurée par compress_response
+    return jsonify({'success': True, 'results': results})
+
+
 @app.errorhandler(404)
 def not_found(error):
     """Gestion des erreurs 404"""
@@ -919,18 +2749,3 @@ def internal_error(error):
     """Gestion des erreurs 500"""
     return jsonify({'error': 'Erreur serveur interne'}), 500
 
-
-if __name__ == '__main__':
-    print("=" * 50)
-    print("Hyxi Solar Monitor - Démarrage du serveur")
-    print("=" * 50)
-    print(f"URL: http://{Config.HOST}:{Config.PORT}")
-    print(f"Mode debug: {Config.DEBUG}")
-    print(f"API Hyxi: {Config.HYXI_API_BASE_URL}")
-    print("=" * 50)
-
-    app.run(
-        host=Config.HOST,
-        port=Config.PORT,
-        debug=Config.DEBUG
-    )
@@ -0,0 +1,112 @@
+"""
+Esquisses de quantiles fusionnables pour les puissances (W)
+Chaque valeur est rangée dans un seau logarithmique (seaux de largeur
+relative constante, à la manière de DDSketch) : un quantile est estimé à
+RELATIVE_ACCURACY près, et deux esquisses se fusionnent en additionnant les
+effectifs de leurs seaux. Les cumuls journaliers du stockage local conservent
+une esquisse par canal : percentiles et pointe d'une période quelconque
+s'obtiennent en fusionnant les esquisses journalières, sans relire les
+données 5 min.
+
+Les valeurs inférieures à ZERO_THRESHOLD (nuit, onduleur à l'arrêt, bruit
+négatif) sont comptées à part ; le minimum et le maximum exacts sont
+conservés.
+"""
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Précision relative des quantiles (1 %)
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# En dessous (W), une valeur est comptée comme nulle
+ZERO_THRESHOLD = 1.0
+
+
+class PowerSketch:
+    """Histogramme logarithmique creux : seaux, effectifs, valeurs nulles, min/max exacts"""
+
+    def __init__(self, keys: Optional[np.ndarray] = None, counts: Optional[np.ndarray] = None,
+                 zeros: int = 0, vmin: float = math.nan, vmax: float = math.nan):
+        """
+        Args:
+            keys: Indices des seaux non vides, croissants (int16)
+            counts: Effectifs correspondants
+            zeros: Valeurs sous ZERO_THRESHOLD
+            vmin, vmax: Extrêmes exacts (NaN si vide)
+        """
+        self.keys = keys if keys is not None else np.array([], dtype=np.int16)
+        self.counts = counts if counts is not None else np.array([], dtype=np.uint32)
+        self.zeros = int(zeros)
+        self.min = vmin
+        self.max = vmax
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> 'PowerSketch':
+        """Esquisse d'une série (NaN ignorés)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return cls()
+        positive = values[values >= ZERO_THRESHOLD]
+        keys, counts = np.unique(np.ceil(np.log(positive) / _LOG_GAMMA).astype(np.int16), return_counts=True)
+        return cls(keys, counts.astype(np.uint32), values.size - positive.size,
+                   float(values.min()), float(values.max()))
+
+    @classmethod
+    def merge(cls, sketches: Iterable['PowerSketch']) -> 'PowerSketch':
+        """Fusion de plusieurs esquisses (effectifs des seaux additionnés)"""
+        sketches = [sketch for sketch in sketches if sketch.count]
+        if not sketches:
+            return cls()
+        keys = np.concatenate([sketch.keys for sketch in sketches]).astype(np.int64)
+        counts = np.concatenate([sketch.counts for sketch in sketches])
+        if keys.size:
+            offset = keys.min()
+            totals = np.bincount(keys - offset, weights=counts)
+            present = np.flatnonzero(totals)
+            keys, counts = present + offset, totals[present]
+        return cls(keys.astype(np.int16), counts.astype(np.uint32), sum(sketch.zeros for sketch in sketches),
+                   min(sketch.min for sketch in sketches), max(sketch.max for sketch in sketches))
+
+    @property
+    def count(self) -> int:
+        return self.zeros + int(self.counts.sum())
+
+    def quantile(self, q: float, nonzero: bool = False) -> Optional[float]:
+        """
+        Quantile estimé (à RELATIVE_ACCURACY près)
+
+        Args:
+            q: Rang entre 0 et 1
+            nonzero: Ignorer les valeurs nulles (ex : production hors nuit)
+
+        Returns:
+            Valeur estimée, None si l'esquisse est vide
+        """
+        zeros = 0 if nonzero else self.zeros
+        total = zeros + int(self.counts.sum())
+        if not total:
+            return None
+        rank = q * (total - 1)
+        if rank < zeros:
+            return 0.0
+        cumulative = zeros + np.cumsum(self.counts, dtype=np.int64)
+        key = int(self.keys[min(np.searchsorted(cumulative, rank, side='right'), self.keys.size - 1)])
+        # Milieu (relatif) du seau ]GAMMA^(k-1), GAMMA^k], borné par les extrêmes exacts
+        value = 2 * GAMMA ** key / (GAMMA + 1)
+        return float(min(max(value, self.min), self.max))
+
+    def to_row(self) -> tuple:
+        """(keys, counts, zeros, min, max) pour le stockage (blobs little-endian)"""
+        return (self.keys.astype('<i2').tobytes(), self.counts.astype('<u4').tobytes(), self.zeros,
+                None if math.isnan(self.min) else self.min, None if math.isnan(self.max) else self.max)
+
+    @classmethod
+    def from_row(cls, keys: bytes, counts: bytes, zeros: int, vmin: Optional[float],
+                 vmax: Optional[float]) -> 'PowerSketch':
+        return cls(np.frombuffer(keys, dtype='<i2'), np.frombuffer(counts, dtype='<u4'), zeros,
+                   math.nan if vmin is None else vmin, math.nan if vmax is None else vmax)
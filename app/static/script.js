@@ -1,7 +1,10 @@
 // Configuration et état global
 let currentPlantId = null;
 let currentPlantName = null;
-let refreshInterval = null;
+let refreshTimer = null;
+let eventSource = null;
+let realtimeCursor = null;     // Timestamp de la dernière mesure temps réel affichée
+let energyChartState = null;   // {key: vue affichée, cursor: timestamp du dernier point}
 
 // Initialisation au chargement de la page
 document.addEventListener('DOMContentLoaded', function () {
@@ -15,37 +18,160 @@ document.addEventListener('DOMContentLoaded', function () {
         dateSelect.max = today.toISOString().split('T')[0]; // Limite à aujourd'hui
     }
 
-    // Vérifier le statut de l'API
-    checkAPIStatus();
+    // Charger statut, Tempo, configuration et données en une seule requête
+    loadDashboard(true);
 
-    // Charger les informations Tempo
-    loadTempoInfo();
-    loadTempoTomorrow();
+    // Recevoir les mises à jour poussées par le serveur (SSE)
+    startEventStream();
 
-    // Charger la configuration (PLANT_ID)
-    loadConfig();
+    // Rafraîchissement automatique calé sur le calendrier de polling du serveur
+    // (chaque créneau de 5 min en journée, cadence réduite la nuit)
+    scheduleRefresh(null);
+});
+
+// Planifier le prochain rafraîchissement (schedule: réponse de /api/schedule, null = 301 s)
+function scheduleRefresh(schedule) {
+    const fallbackDelay = 301000;
+    let delay = fallbackDelay;
+    if (schedule && schedule.success && schedule.next_poll) {
+        // Une seconde après la collecte du serveur, au moins 30 s d'écart
+        delay = Math.max(schedule.next_poll * 1000 - Date.now() + 1000, 30000);
+    }
+
+    clearTimeout(refreshTimer);
+    refreshTimer = setTimeout(() => {
+        // Si le flux SSE est actif, seul Tempo demain (non poussé) est rafraîchi
+        if (eventSource && eventSource.readyState === EventSource.OPEN) {
+            loadTempoTomorrow();
+            fetch('/api/schedule')
+                .then(response => response.json())
+                .then(scheduleRefresh)
+                .catch(() => scheduleRefresh(null));
+        } else {
+            loadDashboard(false);
+        }
+    }, delay);
+}
+
+// Ouvrir le flux Server-Sent Events (reconnexion et rejeu Last-Event-ID gérés par le navigateur)
+function startEventStream() {
+    if (!window.EventSource) {
+        return;
+    }
 
-    // Rafraîchissement automatique toutes les 301 secondes
-    refreshInterval = setInterval(() => {
+    eventSource = new EventSource('/api/stream');
+
+    eventSource.addEventListener('realtime', (event) => {
         if (currentPlantId) {
+            loadRealtimeData(JSON.parse(event.data));
+        }
+    });
+
+    eventSource.addEventListener('points', () => {
+        // Nouveaux points 5 min : rafraîchir la vue du jour en cours
+        if (currentPlantId && isTodayDayView()) {
+            loadEnergyProduction();
+            loadEnergyCost();
+        }
+    });
+
+    eventSource.addEventListener('tempo', (event) => {
+        loadTempoInfo(JSON.parse(event.data));
+    });
+
+    eventSource.addEventListener('reset', () => {
+        // Historique expiré côté serveur : recharger l'état complet
+        loadDashboard(false);
+    });
+
+    eventSource.onerror = (error) => {
+        console.warn('Flux SSE interrompu, reconnexion automatique...', error);
+    };
+}
+
+// La vue affichée est-elle la journée en cours ?
+function isTodayDayView() {
+    const period = document.getElementById('periodSelect').value;
+    const dateSelect = document.getElementById('dateSelect');
+    const today = new Date().toISOString().split('T')[0];
+    return period === 'day' && (!dateSelect || !dateSelect.value || dateSelect.value === today);
+}
+
+// Charger toutes les données du dashboard via l'endpoint batch
+// initial = true : inclut le statut API et la configuration
+async function loadDashboard(initial) {
+    const period = document.getElementById('periodSelect').value;
+    const tariff = parseFloat(document.getElementById('tariffInput').value) || 0.15;
+
+    const queries = [
+        { id: 'tempoNow', path: '/api/tempo/now' },
+        { id: 'tempoTomorrow', path: '/api/tempo/tomorrow' },
+        { id: 'schedule', path: '/api/schedule' }
+    ];
+    if (initial) {
+        queries.push({ id: 'status', path: '/api/status' });
+        queries.push({ id: 'config', path: '/api/config' });
+    }
+    if (initial || currentPlantId) {
+        queries.push({ id: 'realtime', path: '/api/plant/realtime', params: realtimeParams() });
+        queries.push({ id: 'production', path: '/api/energy/production', params: energyProductionParams() });
+        queries.push({ id: 'cost', path: '/api/energy/cost', params: { period: period, tariff: tariff } });
+    }
+
+    let results;
+    try {
+        const response = await fetch('/api/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ queries: queries })
+        });
+        const batch = await response.json();
+        results = batch.results || {};
+    } catch (error) {
+        // Repli sur les requêtes individuelles si le batch échoue
+        console.error('Erreur batch, chargement individuel:', error);
+        if (initial) {
+            checkAPIStatus();
+            loadConfig();
+        } else if (currentPlantId) {
             loadRealtimeData();
             loadEnergyProduction();
             loadEnergyCost();
         }
-        // Rafraîchir Tempo toutes les 301 sec aussi
         loadTempoInfo();
         loadTempoTomorrow();
-    }, 301000);
-});
+        if (!initial) {
+            scheduleRefresh(null);
+        }
+        return;
+    }
+
+    const dataOf = (id) => (results[id] && results[id].data) || { error: true, message: 'Réponse manquante' };
+
+    if (initial) {
+        checkAPIStatus(dataOf('status'));
+        const config = dataOf('config');
+        currentPlantName = config.plant_name;
+        currentPlantId = true; // Juste pour indiquer que c'est configuré
+        console.log(`Configuration chargée: ${currentPlantName}`);
+    }
+    loadTempoInfo(dataOf('tempoNow'));
+    loadTempoTomorrow(dataOf('tempoTomorrow'));
+    scheduleRefresh(dataOf('schedule'));
+    if (results.realtime) {
+        loadRealtimeData(dataOf('realtime'));
+        loadEnergyProduction(dataOf('production'));
+        loadEnergyCost(dataOf('cost'));
+    }
+}
 
-// Vérifier le statut de l'API
-async function checkAPIStatus() {
+// Vérifier le statut de l'API (preloaded : réponse déjà obtenue via le batch)
+async function checkAPIStatus(preloaded) {
     const statusDot = document.getElementById('statusDot');
     const statusText = document.getElementById('statusText');
 
     try {
-        const response = await fetch('/api/status');
-        const data = await response.json();
+        const data = preloaded || await (await fetch('/api/status')).json();
 
         if (data.error) {
             statusDot.className = 'status-dot error';
@@ -63,15 +189,14 @@ async function checkAPIStatus() {
 }
 
 // Charger les informations Tempo
-async function loadTempoInfo() {
+async function loadTempoInfo(preloaded) {
     const badge = document.getElementById('tempoBadge');
     const emoji = document.getElementById('tempoEmoji');
     const text = document.getElementById('tempoText');
     const tarif = document.getElementById('tempoTarif');
 
     try {
-        const response = await fetch('/api/tempo/now');
-        const data = await response.json();
+        const data = preloaded || await (await fetch('/api/tempo/now')).json();
 
         if (data.success) {
             // Mettre à jour l'emoji et le texte
@@ -97,15 +222,14 @@ async function loadTempoInfo() {
 }
 
 // Charger les informations Tempo de demain
-async function loadTempoTomorrow() {
+async function loadTempoTomorrow(preloaded) {
     const badge = document.getElementById('tempoTomorrowBadge');
     const emoji = document.getElementById('tempoTomorrowEmoji');
     const text = document.getElementById('tempoTomorrowText');
     const tarif = document.getElementById('tempoTomorrowTarif');
 
     try {
-        const response = await fetch('/api/tempo/tomorrow');
-        const data = await response.json();
+        const data = preloaded || await (await fetch('/api/tempo/tomorrow')).json();
 
         if (data.success) {
             // Mettre à jour l'emoji et le texte
@@ -152,18 +276,29 @@ async function loadConfig() {
 }
 
 // Charger les données en temps réel
-async function loadRealtimeData() {
+// Paramètres de /api/plant/realtime (since : ne rien renvoyer si pas de nouvelle mesure)
+function realtimeParams() {
+    return realtimeCursor !== null ? { since: realtimeCursor } : {};
+}
+
+async function loadRealtimeData(preloaded) {
     const container = document.getElementById('realtimeData');
 
     try {
-        const response = await fetch('/api/plant/realtime');
-        const data = await response.json();
+        const url = '/api/plant/realtime?' + new URLSearchParams(realtimeParams());
+        const data = preloaded || await (await fetch(url)).json();
 
         if (data.error) {
             container.innerHTML = `<div class="error-message">Erreur: ${data.message || 'Impossible de charger les données en temps réel'}</div>`;
             return;
         }
 
+        // Aucune nouvelle mesure depuis le dernier affichage
+        if (data.changed === false) {
+            return;
+        }
+        realtimeCursor = data.cursor ?? null;
+
         // Extraire les données
         const realtimeData = data.data || {};
 
@@ -399,21 +534,127 @@ let energyChart = null;
 let autoconsoChart = null;
 let yieldChart = null;
 
-// Charger la production d'énergie avec graphique
-async function loadEnergyProduction() {
-    const summaryContainer = document.getElementById('energySummary');
+// Identifiant de la vue de production affichée (période + date)
+function energyViewKey() {
+    const period = document.getElementById('periodSelect').value;
+    const dateSelect = document.getElementById('dateSelect');
+    const resolutionSelect = document.getElementById('resolutionSelect');
+    return `${period}|${dateSelect ? dateSelect.value : ''}|${resolutionSelect ? resolutionSelect.value : ''}`;
+}
+
+// Paramètres de /api/energy/production
+// Vue jour déjà affichée : since = curseur pour ne recevoir que les nouveaux points
+function energyProductionParams() {
     const period = document.getElementById('periodSelect').value;
     const dateSelect = document.getElementById('dateSelect');
     const selectedDate = dateSelect ? dateSelect.value : null;
 
-    try {
-        let url = `/api/energy/production?period=${period}`;
-        if (selectedDate) {
-            url += `&date=${selectedDate}`;
+    // Forme compacte de chart_data (décodée par unpackChartData)
+    const params = { period: period, encoding: 'i16' };
+    if (selectedDate) {
+        params.date = selectedDate;
+    }
+
+    // Courbe de puissance : au plus un point par pixel du graphique
+    const resolutionSelect = document.getElementById('resolutionSelect');
+    if (resolutionSelect && resolutionSelect.value) {
+        const canvas = document.getElementById('energyChart');
+        params.resolution = resolutionSelect.value;
+        params.max_points = (canvas && canvas.clientWidth) || 1000;
+        return params;
+    }
+
+    if (period === 'day' && energyChart && energyChartState
+        && energyChartState.key === energyViewKey() && energyChartState.cursor != null) {
+        params.since = energyChartState.cursor;
+    }
+    return params;
+}
+
+// Décoder une chaîne base64 en ArrayBuffer
+function decodeBase64(data) {
+    const binary = atob(data);
+    const bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+        bytes[i] = binary.charCodeAt(i);
+    }
+    return bytes.buffer;
+}
+
+// Reconstituer chart_data à partir de sa forme compacte (voir app/packing.py)
+// - horodatages : base_ts + i * step, ou base_ts + offsets[i]
+// - séries : float32 ('f32') ou int16 delta-encodés ('i16d', -32768 = point absent)
+function unpackChartData(chartData) {
+    if (!chartData || !chartData.packed) {
+        return chartData;
+    }
+
+    const packedKeys = ['packed', 'count', 'base_ts', 'step', 'offsets', 'series', 'timezone', 'label_format', 'labels'];
+    const result = {};
+    Object.keys(chartData).forEach(key => {
+        if (!packedKeys.includes(key)) {
+            result[key] = chartData[key];
         }
+    });
 
-        const response = await fetch(url);
-        const data = await response.json();
+    const count = chartData.count;
+    if (chartData.labels) {
+        result.labels = chartData.labels;
+    } else {
+        const offsets = chartData.offsets ? new Int32Array(decodeBase64(chartData.offsets.data)) : null;
+        const timestamps = new Array(count);
+        for (let i = 0; i < count; i++) {
+            timestamps[i] = chartData.base_ts + (offsets ? offsets[i] : i * chartData.step);
+        }
+        result.timestamps = timestamps;
+        if (chartData.step) {
+            result.step = chartData.step;
+        }
+
+        const formats = {
+            time: { hour: '2-digit', minute: '2-digit' },
+            date: { day: '2-digit', month: '2-digit' },
+            datetime: { day: '2-digit', month: '2-digit', hour: '2-digit', minute: '2-digit' }
+        };
+        const formatter = new Intl.DateTimeFormat('fr-FR', {
+            ...formats[chartData.label_format || 'time'],
+            timeZone: chartData.timezone || undefined
+        });
+        result.labels = timestamps.map(ts => formatter.format(new Date(ts * 1000)));
+    }
+
+    Object.entries(chartData.series || {}).forEach(([name, series]) => {
+        const buffer = decodeBase64(series.data);
+        if (series.dtype === 'f32') {
+            result[name] = Array.from(new Float32Array(buffer), v => (Number.isNaN(v) ? null : v));
+            return;
+        }
+
+        // int16 delta : cumul des écarts depuis la dernière valeur présente
+        const deltas = new Int16Array(buffer);
+        const decimals = Math.max(0, -Math.floor(Math.log10(series.scale)));
+        const values = new Array(deltas.length);
+        let current = 0;
+        for (let i = 0; i < deltas.length; i++) {
+            if (deltas[i] === -32768) {
+                values[i] = null;
+            } else {
+                current += deltas[i];
+                values[i] = decimals ? +(current * series.scale).toFixed(decimals) : current * series.scale;
+            }
+        }
+        result[name] = values;
+    });
+    return result;
+}
+
+// Charger la production d'énergie avec graphique
+async function loadEnergyProduction(preloaded) {
+    const summaryContainer = document.getElementById('energySummary');
+
+    try {
+        const url = '/api/energy/production?' + new URLSearchParams(energyProductionParams());
+        const data = preloaded || await (await fetch(url)).json();
 
         if (data.error) {
             summaryContainer.innerHTML = `<div class="error-message">Erreur: ${data.message || 'Impossible de charger les données de production'}</div>`;
@@ -422,7 +663,7 @@ async function loadEnergyProduction() {
 
         // Extraire les données calculées
         const productionData = data.data || {};
-        const chartData = data.chart_data || {};
+        const chartData = unpackChartData(data.chart_data || {});
         const energy = productionData.energy || 0;
         const consumption = productionData.consumption || 0;
         const buy = productionData.buy || 0;
@@ -476,11 +717,17 @@ async function loadEnergyProduction() {
             </div>
         `;
 
-        // Mettre à jour le badge Tempo de la date sélectionnée
-        updateSelectedDateTempo(chartData);
+        if (data.delta && energyChart) {
+            // Delta : ajouter les nouveaux points au graphique existant
+            patchEnergyChart(chartData);
+        } else {
+            // Mettre à jour le badge Tempo de la date sélectionnée
+            updateSelectedDateTempo(chartData);
 
-        // Créer le graphique
-        createEnergyChart(chartData);
+            // Créer le graphique
+            createEnergyChart(chartData);
+        }
+        energyChartState = { key: energyViewKey(), cursor: data.cursor ?? null };
 
         console.log('Données production:', data);
 
@@ -538,6 +785,34 @@ function updateSelectedDateTempo(chartData) {
     }
 }
 
+// Ajouter des points au graphique de production sans le recréer
+function patchEnergyChart(chartData) {
+    const labels = chartData.labels || [];
+    if (labels.length === 0) {
+        return;
+    }
+
+    const production = chartData.production || [];
+    const consumption = chartData.consumption || [];
+
+    energyChart.data.labels.push(...labels);
+    energyChart.data.datasets[0].data.push(...consumption);   // Consommation
+    energyChart.data.datasets[1].data.push(...production);    // Production
+
+    // Étendre la zone Tempo du dernier jour et la hauteur des zones si nouveau maximum
+    const annotations = energyChart.options.plugins.annotation.annotations;
+    const zoneKeys = Object.keys(annotations);
+    const maxValue = Math.max(...energyChart.data.datasets[0].data, ...energyChart.data.datasets[1].data, 100);
+    zoneKeys.forEach((key) => {
+        annotations[key].yMax = maxValue * 1.1;
+    });
+    if (zoneKeys.length > 0) {
+        annotations[zoneKeys[zoneKeys.length - 1]].xMax = energyChart.data.labels.length - 1 + 0.5;
+    }
+
+    energyChart.update('none');
+}
+
 // Créer le graphique de production d'énergie avec courbes et aires
 function createEnergyChart(chartData) {
     const ctx = document.getElementById('energyChart');
@@ -558,7 +833,7 @@ function createEnergyChart(chartData) {
     const tempoZones = chartData.tempo_zones || [];
 
     // Calculer le maximum pour l'échelle Y
-    const maxValue = Math.max(...production, ...consumption, 100);
+    const maxValue = Math.max(...production, ...consumption, ...(chartData.production_max || []), 100);
 
     // Créer les annotations pour les zones Tempo
     const annotations = {};
@@ -577,9 +852,14 @@ function createEnergyChart(chartData) {
         // Grouper les labels par date pour créer des zones
         const labelsByDate = {};
 
+        if (tempoZones[0].start_index !== undefined) {
+            // Courbe de puissance : le serveur fournit les indices de chaque zone
+            tempoZones.forEach((zone) => {
+                labelsByDate[zone.date] = [zone.start_index, zone.end_index];
+            });
         // Si on a une seule zone Tempo et des labels sans date (format HH:MM), 
         // c'est probablement une vue journée - associer tous les labels à cette date
-        if (tempoZones.length === 1 && labels.length > 0 && !labels[0].includes(' ') && !labels[0].includes('-')) {
+        } else if (tempoZones.length === 1 && labels.length > 0 && !labels[0].includes(' ') && !labels[0].includes('-')) {
             // Vue journée : labels = ["00:00", "00:05", ...]
             const dateStr = tempoZones[0].date;
             labelsByDate[dateStr] = labels.map((_, idx) => idx);
@@ -687,7 +967,19 @@ function createEnergyChart(chartData) {
                     tension: 0.4,
                     pointRadius: 0,
                     pointHoverRadius: 4
-                }
+                },
+                ...(chartData.production_max ? [{
+                    // Courbe de puissance sous-échantillonnée : enveloppe des pics de production
+                    label: 'Production max (W)',
+                    data: chartData.production_max,
+                    borderColor: 'rgba(16, 185, 129, 0.6)',
+                    borderWidth: 1,
+                    borderDash: [4, 3],
+                    fill: false,
+                    tension: 0,
+                    pointRadius: 0,
+                    pointHoverRadius: 3
+                }] : [])
             ]
         },
         options: {
@@ -762,15 +1054,14 @@ function createEnergyChart(chartData) {
 
 
 // Charger le calcul de coût
-async function loadEnergyCost() {
+async function loadEnergyCost(preloaded) {
     const container = document.getElementById('costData');
     const period = document.getElementById('periodSelect').value;
     const tariff = parseFloat(document.getElementById('tariffInput').value) || 0.15;
 
     try {
         const url = `/api/energy/cost?period=${period}&tariff=${tariff}`;
-        const response = await fetch(url);
-        const data = await response.json();
+        const data = preloaded || await (await fetch(url)).json();
 
         if (data.error) {
             container.innerHTML = `<div class="error-message">Erreur: ${data.message || 'Impossible de calculer le coût'}</div>`;
@@ -848,7 +1139,8 @@ function toggleRawData() {
 
 // Nettoyage à la fermeture de la page
 window.addEventListener('beforeunload', function () {
-    if (refreshInterval) {
-        clearInterval(refreshInterval);
+    clearTimeout(refreshTimer);
+    if (eventSource) {
+        eventSource.close();
     }
 });
@@ -0,0 +1,652 @@
+"""
+Stockage local des séries 5 minutes (SQLite)
+Chaque journée est rangée sur une grille fixe de créneaux de 5 min (NaN si
+mesure absente), accompagnée d'une pyramide précalculée min/max/moyenne
+(15 min, 1 h, journée) pour servir les graphiques longue durée sans
+re-parcourir les données 5 min. Les journées anciennes sont compactées
+(voir compact) : seuls les niveaux 15 min puis horaire sont conservés, et les
+lectures se replient sur le niveau le plus fin restant. Une empreinte du contenu amont de chaque
+canal permet de détecter les révisions a posteriori (voir merge_day).
+Le cumul journalier conserve aussi une esquisse de quantiles de chaque canal
+(voir app.sketch) : percentiles et pointe de puissance d'une période se
+calculent en fusionnant les esquisses, même après compaction.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.sketch import PowerSketch
+
+SLOT_SECONDS = 300
+
+# Canaux de puissance (W) renvoyés par queryPlantPowerStatistics
+CHANNELS = ('yieldPower', 'consumePower', 'buyPower', 'sellPower', 'chargedPower', 'dischargedPower')
+
+# Niveaux de la pyramide : nom -> nombre de créneaux 5 min par point (0 = journée entière)
+LEVELS = {'5min': 1, '15min': 3, 'hour': 12, 'day': 0}
+
+# Rang de chaque niveau, du plus fin au plus grossier
+LEVEL_RANK = {1: 0, 3: 1, 12: 2, 0: 3}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS day_series (
+    plant_id   TEXT    NOT NULL,
+    day        TEXT    NOT NULL,
+    base_ts    INTEGER NOT NULL,
+    slots      INTEGER NOT NULL,
+    complete   INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL    NOT NULL,
+    resolution INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (plant_id, day)
+);
+CREATE INDEX IF NOT EXISTS day_series_day ON day_series (day);
+CREATE TABLE IF NOT EXISTS day_rollup (
+    plant_id         TEXT    NOT NULL,
+    day              TEXT    NOT NULL,
+    production       REAL    NOT NULL,
+    consumption      REAL    NOT NULL,
+    buy              REAL    NOT NULL,
+    sell             REAL    NOT NULL,
+    self_consumed    REAL    NOT NULL,
+    surplus          REAL    NOT NULL,
+    production_hp    REAL    NOT NULL,
+    self_consumed_hp REAL    NOT NULL,
+    peak_w           REAL    NOT NULL,
+    productive_slots INTEGER NOT NULL,
+    PRIMARY KEY (plant_id, day)
+);
+CREATE INDEX IF NOT EXISTS day_rollup_day ON day_rollup (day);
+CREATE TABLE IF NOT EXISTS day_sketch (
+    plant_id TEXT    NOT NULL,
+    day      TEXT    NOT NULL,
+    channel  TEXT    NOT NULL,
+    keys     BLOB    NOT NULL,
+    counts   BLOB    NOT NULL,
+    zeros    INTEGER NOT NULL,
+    min      REAL,
+    max      REAL,
+    PRIMARY KEY (plant_id, day, channel)
+);
+CREATE TABLE IF NOT EXISTS day_hash (
+    plant_id TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    channel  TEXT NOT NULL,
+    hash     TEXT NOT NULL,
+    PRIMARY KEY (plant_id, day, channel)
+);
+CREATE TABLE IF NOT EXISTS day_level (
+    plant_id TEXT    NOT NULL,
+    day      TEXT    NOT NULL,
+    channel  TEXT    NOT NULL,
+    level    INTEGER NOT NULL,
+    mean     BLOB    NOT NULL,
+    min      BLOB,
+    max      BLOB,
+    PRIMARY KEY (plant_id, day, channel, level)
+);
+"""
+
+
+def day_grid(date_str: str, tz) -> tuple:
+    """
+    Grille 5 min d'une journée locale
+
+    Args:
+        date_str: Date au format YYYY-MM-DD
+        tz: Timezone pytz de l'installation
+
+    Returns:
+        (base_ts, slots) : timestamp de minuit local et nombre de créneaux
+        (288, ou 276/300 les jours de changement d'heure)
+    """
+    day = datetime.strptime(date_str, '%Y-%m-%d')
+    start = tz.localize(day)
+    end = tz.localize(day + timedelta(days=1))
+    base_ts = int(start.timestamp())
+    return base_ts, (int(end.timestamp()) - base_ts) // SLOT_SECONDS
+
+
+# Colonnes du cumul journalier (énergies en kWh)
+ROLLUP_COLUMNS = ('production', 'consumption', 'buy', 'sell', 'self_consumed', 'surplus',
+                  'production_hp', 'self_consumed_hp', 'peak_w', 'productive_slots')
+
+# Heures pleines Tempo : 6h-22h (heure locale)
+HP_START, HP_END = 6, 22
+
+
+def hp_mask(base_ts: int, slots: int, tz) -> np.ndarray:
+    """Créneaux d'une journée situés en heures pleines (heure locale, changements d'heure compris)"""
+    offsets = {}
+    hours = np.empty(slots, dtype=np.int64)
+    for i in range(slots):
+        ts = base_ts + i * SLOT_SECONDS
+        # Décalage UTC constant par heure : une conversion par heure suffit
+        hour_key = ts // 3600
+        if hour_key not in offsets:
+            offsets[hour_key] = datetime.fromtimestamp(ts, tz).hour
+        hours[i] = offsets[hour_key]
+    return (hours >= HP_START) & (hours < HP_END)
+
+
+def compute_rollup(grids: Dict[str, np.ndarray], hp: np.ndarray) -> tuple:
+    """
+    Cumul journalier d'une installation à partir de ses grilles 5 min (W)
+
+    Args:
+        grids: {canal: grille 5 min, NaN si absent}
+        hp: Masque des créneaux en heures pleines
+
+    Returns:
+        Valeurs dans l'ordre de ROLLUP_COLUMNS (énergies en kWh)
+    """
+    to_kwh = SLOT_SECONDS / 3600 / 1000
+    production = np.nan_to_num(grids['yieldPower'])
+    consumption = np.nan_to_num(grids['consumePower'])
+    self_consumed = np.minimum(production, consumption)
+    return (
+        float(production.sum() * to_kwh),
+        float(consumption.sum() * to_kwh),
+        float(np.nan_to_num(grids['buyPower']).sum() * to_kwh),
+        float(np.nan_to_num(grids['sellPower']).sum() * to_kwh),
+        float(self_consumed.sum() * to_kwh),
+        float(np.maximum(production - consumption, 0).sum() * to_kwh),
+        float(production[hp].sum() * to_kwh),
+        float(self_consumed[hp].sum() * to_kwh),
+        float(production.max()) if production.size else 0.0,
+        int((production > 0).sum())
+    )
+
+
+def stats_grids(stats_data: Dict[str, Any], base_ts: int, slots: int) -> Dict[str, np.ndarray]:
+    """
+    Range une réponse queryPlantPowerStatistics sur la grille 5 min de la journée
+
+    Returns:
+        {canal: grille float64, NaN si mesure absente}
+    """
+    time_points = np.asarray(stats_data.get('timePoint', []), dtype=np.int64)
+    index = (time_points - base_ts) // SLOT_SECONDS
+    in_grid = (index >= 0) & (index < slots)
+
+    grids = {}
+    for channel in CHANNELS:
+        values = np.asarray(stats_data.get(channel, []), dtype=np.float64)
+        grid = np.full(slots, np.nan)
+        n = min(values.size, index.size)
+        mask = in_grid[:n]
+        grid[index[:n][mask]] = values[:n][mask]
+        grids[channel] = grid
+    return grids
+
+
+def grid_hash(grid: np.ndarray) -> str:
+    """Empreinte du contenu d'une grille (précision float32 du stockage, NaN normalisés)"""
+    values = grid.astype(np.float32)
+    values[np.isnan(values)] = np.nan
+    return hashlib.blake2b(values.tobytes(), digest_size=16).hexdigest()
+
+
+def _pack(values: np.ndarray) -> bytes:
+    return np.ascontiguousarray(values, dtype=np.float32).tobytes()
+
+
+def _unpack(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    return np.frombuffer(blob, dtype=np.float32) if blob is not None else None
+
+
+def build_levels(grid: np.ndarray, finest: int = 1, energy: bool = False) -> Dict[int, tuple]:
+    """
+    Calcule la pyramide d'un canal à partir de sa grille 5 min
+
+    Args:
+        grid: Valeurs 5 min (NaN si absentes)
+        finest: Niveau le plus fin à produire (1, ou 3/12 pour une journée compactée)
+        energy: Moyenne rapportée au nombre total de créneaux (créneaux absents comptés
+            à 0) : moyenne × pas = énergie 5 min exacte, y compris pour un point incomplet
+
+    Returns:
+        {facteur: (mean, min, max)} ; min/max valent None au niveau 5 min
+    """
+    levels = {1: (grid, None, None)} if finest == 1 else {}
+    for factor in LEVELS.values():
+        if factor == 1 or LEVEL_RANK[factor] < LEVEL_RANK[finest]:
+            continue
+        size = grid.size if factor == 0 else factor
+        blocks = grid.reshape(-1, size)
+        valid = ~np.isnan(blocks)
+        count = valid.sum(axis=1)
+        total = np.where(valid, blocks, 0).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / (size if energy else np.maximum(count, 1)), np.nan)
+        vmin = np.where(count > 0, np.where(valid, blocks, np.inf).min(axis=1), np.nan)
+        vmax = np.where(count > 0, np.where(valid, blocks, -np.inf).max(axis=1), np.nan)
+        levels[factor] = (mean, vmin, vmax)
+    return levels
+
+
+class SeriesStore:
+    """Séries 5 min et pyramides par installation et par jour"""
+
+    def __init__(self, path: str, tz=None):
+        """
+        Args:
+            path: Chemin du fichier SQLite (créé si nécessaire)
+            tz: Timezone pytz des installations (heures pleines des cumuls journaliers)
+        """
+        self.path = path
+        self.tz = tz
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(day_series)')}
+        if columns and 'resolution' not in columns:
+            # Stockage antérieur à la compaction : toutes les journées sont en 5 min
+            conn.execute('ALTER TABLE day_series ADD COLUMN resolution INTEGER NOT NULL DEFAULT 1')
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connexion propre au thread courant (mode WAL : lectures concurrentes)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def put_day(self, plant_id: str, date_str: str, base_ts: int, slots: int,
+                stats_data: Dict[str, Any], complete: bool):
+        """
+        Enregistre une journée renvoyée par queryPlantPowerStatistics
+
+        Args:
+            plant_id: ID du plant
+            date_str: Date YYYY-MM-DD
+            base_ts, slots: Grille de la journée (voir day_grid)
+            stats_data: Section 'data' de la réponse amont (timePoint + canaux)
+            complete: True si la journée est close (plus de nouveaux points attendus)
+        """
+        grids = stats_grids(stats_data, base_ts, slots)
+        rows = [row for channel in CHANNELS for row in self._level_rows(plant_id, date_str, channel, grids[channel])]
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO day_series (plant_id, day, base_ts, slots, complete, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (plant_id, date_str, base_ts, slots, int(complete), time.time())
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO day_level (plant_id, day, channel, level, mean, min, max) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._put_rollup(conn, plant_id, date_str, grids, base_ts, slots)
+            self._put_hashes(conn, plant_id, date_str, {channel: grid_hash(grids[channel]) for channel in CHANNELS})
+
+    def merge_day(self, plant_id: str, date_str: str, base_ts: int, slots: int,
+                  stats_data: Dict[str, Any], complete: bool) -> Dict[str, int]:
+        """
+        Réconcilie une journée stockée avec une nouvelle réponse amont
+        Seuls les canaux dont l'empreinte a changé sont comparés créneau par
+        créneau ; les créneaux révisés ou complétés sont réécrits (pyramide du
+        canal et cumul journalier recalculés), les autres restent intacts.
+
+        Returns:
+            {canal: nombre de créneaux modifiés} (vide si la journée est inchangée)
+        """
+        fresh = stats_grids(stats_data, base_ts, slots)
+        hashes = {channel: grid_hash(fresh[channel]) for channel in CHANNELS}
+        conn = self._conn()
+        known = dict(conn.execute(
+            'SELECT channel, hash FROM day_hash WHERE plant_id = ? AND day = ?', (plant_id, date_str)
+        ))
+        changed_channels = [channel for channel in CHANNELS if known.get(channel) != hashes[channel]]
+        if not changed_channels:
+            return {}
+
+        row = conn.execute(
+            'SELECT slots, resolution FROM day_series WHERE plant_id = ? AND day = ?', (plant_id, date_str)
+        ).fetchone()
+        if row is None or row[0] != slots or row[1] != 1:
+            self.put_day(plant_id, date_str, base_ts, slots, stats_data, complete)
+            return {channel: int((~np.isnan(fresh[channel])).sum()) for channel in CHANNELS}
+
+        grids = self._level1_grids(plant_id, date_str, slots)
+        changes = {}
+        rows = []
+        for channel in changed_channels:
+            stored = grids[channel]
+            candidate = fresh[channel].astype(np.float32)
+            # Point nouveau ou révisé ; un point absent en amont conserve la valeur stockée
+            revised = ~np.isnan(candidate) & ~(candidate == stored.astype(np.float32))
+            if revised.any():
+                stored[revised] = fresh[channel][revised]
+                changes[channel] = int(revised.sum())
+                rows.extend(self._level_rows(plant_id, date_str, channel, stored))
+
+        with conn:
+            if rows:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO day_level (plant_id, day, channel, level, mean, min, max) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                self._put_rollup(conn, plant_id, date_str, grids, base_ts, slots)
+            conn.execute(
+                'UPDATE day_series SET complete = MAX(complete, ?), updated_at = ? WHERE plant_id = ? AND day = ?',
+                (int(complete), time.time(), plant_id, date_str)
+            )
+            self._put_hashes(conn, plant_id, date_str, {channel: hashes[channel] for channel in changed_channels})
+        return changes
+
+    @staticmethod
+    def _level_rows(plant_id: str, date_str: str, channel: str, grid: np.ndarray) -> List[tuple]:
+        """Lignes day_level de la pyramide d'un canal"""
+        return [
+            (plant_id, date_str, channel, factor, _pack(mean),
+             _pack(vmin) if vmin is not None else None,
+             _pack(vmax) if vmax is not None else None)
+            for factor, (mean, vmin, vmax) in build_levels(grid).items()
+        ]
+
+    def _level1_grids(self, plant_id: str, date_str: str, slots: int) -> Dict[str, np.ndarray]:
+        """Grilles 5 min stockées d'une journée (float64, NaN pour un canal absent)"""
+        grids = {channel: np.full(slots, np.nan) for channel in CHANNELS}
+        for channel, mean in self._conn().execute(
+            'SELECT channel, mean FROM day_level WHERE plant_id = ? AND day = ? AND level = 1',
+            (plant_id, date_str)
+        ):
+            grids[channel] = _unpack(mean).astype(np.float64)
+        return grids
+
+    @staticmethod
+    def _put_hashes(conn: sqlite3.Connection, plant_id: str, date_str: str, hashes: Dict[str, str]):
+        """Enregistre les empreintes du contenu amont par canal"""
+        conn.executemany(
+            'INSERT OR REPLACE INTO day_hash (plant_id, day, channel, hash) VALUES (?, ?, ?, ?)',
+            [(plant_id, date_str, channel, digest) for channel, digest in hashes.items()]
+        )
+
+    def _put_rollup(self, conn: sqlite3.Connection, plant_id: str, date_str: str,
+                    grids: Dict[str, np.ndarray], base_ts: int, slots: int):
+        """Enregistre le cumul journalier (voir compute_rollup) et les esquisses de puissance des canaux"""
+        hp = hp_mask(base_ts, slots, self.tz) if self.tz is not None else np.zeros(slots, dtype=bool)
+        conn.execute(
+            f'INSERT OR REPLACE INTO day_rollup (plant_id, day, {", ".join(ROLLUP_COLUMNS)}) '
+            f'VALUES (?, ?, {", ".join("?" * len(ROLLUP_COLUMNS))})',
+            (plant_id, date_str) + compute_rollup(grids, hp)
+        )
+        self._put_sketches(conn, plant_id, date_str, {channel: PowerSketch.from_values(grid)
+                                                      for channel, grid in grids.items()})
+
+    @staticmethod
+    def _put_sketches(conn: sqlite3.Connection, plant_id: str, date_str: str, sketches: Dict[str, PowerSketch]):
+        """Enregistre les esquisses de quantiles d'une journée (voir app.sketch)"""
+        conn.executemany(
+            'INSERT OR REPLACE INTO day_sketch (plant_id, day, channel, keys, counts, zeros, min, max) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(plant_id, date_str, channel) + sketch.to_row() for channel, sketch in sketches.items()]
+        )
+
+    def _backfill_rollups(self, days: List[str]):
+        """Calcule les cumuls des journées enregistrées avant leur introduction"""
+        placeholders = ','.join('?' * len(days))
+        conn = self._conn()
+        missing = conn.execute(
+            f'SELECT s.plant_id, s.day, s.base_ts, s.slots FROM day_series s '
+            f'LEFT JOIN day_rollup r ON r.plant_id = s.plant_id AND r.day = s.day '
+            f'WHERE s.day IN ({placeholders}) AND r.day IS NULL',
+            days
+        ).fetchall()
+        for plant_id, day, base_ts, slots in missing:
+            grids = self._level1_grids(plant_id, day, slots)
+            with conn:
+                self._put_rollup(conn, plant_id, day, grids, base_ts, slots)
+
+    def _backfill_sketches(self, plant_id: str, days: List[str]):
+        """
+        Calcule les esquisses des journées enregistrées avant leur introduction
+        Une journée déjà compactée est esquissée depuis son niveau le plus fin
+        conservé (moyennes répétées sur leurs créneaux 5 min) ; ses extrêmes
+        viennent des enveloppes min/max.
+        """
+        conn = self._conn()
+        missing = conn.execute(
+            f'SELECT s.day, s.slots, s.resolution FROM day_series s '
+            f'WHERE s.plant_id = ? AND s.day IN ({",".join("?" * len(days))}) AND NOT EXISTS '
+            f'(SELECT 1 FROM day_sketch k WHERE k.plant_id = s.plant_id AND k.day = s.day)',
+            [plant_id] + days
+        ).fetchall()
+        for day, slots, resolution in missing:
+            sketches = {channel: PowerSketch() for channel in CHANNELS}
+            for channel, mean, vmin, vmax in conn.execute(
+                'SELECT channel, mean, min, max FROM day_level WHERE plant_id = ? AND day = ? AND level = ?',
+                (plant_id, day, resolution)
+            ):
+                sketch = PowerSketch.from_values(np.repeat(_unpack(mean).astype(np.float64), resolution))
+                if resolution != 1 and sketch.count:
+                    sketch.min = float(np.nanmin(_unpack(vmin)))
+                    sketch.max = float(np.nanmax(_unpack(vmax)))
+                sketches[channel] = sketch
+            with conn:
+                self._put_sketches(conn, plant_id, day, sketches)
+
+    def get_sketches(self, plant_id: str, days: Iterable[str],
+                     channels: Iterable[str] = CHANNELS) -> Dict[str, Any]:
+        """
+        Esquisses de puissance d'une période, fusionnées par canal (une ligne par jour stocké, sans relire le 5 min)
+
+        Args:
+            plant_id: ID du plant
+            days: Dates YYYY-MM-DD (jours absents du stockage ignorés)
+            channels: Canaux à fusionner
+
+        Returns:
+            {'days': [jours couverts], 'sketches': {canal: PowerSketch}}
+        """
+        days = list(days)
+        channels = list(channels)
+        if not days:
+            return {'days': [], 'sketches': {channel: PowerSketch() for channel in channels}}
+        self._backfill_sketches(plant_id, days)
+
+        per_channel: Dict[str, List[PowerSketch]] = {channel: [] for channel in channels}
+        covered = set()
+        for day, channel, keys, counts, zeros, vmin, vmax in self._conn().execute(
+            f'SELECT day, channel, keys, counts, zeros, min, max FROM day_sketch '
+            f'WHERE plant_id = ? AND day IN ({",".join("?" * len(days))}) '
+            f'AND channel IN ({",".join("?" * len(channels))})',
+            [plant_id] + days + channels
+        ):
+            covered.add(day)
+            per_channel[channel].append(PowerSketch.from_row(keys, counts, zeros, vmin, vmax))
+        return {
+            'days': sorted(covered),
+            'sketches': {channel: PowerSketch.merge(sketches) for channel, sketches in per_channel.items()}
+        }
+
+    def get_rollups(self, days: Iterable[str], plant_ids: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Cumuls journaliers de plusieurs installations, en colonnes
+
+        Args:
+            days: Dates YYYY-MM-DD
+            plant_ids: Installations (None = toutes celles du stockage)
+
+        Returns:
+            {'plant_id': ndarray[str], 'day': ndarray[str], colonne: ndarray[float]} (une ligne par installation et jour)
+        """
+        days = list(days)
+        if not days:
+            return {'plant_id': np.array([], dtype=str), 'day': np.array([], dtype=str),
+                    **{column: np.array([], dtype=np.float64) for column in ROLLUP_COLUMNS}}
+        self._backfill_rollups(days)
+
+        query = (f'SELECT plant_id, day, {", ".join(ROLLUP_COLUMNS)} FROM day_rollup '
+                 f'WHERE day IN ({",".join("?" * len(days))})')
+        params = list(days)
+        if plant_ids is not None:
+            plant_ids = list(plant_ids)
+            query += f' AND plant_id IN ({",".join("?" * len(plant_ids))})'
+            params += plant_ids
+        rows = self._conn().execute(query, params).fetchall()
+
+        result = {
+            'plant_id': np.array([row[0] for row in rows], dtype=str),
+            'day': np.array([row[1] for row in rows], dtype=str)
+        }
+        values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(ROLLUP_COLUMNS))
+        for i, column in enumerate(ROLLUP_COLUMNS):
+            result[column] = values[:, i]
+        return result
+
+    def day_status(self, plant_id: str, days: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        État des journées stockées
+
+        Returns:
+            {date_str: {'complete': bool, 'updated_at': float}} pour les jours présents
+        """
+        days = list(days)
+        if not days:
+            return {}
+        placeholders = ','.join('?' * len(days))
+        cursor = self._conn().execute(
+            f'SELECT day, complete, updated_at FROM day_series WHERE plant_id = ? AND day IN ({placeholders})',
+            [plant_id] + days
+        )
+        return {day: {'complete': bool(complete), 'updated_at': updated_at} for day, complete, updated_at in cursor}
+
+    def get_days(self, plant_id: str, days: Iterable[str], level: int = 1,
+                 channels: Iterable[str] = CHANNELS) -> List[Dict[str, Any]]:
+        """
+        Lit un niveau de pyramide pour plusieurs journées
+        Une journée compactée est lue à son niveau le plus fin conservé si le
+        niveau demandé n'existe plus (voir compact) : 'level' et 'step'
+        indiquent le niveau effectivement lu.
+
+        Args:
+            plant_id: ID du plant
+            days: Dates YYYY-MM-DD (ordre conservé, jours absents ignorés)
+            level: Facteur du niveau (1, 3, 12 ou 0 pour la journée)
+            channels: Canaux à lire
+
+        Returns:
+            [{'day', 'base_ts', 'slots', 'level', 'step', 'points', 'complete', channel: {'mean', 'min', 'max'}}]
+        """
+        days = list(days)
+        channels = list(channels)
+        if not days:
+            return []
+
+        placeholders = ','.join('?' * len(days))
+        conn = self._conn()
+        series = {}
+        by_level: Dict[int, List[str]] = {}
+        for day, base_ts, slots, complete, resolution in conn.execute(
+            f'SELECT day, base_ts, slots, complete, resolution FROM day_series '
+            f'WHERE plant_id = ? AND day IN ({placeholders})',
+            [plant_id] + days
+        ):
+            effective = level if LEVEL_RANK[level] >= LEVEL_RANK[resolution] else resolution
+            series[day] = {'day': day, 'base_ts': base_ts, 'slots': slots, 'complete': bool(complete),
+                           'level': effective}
+            by_level.setdefault(effective, []).append(day)
+
+        channel_placeholders = ','.join('?' * len(channels))
+        for effective, level_days in by_level.items():
+            for day, channel, mean, vmin, vmax in conn.execute(
+                f'SELECT day, channel, mean, min, max FROM day_level '
+                f'WHERE plant_id = ? AND level = ? AND day IN ({",".join("?" * len(level_days))}) '
+                f'AND channel IN ({channel_placeholders})',
+                [plant_id, effective] + level_days + channels
+            ):
+                mean = _unpack(mean)
+                entry = {'mean': mean, 'min': _unpack(vmin), 'max': _unpack(vmax)}
+                if entry['min'] is None:
+                    entry['min'] = entry['max'] = mean
+                series[day][channel] = entry
+
+        result = []
+        for day in days:
+            if day in series:
+                entry = series[day]
+                factor = entry['level'] or entry['slots']
+                entry['step'] = SLOT_SECONDS * factor
+                entry['points'] = entry['slots'] // factor
+                result.append(entry)
+        return result
+
+    def compact(self, before_15min: Optional[str] = None, before_hour: Optional[str] = None) -> Dict[str, int]:
+        """
+        Compaction de l'historique ancien (journées closes uniquement)
+        - avant before_15min : le niveau 5 min est supprimé, 15 min devient le plus fin
+        - avant before_hour : les niveaux 5 et 15 min sont supprimés
+        Les niveaux conservés sont recalculés depuis le 5 min en moyenne
+        « énergie » (moyenne × pas = énergie exacte, même pour un point
+        incomplet) et gardent leurs enveloppes min/max (pics). Le cumul
+        journalier (énergies, puissance de pointe) est recalculé avant
+        suppression.
+
+        Args:
+            before_15min, before_hour: Dates YYYY-MM-DD exclues (None = pas de compaction à ce niveau)
+
+        Returns:
+            {'15min': journées compactées au 15 min, 'hour': journées compactées à l'heure}
+        """
+        conn = self._conn()
+        counts = {'15min': 0, 'hour': 0}
+        targets = []
+        if before_hour:
+            targets.append(('hour', 12, before_hour))
+        if before_15min:
+            targets.append(('15min', 3, before_15min))
+
+        for name, tier, before in targets:
+            rows = conn.execute(
+                'SELECT plant_id, day, base_ts, slots, resolution FROM day_series '
+                'WHERE day < ? AND complete = 1 AND resolution IN (1, 3) AND resolution != ? '
+                'ORDER BY plant_id, day',
+                (before, tier)
+            ).fetchall()
+            for plant_id, day, base_ts, slots, resolution in rows:
+                with conn:
+                    if resolution == 1:
+                        grids = self._level1_grids(plant_id, day, slots)
+                        self._put_rollup(conn, plant_id, day, grids, base_ts, slots)
+                        conn.executemany(
+                            'INSERT OR REPLACE INTO day_level (plant_id, day, channel, level, mean, min, max) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                            [
+                                (plant_id, day, channel, factor, _pack(mean), _pack(vmin), _pack(vmax))
+                                for channel, grid in grids.items()
+                                for factor, (mean, vmin, vmax) in build_levels(grid, tier, energy=True).items()
+                            ]
+                        )
+                    finer = [factor for factor, rank in LEVEL_RANK.items() if rank < LEVEL_RANK[tier]]
+                    conn.execute(
+                        f'DELETE FROM day_level WHERE plant_id = ? AND day = ? '
+                        f'AND level IN ({",".join("?" * len(finer))})',
+                        [plant_id, day] + finer
+                    )
+                    conn.execute(
+                        'UPDATE day_series SET resolution = ? WHERE plant_id = ? AND day = ?',
+                        (tier, plant_id, day)
+                    )
+                counts[name] += 1
+        return counts
+
+    def vacuum(self):
+        """Rend au système l'espace libéré par la compaction (verrouille la base le temps de l'opération)"""
+        conn = self._conn()
+        conn.commit()
+        conn.execute('VACUUM')
@@ -0,0 +1,226 @@
+"""
+Diffusion Server-Sent Events (SSE) des données temps réel
+Un seul poller interroge l'API amont par créneau de 5 minutes et pousse
+les nouveautés à tous les clients connectés.
+"""
+import collections
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def format_sse(event_id: Optional[int], event_type: str, data: Any) -> str:
+    """
+    Formate un événement au format text/event-stream
+
+    Args:
+        event_id: Identifiant croissant (renvoyé par le client via Last-Event-ID), None pour l'omettre
+        event_type: Nom de l'événement (realtime, points, tempo, reset)
+        data: Données sérialisables en JSON
+
+    Returns:
+        Bloc SSE prêt à être envoyé
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    id_line = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{id_line}event: {event_type}\ndata: {payload}\n\n"
+
+
+class EventBroker:
+    """Historique borné d'événements SSE partagé entre tous les clients"""
+
+    def __init__(self, history_size: int = 500):
+        """
+        Args:
+            history_size: Nombre d'événements conservés pour le rejeu
+        """
+        self._events = collections.deque(maxlen=history_size)
+        self._next_id = 1
+        self._latest = {}  # {event_type: bloc SSE} dernier événement de chaque type
+        self._cond = threading.Condition()
+
+    def publish(self, event_type: str, data: Any) -> int:
+        """
+        Publie un événement et réveille les clients en attente
+        Le bloc SSE est formaté une seule fois, quel que soit le nombre de clients.
+
+        Returns:
+            Identifiant de l'événement
+        """
+        with self._cond:
+            event_id = self._next_id
+            self._next_id += 1
+            block = format_sse(event_id, event_type, data)
+            self._events.append((event_id, block))
+            self._latest[event_type] = (event_id, block)
+            self._cond.notify_all()
+        return event_id
+
+    def _replay(self, last_id: Optional[int]) -> List[tuple]:
+        """
+        Événements à envoyer à un client qui (re)se connecte
+
+        - Sans Last-Event-ID : dernier état connu de chaque type
+        - Avec un Last-Event-ID encore dans l'historique : événements suivants
+        - Avec un Last-Event-ID trop ancien : événement 'reset' puis dernier état
+        """
+        if last_id is None:
+            return sorted(self._latest.values())
+
+        # Identifiant inconnu (redémarrage du serveur) ou sorti de l'historique
+        if last_id >= self._next_id or (self._events and last_id < self._events[0][0] - 1):
+            # Le client repart de zéro : tout l'historique restant lui sera renvoyé
+            reset = (0, format_sse(None, 'reset', {'reason': 'history_expired'}))
+            return [reset] + sorted(self._latest.values())
+
+        return [event for event in self._events if event[0] > last_id]
+
+    def listen(self, last_id: Optional[int] = None, heartbeat: float = 15.0) -> Iterator[str]:
+        """
+        Générateur de blocs SSE pour un client
+
+        Args:
+            last_id: Dernier identifiant reçu par le client (en-tête Last-Event-ID)
+            heartbeat: Intervalle (s) des commentaires keep-alive
+
+        Yields:
+            Blocs SSE (événements ou commentaires keep-alive)
+        """
+        with self._cond:
+            pending = self._replay(last_id)
+
+        while True:
+            for event_id, block in pending:
+                last_id = event_id
+                yield block
+
+            with self._cond:
+                if last_id is None or not self._events or self._events[-1][0] <= last_id:
+                    self._cond.wait(timeout=heartbeat)
+                pending = self._replay(last_id)
+
+            if not pending:
+                yield ": ping\n\n"
+
+
+class SlotPoller:
+    """
+    Interroge l'API amont une fois par créneau et publie les changements
+
+    La fonction collect() retourne un instantané :
+        {'realtime': {...}, 'points': [{'t': ts, ...}, ...], 'tempo': {...}}
+
+    Avec un bail (plusieurs répliques), seul le leader appelle collect() ; il
+    partage l'instantané via shared, que les autres répliques relisent et
+    diffusent à leurs propres clients.
+    """
+
+    SNAPSHOT_KEY = 'stream:snapshot'
+
+    def __init__(self, broker: EventBroker, collect: Callable[[], Dict[str, Any]],
+                 interval: int = 300, offset: int = 30, lease=None, shared=None,
+                 check_interval: float = 20.0, schedule=None):
+        """
+        Args:
+            broker: Diffuseur des événements
+            collect: Fonction de collecte (appels amont + calculs)
+            interval: Durée d'un créneau en secondes (5 min)
+            offset: Décalage (s) après le début du créneau, le temps que l'amont publie le point
+            lease: Bail de leader (app.leader.LeaderLease), None pour une réplique unique
+            shared: Cache partagé (get/set) où le leader dépose l'instantané
+            check_interval: Période (s) de renouvellement du bail et de lecture de l'instantané
+            schedule: Calendrier des créneaux à interroger (app.schedule.SolarSchedule),
+                None pour interroger chaque créneau
+        """
+        self.broker = broker
+        self.collect = collect
+        self.interval = interval
+        self.offset = offset
+        self.lease = lease
+        self.shared = shared
+        self.check_interval = check_interval
+        self.schedule = schedule
+        self._last_realtime = None
+        self._last_tempo = None
+        self._last_point_ts = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Démarre le thread de polling (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stream-poller', daemon=True)
+                self._thread.start()
+
+    def poll_once(self):
+        """Effectue une collecte, la partage avec les autres répliques et publie ce qui a changé"""
+        snapshot = self.collect()
+        if self.lease is not None:
+            self.lease.check()
+        if self.shared is not None:
+            self.shared.set(self.SNAPSHOT_KEY, snapshot, ttl=2 * self.interval)
+        self.publish(snapshot)
+
+    def publish(self, snapshot: Dict[str, Any]):
+        """Publie les éléments d'un instantané qui ont changé depuis le précédent"""
+        realtime = snapshot.get('realtime')
+        if realtime and realtime != self._last_realtime:
+            self._last_realtime = realtime
+            self.broker.publish('realtime', realtime)
+
+        points = snapshot.get('points') or []
+        if self._last_point_ts is not None:
+            points = [p for p in points if p['t'] > self._last_point_ts]
+        if points:
+            self._last_point_ts = points[-1]['t']
+            self.broker.publish('points', {'points': points})
+
+        tempo = snapshot.get('tempo')
+        if tempo and tempo.get('success'):
+            key = (tempo.get('couleur'), tempo.get('horaire'))
+            if key != self._last_tempo:
+                self._last_tempo = key
+                self.broker.publish('tempo', tempo)
+
+    def _next_slot(self) -> float:
+        """Instant de la prochaine collecte (début du prochain créneau à interroger + décalage)"""
+        now = time.time()
+        if self.schedule is not None:
+            return self.schedule.next_due(now)
+        return now + self.interval - (now - self.offset) % self.interval
+
+    def _run(self):
+        """Boucle alignée sur les créneaux de 5 minutes (espacés la nuit selon le calendrier)"""
+        if self.lease is None:
+            while True:
+                try:
+                    self.poll_once()
+                except Exception as e:
+                    print(f"Erreur poller SSE: {e}")
+                time.sleep(self._next_slot() - time.time())
+
+        next_collect = 0.0
+        while True:
+            try:
+                if self.lease.try_acquire():
+                    # Leader : collecte au créneau (immédiatement après une prise de bail)
+                    if time.time() >= next_collect:
+                        # Bail renouvelé pendant toute la collecte (rattrapage, compaction...)
+                        with self.lease.hold():
+                            self.poll_once()
+                        next_collect = self._next_slot()
+                else:
+                    # Suiveur : relit l'instantané du leader
+                    next_collect = 0.0
+                    snapshot = self.shared.get(self.SNAPSHOT_KEY) if self.shared is not None else None
+                    if snapshot:
+                        self.publish(snapshot)
+            except Exception as e:
+                print(f"Erreur poller SSE: {e}")
+
+            wait = self.check_interval
+            if next_collect:
+                wait = min(wait, max(next_collect - time.time(), 0.1))
+            time.sleep(wait)
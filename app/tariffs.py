@@ -0,0 +1,315 @@
+"""
+Comparateur de contrats d'électricité (simulations « et si »)
+Les flux d'énergie 5 min d'une période (consommation, autoconsommation,
+soutirage, injection) sont calculés une seule fois ; chaque contrat devient
+une ligne d'une matrice de prix (contrats × créneaux) et tous les coûts sont
+obtenus par un seul produit matriciel. Comparer des dizaines de contrats sur
+une année ne coûte que quelques dizaines de millisecondes.
+
+Contrats pris en charge (dict JSON, voir parse_plans) :
+- base : prix unique
+- hphc : heures pleines / heures creuses, plages creuses configurables
+- tempo : couleurs Tempo historiques des journées (tarifs de l'API ou fournis)
+- curve : courbe de prix arbitraire sur la journée (24, 48, 96, 288... valeurs)
+Chaque contrat est évalué pour un ou plusieurs prix de revente du surplus.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.store import HP_END, HP_START, SLOT_SECONDS
+
+MINUTES_PER_DAY = 1440
+
+# Plages creuses par défaut (minutes locales) : complément des heures pleines Tempo (22h-6h)
+DEFAULT_HC_WINDOWS = ((HP_END * 60, HP_START * 60),)
+
+TEMPO_COLORS = ('bleu', 'blanc', 'rouge')
+
+PLAN_TYPES = ('base', 'hphc', 'tempo', 'curve')
+
+
+def local_minutes(timestamps: np.ndarray, tz) -> np.ndarray:
+    """Minute locale de la journée de chaque timestamp (décalage UTC constant par heure)"""
+    hours = timestamps // 3600
+    unique_hours, inverse = np.unique(hours, return_inverse=True)
+    offsets = np.array([datetime.fromtimestamp(int(hour) * 3600, tz).utcoffset().total_seconds()
+                        for hour in unique_hours], dtype=np.int64)
+    return ((timestamps + offsets[inverse]) % 86400) // 60
+
+
+def energy_flows(days: List[Dict[str, Any]], tz) -> Dict[str, Any]:
+    """
+    Flux d'énergie par créneau à partir de journées du stockage local
+
+    Args:
+        days: Journées lues par SeriesStore.get_days (canaux yieldPower et consumePower) ;
+            une journée compactée est prise à son pas (15 min ou 1 h), l'autoconsommation
+            y est alors estimée sur des puissances moyennes
+        tz: Timezone pytz de l'installation (plages horaires locales)
+
+    Returns:
+        {'days': dates, 'day_index', 'minute' (minute locale), 'hours' (durée du créneau),
+         'consumption', 'self_consumed', 'import', 'export' (kWh par créneau)}
+    """
+    day_index, minutes, hours, production, consumption = [], [], [], [], []
+    for i, day in enumerate(days):
+        points, step = day['points'], day['step']
+        empty = {'mean': np.zeros(points)}
+        offsets = np.arange(points, dtype=np.int64) * step
+        if day['slots'] * SLOT_SECONDS == 86400:
+            # base_ts est minuit local : minute locale = écart à minuit
+            minutes.append(offsets // 60)
+        else:
+            # Changement d'heure : conversion par heure
+            minutes.append(local_minutes(day['base_ts'] + offsets, tz))
+        day_index.append(np.full(points, i, dtype=np.int64))
+        hours.append(np.full(points, step / 3600))
+        # Puissance moyenne (W) × pas (s) -> kWh
+        to_kwh = step / 3600 / 1000
+        production.append(np.nan_to_num(np.asarray(day.get('yieldPower', empty)['mean'], dtype=np.float64)) * to_kwh)
+        consumption.append(np.nan_to_num(np.asarray(day.get('consumePower', empty)['mean'], dtype=np.float64)) * to_kwh)
+
+    if not days:
+        empty = np.array([], dtype=np.float64)
+        return {'days': [], 'day_index': np.array([], dtype=np.int64), 'minute': np.array([], dtype=np.int64),
+                'hours': empty, 'consumption': empty, 'self_consumed': empty, 'import': empty, 'export': empty}
+
+    production = np.concatenate(production)
+    consumption = np.concatenate(consumption)
+    self_consumed = np.minimum(production, consumption)
+    return {
+        'days': [day['day'] for day in days],
+        'day_index': np.concatenate(day_index),
+        'minute': np.concatenate(minutes),
+        'hours': np.concatenate(hours),
+        'consumption': consumption,
+        'self_consumed': self_consumed,
+        'import': consumption - self_consumed,
+        'export': production - self_consumed
+    }
+
+
+def _parse_window(window: str) -> Tuple[int, int]:
+    """'22:00-06:00' -> (1320, 360) en minutes locales"""
+    try:
+        start, end = window.split('-')
+        bounds = []
+        for value in (start, end):
+            hour, minute = map(int, value.strip().split(':'))
+            if not (0 <= hour <= 24 and 0 <= minute < 60) or hour * 60 + minute > MINUTES_PER_DAY:
+                raise ValueError
+            bounds.append(hour * 60 + minute)
+        return bounds[0], bounds[1]
+    except (AttributeError, ValueError):
+        raise ValueError(f"Plage horaire invalide: {window!r} (attendu HH:MM-HH:MM)")
+
+
+def _price(spec: Dict[str, Any], key: str, default: Optional[float] = None) -> float:
+    value = spec.get(key, default)
+    if value is None:
+        raise ValueError(f"Contrat {spec.get('name')!r} : champ '{key}' manquant")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Contrat {spec.get('name')!r} : '{key}' doit être un nombre")
+
+
+def parse_plans(specs: List[Dict[str, Any]], sell_prices: Iterable[float]) -> List[Dict[str, Any]]:
+    """
+    Valide et normalise des contrats
+
+    Args:
+        specs: [{'name', 'type', ...}] :
+            base : {'price'} ; hphc : {'hp', 'hc', 'hc_windows': ['22:00-06:00', ...]} ;
+            tempo : {'rates': {'bleu': {'HP', 'HC'}, ...}} (optionnel, tarifs API sinon) ;
+            curve : {'prices': [...]} (valeurs réparties uniformément sur la journée)
+            Communs : 'subscription' (abonnement €/an, défaut 0), 'sell' (prix de revente, liste ou nombre)
+        sell_prices: Prix de revente appliqués aux contrats sans 'sell'
+
+    Returns:
+        Contrats normalisés (une entrée par contrat)
+
+    Raises:
+        ValueError: Contrat invalide (message affichable)
+    """
+    if not isinstance(specs, list):
+        raise ValueError("'plans' attend une liste de contrats")
+    plans = []
+    names = set()
+    default_sell = [float(price) for price in sell_prices]
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Contrat n°{index + 1} : objet JSON attendu")
+        kind = spec.get('type')
+        if kind not in PLAN_TYPES:
+            raise ValueError(f"Contrat n°{index + 1} : type {kind!r} inconnu ({', '.join(PLAN_TYPES)})")
+        name = str(spec.get('name') or f"{kind}-{index + 1}")
+        if name in names:
+            raise ValueError(f"Contrat {name!r} en double")
+        names.add(name)
+        spec = {**spec, 'name': name}
+
+        sell = spec.get('sell', default_sell)
+        try:
+            sell = [float(price) for price in ([sell] if isinstance(sell, (int, float)) else sell)]
+        except (TypeError, ValueError):
+            raise ValueError(f"Contrat {name!r} : 'sell' attend un prix ou une liste de prix")
+        plan = {
+            'name': name,
+            'type': kind,
+            'subscription': _price(spec, 'subscription', 0),
+            'sell': sell
+        }
+        if kind == 'base':
+            plan['price'] = _price(spec, 'price')
+        elif kind == 'hphc':
+            plan['hp'] = _price(spec, 'hp')
+            plan['hc'] = _price(spec, 'hc')
+            windows = spec.get('hc_windows')
+            plan['hc_windows'] = tuple(_parse_window(window) for window in windows) if windows else DEFAULT_HC_WINDOWS
+        elif kind == 'tempo':
+            rates = spec.get('rates')
+            if rates is not None:
+                try:
+                    plan['rates'] = {color: (float(rates[color]['HP']), float(rates[color]['HC']))
+                                     for color in TEMPO_COLORS}
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError(f"Contrat {name!r} : 'rates' attend {{bleu|blanc|rouge: {{HP, HC}}}}")
+        else:
+            prices = spec.get('prices')
+            if not isinstance(prices, list) or not prices or MINUTES_PER_DAY % len(prices):
+                raise ValueError(f"Contrat {name!r} : 'prices' attend une liste de prix répartis "
+                                 f"uniformément sur la journée (24, 48, 96, 288... valeurs)")
+            try:
+                plan['prices'] = np.asarray(prices, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"Contrat {name!r} : 'prices' doit contenir des nombres")
+        plans.append(plan)
+    if not plans:
+        raise ValueError("Aucun contrat à comparer")
+    return plans
+
+
+def _hc_mask(minutes: np.ndarray, windows: Tuple[Tuple[int, int], ...]) -> np.ndarray:
+    """Créneaux en heures creuses (plages éventuellement à cheval sur minuit)"""
+    mask = np.zeros(minutes.size, dtype=bool)
+    for start, end in windows:
+        if start <= end:
+            mask |= (minutes >= start) & (minutes < end)
+        else:
+            mask |= (minutes >= start) | (minutes < end)
+    return mask
+
+
+def price_matrix(plans: List[Dict[str, Any]], flows: Dict[str, Any],
+                 tempo: Optional[Dict[str, Dict[str, Any]]] = None) -> np.ndarray:
+    """
+    Prix d'achat (€/kWh) de chaque contrat pour chaque créneau
+
+    Args:
+        tempo: {date: {tarif_hp, tarif_hc, couleur}} des journées de flows (contrats tempo)
+
+    Returns:
+        ndarray (contrats × créneaux)
+    """
+    minutes = flows['minute']
+    matrix = np.empty((len(plans), minutes.size))
+    hc_masks = {}
+
+    def hc_mask(windows):
+        if windows not in hc_masks:
+            hc_masks[windows] = _hc_mask(minutes, windows)
+        return hc_masks[windows]
+
+    tempo_hc = hc_mask(DEFAULT_HC_WINDOWS)
+    for row, plan in enumerate(plans):
+        kind = plan['type']
+        if kind == 'base':
+            matrix[row] = plan['price']
+        elif kind == 'hphc':
+            matrix[row] = np.where(hc_mask(plan['hc_windows']), plan['hc'], plan['hp'])
+        elif kind == 'curve':
+            prices = plan['prices']
+            matrix[row] = prices[minutes * prices.size // MINUTES_PER_DAY]
+        else:
+            if tempo is None:
+                raise ValueError(f"Contrat {plan['name']!r} : couleurs Tempo indisponibles")
+            day_hp, day_hc = _tempo_day_rates(plan, flows['days'], tempo)
+            matrix[row] = np.where(tempo_hc, day_hc[flows['day_index']], day_hp[flows['day_index']])
+    return matrix
+
+
+def _tempo_day_rates(plan: Dict[str, Any], days: List[str],
+                     tempo: Dict[str, Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Tarifs HP/HC de chaque journée : couleur du jour, tarifs du contrat s'ils sont fournis"""
+    rates = plan.get('rates')
+    day_hp = np.empty(len(days))
+    day_hc = np.empty(len(days))
+    for i, day in enumerate(days):
+        info = tempo[day]
+        color = str(info.get('couleur', '')).lower()
+        if rates is not None and color in rates:
+            day_hp[i], day_hc[i] = rates[color]
+        else:
+            # Couleur inconnue : tarifs de repli de la journée
+            day_hp[i], day_hc[i] = info['tarif_hp'], info['tarif_hc']
+    return day_hp, day_hc
+
+
+def compare_plans(plans: List[Dict[str, Any]], flows: Dict[str, Any],
+                  tempo: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Coût de chaque contrat (et de chaque prix de revente) sur les flux d'une période
+
+    Un seul produit matriciel (contrats × créneaux) · (créneaux × 2) donne, pour
+    tous les contrats, le coût de la consommation totale (sans panneaux) et celui
+    du soutirage réseau (avec panneaux).
+
+    Returns:
+        {'days', 'energy': {consumption_kwh, self_consumed_kwh, import_kwh, export_kwh},
+         'results': [{'plan', 'type', 'sell_price', 'cost', 'savings', ...}] triés par coût}
+    """
+    matrix = price_matrix(plans, flows, tempo)
+    costs = matrix @ np.column_stack([flows['consumption'], flows['import']])
+
+    energy = {
+        'consumption_kwh': float(flows['consumption'].sum()),
+        'self_consumed_kwh': float(flows['self_consumed'].sum()),
+        'import_kwh': float(flows['import'].sum()),
+        'export_kwh': float(flows['export'].sum())
+    }
+    # Abonnement annuel au prorata de la période
+    years = len(flows['days']) / 365
+
+    results = []
+    for plan, (cost_without_solar, import_cost) in zip(plans, costs):
+        subscription = plan['subscription'] * years
+        for sell_price in plan['sell']:
+            export_revenue = energy['export_kwh'] * sell_price
+            cost = import_cost + subscription - export_revenue
+            without_solar = cost_without_solar + subscription
+            results.append({
+                'plan': plan['name'],
+                'type': plan['type'],
+                'sell_price': sell_price,
+                'subscription': round(subscription, 2),
+                'energy_cost': round(float(import_cost), 2),
+                'export_revenue': round(export_revenue, 2),
+                'cost': round(float(cost), 2),
+                'cost_without_solar': round(float(without_solar), 2),
+                'savings': round(float(without_solar - cost), 2),
+                'avg_import_price': round(float(import_cost / energy['import_kwh']), 4) if energy['import_kwh'] else None
+            })
+
+    results.sort(key=lambda result: result['cost'])
+    best = results[0]['cost'] if results else 0
+    for rank, result in enumerate(results, 1):
+        result['rank'] = rank
+        result['delta_vs_best'] = round(result['cost'] - best, 2)
+    return {
+        'days': len(flows['days']),
+        'energy': {key: round(value, 2) for key, value in energy.items()},
+        'results': results
+    }
@@ -5,19 +5,17 @@ API: https://www.api-couleur-tempo.fr
 import requests
 from typing import Dict, Any
 from datetime import datetime
-import sys
-import os
-
-# Ajouter le répertoire parent au path pour les imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
 
 from config import Config
+from app import tracing
+from app.metrics import observe_upstream
 
 
 class TempoAPI:
     """Client pour l'API Couleur Tempo"""
 
-    BASE_URL = "https://www.api-couleur-tempo.fr/api"
+    BASE_URL = Config.TEMPO_API_BASE_URL.rstrip('/')
 
     # Mapping des codes couleurs
     COULEURS = {
@@ -32,6 +30,19 @@ class TempoAPI:
         2: {"nom": "HC", "label": "Heures Creuses"}
     }
 
+    @classmethod
+    def _get(cls, endpoint: str, path: str) -> requests.Response:
+        """Requête GET vers l'API Tempo, instrumentée (métriques et span de la trace courante par endpoint)"""
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = requests.get(f"{cls.BASE_URL}{path}", timeout=5)
+            failed = response.status_code != 200
+            return response
+        finally:
+            observe_upstream('tempo', endpoint, time.perf_counter() - start, error=failed)
+            tracing.record(f"tempo.{endpoint}", start, error=failed)
+
     @classmethod
     def get_current_info(cls) -> Dict[str, Any]:
         """
@@ -49,7 +60,7 @@ class TempoAPI:
             }
         """
         try:
-            response = requests.get(f"{cls.BASE_URL}/now", timeout=5)
+            response = cls._get('now', '/now')
             response.raise_for_status()
             data = response.json()
 
@@ -101,7 +112,7 @@ class TempoAPI:
             }
         """
         try:
-            response = requests.get(f"{cls.BASE_URL}/tarifs", timeout=5)
+            response = cls._get('tarifs', '/tarifs')
             response.raise_for_status()
             data = response.json()
 
@@ -173,7 +184,7 @@ class TempoAPI:
             from datetime import datetime, timedelta
             tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
             
-            response = requests.get(f"{cls.BASE_URL}/jourTempo/{tomorrow}", timeout=5)
+            response = cls._get('jourTempo', f"/jourTempo/{tomorrow}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -233,7 +244,7 @@ class TempoAPI:
             }
         """
         try:
-            response = requests.get(f"{cls.BASE_URL}/jourTempo/{date_str}", timeout=5)
+            response = cls._get('jourTempo', f"/jourTempo/{date_str}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,110 @@
+"""
+Tests du simulateur de batterie (app.battery)
+Créneaux d'une heure ; un rendement aller-retour de 0,81 donne 0,9 à la charge
+et 0,9 à la décharge.
+"""
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from app import battery
+
+# 3 kWh de surplus, puis 2 kWh soutirés deux heures de suite
+SURPLUS = [3.0, 0.0, 0.0]
+DEFICIT = [0.0, 2.0, 2.0]
+PRICES = [0.2, 0.3, 0.4]
+HOURS = [1.0, 1.0, 1.0]
+
+
+def test_simulate_efficiency_and_capacity():
+    # Charge de 3 kWh -> 2,7 kWh stockés ; 2 kWh restitués (2,22 kWh prélevés),
+    # puis 0,478 kWh × 0,9 = 0,43 kWh : 1,57 kWh achetés à 0,4 €
+    result = battery.simulate(SURPLUS, DEFICIT, PRICES, HOURS, sell_price=0.1,
+                              capacity_kwh=2.7, power_kw=10, efficiency=0.81)
+    assert result['charged_kwh'] == pytest.approx(3.0)
+    assert result['sell_kwh'] == pytest.approx(0.0)
+    assert result['discharged_kwh'] == pytest.approx(2.43)
+    assert result['buy_kwh'] == pytest.approx(1.57)
+    assert result['buy_cost'] == pytest.approx(0.628)
+    assert result['cycles'] == pytest.approx(0.9)
+    assert result['final_soc'] == pytest.approx(0.0)
+
+
+def test_simulate_power_limit():
+    # 1 kW pendant une demi-heure : 0,5 kWh chargés, 1,5 kWh revendus à 0,1 €
+    result = battery.simulate([2.0], [0.0], [0.2], [0.5], sell_price=0.1,
+                              capacity_kwh=10, power_kw=1, efficiency=1.0)
+    assert result['charged_kwh'] == pytest.approx(0.5)
+    assert result['sell_kwh'] == pytest.approx(1.5)
+    assert result['sell_revenue'] == pytest.approx(0.15)
+    assert result['final_soc'] == pytest.approx(0.05)
+
+
+def test_simulate_min_soc():
+    # 5 kWh stockés, plancher 2 kWh : 3 kWh restitués sur 4, 1 kWh acheté
+    result = battery.simulate([0.0], [4.0], [0.25], [1.0], sell_price=0.1, capacity_kwh=10, power_kw=10,
+                              efficiency=1.0, min_soc=0.2, initial_soc=0.5)
+    assert result['discharged_kwh'] == pytest.approx(3.0)
+    assert result['buy_cost'] == pytest.approx(0.25)
+    assert result['final_soc'] == pytest.approx(0.2)
+
+    # État initial relevé au plancher : rien à restituer
+    result = battery.simulate([0.0], [1.0], [0.25], [1.0], sell_price=0.1, capacity_kwh=10, power_kw=10,
+                              efficiency=1.0, min_soc=0.2)
+    assert result['discharged_kwh'] == 0.0
+    assert result['buy_kwh'] == pytest.approx(1.0)
+    assert result['final_soc'] == pytest.approx(0.2)
+
+
+def test_simulate_without_battery():
+    result = battery.simulate(SURPLUS, DEFICIT, PRICES, HOURS, sell_price=0.1,
+                              capacity_kwh=0, power_kw=5, efficiency=0.9)
+    assert result['buy_cost'] == pytest.approx(1.4)
+    assert result['sell_revenue'] == pytest.approx(0.3)
+    assert (result['cycles'], result['final_soc']) == (0.0, 0.0)
+
+
+def test_scenario_grid():
+    grid = battery.scenario_grid([5, 10], [2.5], [0.9, 0.95])
+    assert grid == [
+        {'capacity_kwh': 5.0, 'power_kw': 2.5, 'efficiency': 0.9},
+        {'capacity_kwh': 5.0, 'power_kw': 2.5, 'efficiency': 0.95},
+        {'capacity_kwh': 10.0, 'power_kw': 2.5, 'efficiency': 0.9},
+        {'capacity_kwh': 10.0, 'power_kw': 2.5, 'efficiency': 0.95}
+    ]
+
+
+def make_flows():
+    return {'export': np.array(SURPLUS), 'import': np.array(DEFICIT), 'self_consumed': np.array([1.0, 0.0, 0.0]),
+            'consumption': np.array([1.0, 2.0, 2.0]), 'hours': np.array(HOURS)}
+
+
+def test_sweep():
+    scenarios = battery.scenario_grid([0, 2.7], [10], [0.81])
+    result = battery.sweep(make_flows(), np.array(PRICES), scenarios, sell_price=0.1)
+    # Sans batterie : 0,6 + 0,8 € d'achats, 0,3 € de revente
+    assert result['baseline'] == {'buy_kwh': 4.0, 'sell_kwh': 3.0, 'buy_cost': 1.4, 'sell_revenue': 0.3,
+                                  'self_consumed_kwh': 1.0, 'cost': 1.1}
+    assert result['workers'] == 1
+
+    best, none = result['results']
+    assert best['capacity_kwh'] == 2.7
+    assert best['cost'] == 0.63
+    assert best['savings'] == 0.47
+    assert best['savings_per_kwh'] == 0.17
+    assert best['self_consumed_kwh'] == 3.43
+    assert none['capacity_kwh'] == 0.0
+    assert (none['cost'], none['savings'], none['savings_per_kwh']) == (1.1, 0.0, None)
+
+
+@pytest.mark.skipif('forkserver' not in multiprocessing.get_all_start_methods(), reason='forkserver indisponible')
+def test_sweep_pool_matches_in_process():
+    flows = make_flows()
+    scenarios = battery.scenario_grid([0, 1, 2.7, 5], [1, 10], [0.81, 0.9])
+    try:
+        pooled = battery.sweep(flows, np.array(PRICES), scenarios, sell_price=0.1, workers=3)
+    finally:
+        battery.shutdown_pool()
+    assert pooled['workers'] == 3
+    assert pooled['results'] == battery.sweep(flows, np.array(PRICES), scenarios, sell_price=0.1)['results']
@@ -0,0 +1,101 @@
+"""
+Tests du cache partagé (app.cache) : expiration et verrou add() (premier arrivé)
+"""
+import threading
+import time
+
+import pytest
+
+from app.cache import MemoryCache, SQLiteCache, create_cache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    return MemoryCache() if request.param == 'memory' else SQLiteCache(str(tmp_path / 'cache.db'))
+
+
+def test_get_set_delete(cache):
+    assert cache.get('absent') is None
+    cache.set('jour', {'couleur': 'BLEU', 'kwh': [1.5, None]})
+    assert cache.get('jour') == {'couleur': 'BLEU', 'kwh': [1.5, None]}
+    cache.set('jour', 'remplacé')
+    assert cache.get('jour') == 'remplacé'
+    cache.delete('jour')
+    assert cache.get('jour') is None
+
+
+def test_ttl(cache):
+    cache.set('court', 1, ttl=0.05)
+    cache.set('long', 2, ttl=60)
+    assert cache.get('court') == 1
+    time.sleep(0.1)
+    assert cache.get('court') is None
+    assert cache.get('long') == 2
+
+
+def test_add_is_first_wins(cache):
+    assert cache.add('verrou', 'a', ttl=60)
+    assert not cache.add('verrou', 'b', ttl=60)
+    assert cache.get('verrou') == 'a'
+    # Libération explicite : le verrou est de nouveau disponible
+    cache.delete('verrou')
+    assert cache.add('verrou', 'c', ttl=60)
+    assert cache.get('verrou') == 'c'
+
+
+def test_add_takes_over_expired_key(cache):
+    assert cache.add('verrou', 'a', ttl=0.05)
+    time.sleep(0.1)
+    # Détenteur disparu sans libérer : le verrou expire et peut être repris
+    assert cache.add('verrou', 'b', ttl=60)
+    assert cache.get('verrou') == 'b'
+
+
+def test_memory_purge_expired():
+    cache = MemoryCache()
+    for n in range(10):
+        cache.set(f'vieux:{n}', n, ttl=0.01)
+    time.sleep(0.05)
+    for n in range(MemoryCache.PURGE_EVERY):
+        cache.set(f'neuf:{n}', n)
+    # Entrées jamais relues supprimées par la purge amortie
+    assert not any(key.startswith('vieux:') for key in cache._data)
+    assert len(cache._data) == MemoryCache.PURGE_EVERY
+
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first, second = SQLiteCache(path), SQLiteCache(path)
+    first.set('token', 'abc', ttl=60)
+    assert second.get('token') == 'abc'
+    assert first.add('compact', 1, ttl=60)
+    assert not second.add('compact', 2, ttl=60)
+
+
+def test_sqlite_add_concurrent(tmp_path):
+    # 8 workers (une instance et une connexion chacun) tentent le même verrou en même temps : un seul l'obtient
+    path = str(tmp_path / 'cache.db')
+    caches = [SQLiteCache(path) for _ in range(8)]
+    barrier = threading.Barrier(len(caches))
+    results = [None] * len(caches)
+
+    def worker(index):
+        barrier.wait()
+        results[index] = caches[index].add('reconcile:1', index, ttl=60)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(len(caches))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1
+    assert caches[0].get('reconcile:1') == results.index(True)
+
+
+def test_create_cache(tmp_path):
+    assert isinstance(create_cache('memory://'), MemoryCache)
+    cache = create_cache(f'sqlite:///{tmp_path}/sub/cache.db')
+    assert isinstance(cache, SQLiteCache)
+    assert cache.path == f'{tmp_path}/sub/cache.db'
+    with pytest.raises(ValueError):
+        create_cache('memcached://localhost')
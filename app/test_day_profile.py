@@ -0,0 +1,132 @@
+"""
+Tests des profils de journée type (app.day_profile)
+La valeur de chaque point est son indice dans la journée : la position d'un
+point dans la matrice se lit directement, y compris aux changements d'heure
+(2025-03-30, 23 h ; 2025-10-26, 25 h, heure de Paris).
+"""
+import numpy as np
+import pytest
+import pytz
+
+from app.day_profile import SLOTS_PER_DAY, day_groups, day_matrix, hourly_means, slot_labels, typical_day
+from app.store import SLOT_SECONDS
+
+PARIS = pytz.timezone('Europe/Paris')
+
+# Minuit heure de Paris
+JUNE_MIDNIGHT = 1748815200      # 2025-06-02, UTC+2
+SPRING_MIDNIGHT = 1743289200    # 2025-03-30, UTC+1 puis UTC+2 à 2h
+AUTUMN_MIDNIGHT = 1761429600    # 2025-10-26, UTC+2 puis UTC+1 à 3h
+
+
+def make_day(day, base_ts, slots=288, step=SLOT_SECONDS, values=None):
+    points = slots * SLOT_SECONDS // step
+    mean = np.arange(points, dtype=np.float64) if values is None else np.asarray(values, dtype=np.float64)
+    return {'day': day, 'base_ts': base_ts, 'slots': slots, 'step': step, 'points': points,
+            'yieldPower': {'mean': mean}}
+
+
+def test_day_matrix():
+    matrix = day_matrix([make_day('2025-06-02', JUNE_MIDNIGHT)], PARIS, ['yieldPower', 'consumePower'])
+    assert matrix['yieldPower'].shape == (1, SLOTS_PER_DAY)
+    assert matrix['yieldPower'][0].tolist() == list(range(288))
+    # Canal absent : aucune mesure
+    assert np.isnan(matrix['consumePower']).all()
+
+
+def test_day_matrix_missing_points():
+    values = np.arange(288, dtype=np.float64)
+    values[100] = np.nan
+    matrix = day_matrix([make_day('2025-06-02', JUNE_MIDNIGHT, values=values)], PARIS, ['yieldPower'])['yieldPower']
+    assert np.isnan(matrix[0, 100])
+    assert matrix[0, 101] == 101
+
+
+def test_day_matrix_compacted_day():
+    # Journée compactée à l'heure : 24 points répétés sur 12 créneaux chacun
+    matrix = day_matrix([make_day('2025-06-02', JUNE_MIDNIGHT, step=3600)], PARIS, ['yieldPower'])['yieldPower']
+    assert matrix[0, [0, 11, 12, 143, 287]].tolist() == [0, 0, 1, 11, 23]
+
+
+def test_day_matrix_spring_forward():
+    # 276 créneaux : le point 24 (1h UTC) est à 3h locale, 2h-2h55 n'existe pas
+    matrix = day_matrix([make_day('2025-03-30', SPRING_MIDNIGHT, slots=276)], PARIS, ['yieldPower'])['yieldPower']
+    assert matrix[0, 23] == 23
+    assert np.isnan(matrix[0, 24:36]).all()
+    assert matrix[0, [36, 287]].tolist() == [24, 275]
+
+
+def test_day_matrix_fall_back():
+    # 300 créneaux : 2h-2h55 vécue deux fois (points 24-35 puis 36-47), moyennée
+    matrix = day_matrix([make_day('2025-10-26', AUTUMN_MIDNIGHT, slots=300)], PARIS, ['yieldPower'])['yieldPower']
+    assert matrix[0, [23, 24, 35, 36, 287]].tolist() == [23, 30, 41, 48, 299]
+    assert not np.isnan(matrix).any()
+
+
+def test_day_groups():
+    dates = ['2025-06-01', '2025-06-02', '2025-06-07']
+    tempo = {'2025-06-01': {'couleur': 'BLEU'}, '2025-06-02': {'couleur': 'Rouge'}}
+    assert day_groups(dates) == ['all', 'all', 'all']
+    assert day_groups(dates, ['weekday']) == ['weekend', 'weekday', 'weekend']
+    assert day_groups(dates, ['tempo'], tempo) == ['bleu', 'rouge', 'inconnu']
+    assert day_groups(dates, ['weekday', 'tempo'], tempo) == ['weekend/bleu', 'weekday/rouge', 'weekend/inconnu']
+
+
+def test_typical_day():
+    # Créneau 0 : 1, 2, 3, 4 ; créneau 1 : 1, 2, 3 et une mesure manquante ; créneau 2 : aucune mesure
+    matrix = np.full((4, SLOTS_PER_DAY), 10.0)
+    matrix[:, 0] = [1, 2, 3, 4]
+    matrix[:, 1] = [3, 1, np.nan, 2]
+    matrix[:, 2] = np.nan
+    profile = typical_day({'yieldPower': matrix}, ['all'] * 4, [0.1, 0.5, 0.9])
+    stats = profile['all']['yieldPower']
+    assert profile['all']['days'] == 4
+    assert set(stats) == {'mean', 'p10', 'p50', 'p90'}
+    # Rangs 0,1 × 3 = 0,3, 0,5 × 3 = 1,5 et 0,9 × 3 = 2,7 entre les valeurs triées
+    assert stats['mean'][0] == 2.5
+    assert stats['p10'][0] == pytest.approx(1.3)
+    assert stats['p50'][0] == pytest.approx(2.5)
+    assert stats['p90'][0] == pytest.approx(3.7)
+    # Trois mesures : rangs 0,2, 1 et 1,8
+    assert stats['mean'][1] == 2.0
+    assert stats['p10'][1] == pytest.approx(1.2)
+    assert stats['p50'][1] == pytest.approx(2.0)
+    assert stats['p90'][1] == pytest.approx(2.8)
+    for key in ('mean', 'p10', 'p50', 'p90'):
+        assert np.isnan(stats[key][2])
+        assert stats[key][3] == 10.0
+
+
+def test_typical_day_matches_nanpercentile():
+    rng = np.random.default_rng(5)
+    matrix = rng.uniform(0, 3000, (40, SLOTS_PER_DAY))
+    matrix[rng.random(matrix.shape) < 0.1] = np.nan
+    stats = typical_day({'yieldPower': matrix}, ['all'] * 40, [0.05, 0.5, 0.95])['all']['yieldPower']
+    for q in (0.05, 0.5, 0.95):
+        np.testing.assert_allclose(stats[f'p{q * 100:g}'], np.nanpercentile(matrix, q * 100, axis=0))
+
+
+def test_typical_day_groups():
+    matrix = np.zeros((3, SLOTS_PER_DAY))
+    matrix[:, 0] = [100, 200, 600]
+    profile = typical_day({'yieldPower': matrix}, ['weekday', 'weekend', 'weekday'])
+    assert list(profile) == ['weekday', 'weekend']
+    assert profile['weekday']['days'] == 2
+    assert profile['weekday']['yieldPower']['mean'][0] == 350
+    assert profile['weekend']['yieldPower']['mean'][0] == 200
+    assert set(profile['weekend']['yieldPower']) == {'mean'}
+
+
+def test_slot_labels():
+    labels = slot_labels()
+    assert len(labels) == SLOTS_PER_DAY
+    assert labels[:2] == ['00:00', '00:05']
+    assert labels[150] == '12:30'
+    assert labels[-1] == '23:55'
+
+
+def test_hourly_means():
+    # 0h : 10 et 20 ; 1h : 30 ; série 'b' plus courte complétée par des zéros
+    means = hourly_means([0, 1800, 3600], {'a': [10, 20, 30], 'b': [4]}, pytz.utc)
+    assert means == {0: {'a': 15.0, 'b': 2.0}, 1: {'a': 30.0, 'b': 0.0}}
+    assert hourly_means([], {'a': []}) == {}
@@ -0,0 +1,88 @@
+"""
+Tests de l'élection de leader (app.leader) : prise, expiration, reprise et
+renouvellement en arrière-plan d'un bail partagé par deux répliques
+"""
+import time
+
+import pytest
+
+from app.leader import LeaderLease, LeaseLost
+
+
+def replicas(tmp_path, ttl=60.0, name='scheduler'):
+    path = str(tmp_path / 'lease.db')
+    return LeaderLease(path, name, ttl, holder='a'), LeaderLease(path, name, ttl, holder='b')
+
+
+def test_single_leader(tmp_path):
+    first, second = replicas(tmp_path)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    assert (first.is_leader, second.is_leader) == (True, False)
+    assert second.current_holder() == 'a'
+    # Renouvellement par le détenteur
+    assert first.try_acquire()
+    first.check()
+    with pytest.raises(LeaseLost):
+        second.check()
+
+
+def test_leases_are_independent_by_name(tmp_path):
+    path = str(tmp_path / 'lease.db')
+    assert LeaderLease(path, 'scheduler', holder='a').try_acquire()
+    assert LeaderLease(path, 'compaction', holder='b').try_acquire()
+
+
+def test_expired_lease_taken_over(tmp_path):
+    first, second = replicas(tmp_path, ttl=0.1)
+    assert first.try_acquire()
+    # Leader disparu sans renouveler : reprise après ttl
+    time.sleep(0.15)
+    assert not first.is_leader
+    with pytest.raises(LeaseLost):
+        first.check()
+    assert first.current_holder() is None
+    assert second.try_acquire()
+    assert second.current_holder() == 'b'
+    # L'ancien leader ne reprend pas un bail valide
+    assert not first.try_acquire()
+
+
+def test_release(tmp_path):
+    first, second = replicas(tmp_path)
+    assert first.try_acquire()
+    # Un non-détenteur ne libère rien
+    second.release()
+    assert first.current_holder() == 'a'
+    first.release()
+    assert not first.is_leader
+    assert first.current_holder() is None
+    # Reprise immédiate, sans attendre ttl
+    assert second.try_acquire()
+
+
+def test_hold_renews_past_ttl(tmp_path):
+    first, second = replicas(tmp_path, ttl=0.15)
+    assert first.try_acquire()
+    with first.hold():
+        # Collecte plus longue que ttl : le bail est renouvelé tous les ttl/3
+        time.sleep(0.45)
+        first.check()
+        assert not second.try_acquire()
+    # Renouvellement arrêté en sortie : le bail expire
+    time.sleep(0.2)
+    assert not first.is_leader
+    assert second.try_acquire()
+
+
+def test_hold_stops_when_lease_lost(tmp_path):
+    first, second = replicas(tmp_path, ttl=0.15)
+    assert first.try_acquire()
+    with first.hold():
+        # Réplique suspendue au-delà de ttl pendant qu'une autre a pris le bail
+        first._conn().execute("UPDATE lease SET holder = 'b'")
+        time.sleep(0.1)
+        # Renouvellement refusé : la collecte s'arrête à sa prochaine vérification
+        with pytest.raises(LeaseLost):
+            first.check()
+    assert second.current_holder() == 'b'
@@ -0,0 +1,60 @@
+"""
+Tests de l'encodage compact des graphiques (app.packing)
+"""
+import base64
+
+import numpy as np
+
+from app.packing import I16_MISSING, _label_format, encode_i16_delta, pack_chart_data
+
+# 2025-06-01 00:00 heure de Paris
+JUNE_MIDNIGHT = 1748728800
+
+
+def decode(series):
+    dtype = {'f32': '<f4', 'i16d': '<i2'}[series['dtype']]
+    return np.frombuffer(base64.b64decode(series['data']), dtype=dtype)
+
+
+def test_label_format():
+    assert _label_format(np.array([0, 300, 600])) == 'time'
+    assert _label_format(np.array([0, 300, 90000])) == 'datetime'
+    assert _label_format(np.array([0, 86400])) == 'date'
+
+
+def test_label_format_single_point_uses_step():
+    # Un seul point : aucun écart mesurable, le pas de chart_data décide
+    assert _label_format(np.array([JUNE_MIDNIGHT]), 86400) == 'date'
+    assert _label_format(np.array([JUNE_MIDNIGHT]), 300) == 'time'
+    assert _label_format(np.array([], dtype=np.int64)) == 'time'
+
+
+def test_pack_single_day():
+    packed = pack_chart_data({'labels': ['01/06'], 'timestamps': [JUNE_MIDNIGHT], 'step': 86400,
+                              'production': [12.5]}, 'f32', timezone='Europe/Paris')
+    assert (packed['count'], packed['base_ts'], packed['step']) == (1, JUNE_MIDNIGHT, 86400)
+    assert packed['label_format'] == 'date'
+    assert decode(packed['series']['production']).tolist() == [12.5]
+
+
+def test_pack_regular_and_irregular_steps():
+    packed = pack_chart_data({'labels': ['a', 'b', 'c'], 'timestamps': [0, 300, 600],
+                              'production': [1.0, None, 3.0], 'tempo_zones': []})
+    assert packed['step'] == 300
+    assert packed['tempo_zones'] == []
+    assert np.isnan(decode(packed['series']['production'])[1])
+
+    packed = pack_chart_data({'labels': ['a', 'b', 'c'], 'timestamps': [0, 300, 900], 'production': [1, 2, 3]})
+    assert 'step' not in packed
+    assert np.frombuffer(base64.b64decode(packed['offsets']['data']), dtype='<i4').tolist() == [0, 300, 900]
+
+
+def test_i16_delta():
+    # 1,23 kWh, absent, 1,30 kWh, 1,10 kWh en centièmes : 123, absent, +7 (depuis 123), -20
+    encoded = encode_i16_delta([1.23, None, 1.30, 1.10], scale=0.01)
+    assert decode(encoded).tolist() == [123, I16_MISSING, 7, -20]
+    # Écart hors plage int16 : repli en float32
+    assert encode_i16_delta([0, 40000]) is None
+    packed = pack_chart_data({'labels': ['a', 'b'], 'production': [0, 40000]}, 'i16')
+    assert packed['series']['production']['dtype'] == 'f32'
+    assert packed['labels'] == ['a', 'b']
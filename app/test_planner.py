@@ -0,0 +1,119 @@
+"""
+Tests du planificateur de sources (app.planner)
+Coûts par défaut : 250 ms par appel amont, 0,05 ms par cumul journalier,
+0,5 ms par journée 5 min ou par bloc en cache.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.planner import explain, plan_range
+
+
+def days_between(start, end):
+    """Dates YYYY-MM-DD de start à end inclus"""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    return [(first + timedelta(days=offset)).isoformat() for offset in range((last - first).days + 1)]
+
+
+JUNE = days_between('2025-06-01', '2025-06-30')
+
+
+def sources(plan):
+    return [(step['source'], len(step['days']), step['calls']) for step in plan['steps']]
+
+
+def test_all_stored():
+    week = JUNE[:7]
+    plan = plan_range(week, ['energy', 'income'], stored=week)
+    assert sources(plan) == [('rollup', 7, 0)]
+    assert plan['cost_ms'] == 0.35
+    assert (plan['upstream_calls'], plan['result_accuracy']) == (0, 'exact')
+
+
+def test_missing_days_approx_uses_month_block():
+    # 3 journées manquantes : un bloc mensuel (1 appel) plutôt que 3 journées
+    plan = plan_range(JUNE, ['energy'], stored=JUNE[:27])
+    assert sources(plan) == [('rollup', 27, 0), ('yield_month', 3, 1)]
+    assert plan['steps'][1]['blocks'] == ['2025-06']
+    # 27 × 0,05 + 250
+    assert plan['cost_ms'] == 251.35
+    assert plan['result_accuracy'] == 'approx'
+
+
+def test_missing_days_exact_uses_days():
+    # Précision exacte : les blocs yieldStatistics sont exclus ; 3 × (250 + 0,05) + 27 × 0,05
+    plan = plan_range(JUNE, ['energy', 'income'], accuracy='exact', stored=JUNE[:27])
+    assert sources(plan) == [('rollup', 27, 0), ('day_upstream', 3, 3)]
+    assert plan['cost_ms'] == 751.5
+    assert plan['result_accuracy'] == 'exact'
+
+
+def test_tie_prefers_exact_source():
+    # Une journée manquante : 1 appel dans les deux cas, la journée exacte l'emporte
+    plan = plan_range(JUNE, ['energy'], stored=JUNE[1:])
+    assert sources(plan) == [('day_upstream', 1, 1), ('rollup', 29, 0)]
+
+
+def test_curve_reads_store():
+    # Courbes : séries 5 min uniquement (stockage puis amont), 0,5 ms par journée stockée
+    plan = plan_range(JUNE[:3], ['curve'], stored=JUNE[:2])
+    assert sources(plan) == [('store', 2, 0), ('day_upstream', 1, 1)]
+    assert plan['cost_ms'] == 251.5
+    assert set(plan['alternatives']) == {'day_upstream'}
+
+
+def test_cached_month_block():
+    plan = plan_range(JUNE, ['energy'], stored=JUNE[:10], cached=['2025-06'])
+    assert sources(plan) == [('rollup', 10, 0), ('yield_cache', 20, 0)]
+    assert plan['steps'][1]['cost_ms'] == 0.5
+    # Revenus exacts (répartition HP/HC) : le cache n'est pas utilisable
+    plan = plan_range(JUNE, ['energy', 'income'], accuracy='exact', stored=JUNE[:10], cached=['2025-06'])
+    assert sources(plan) == [('rollup', 10, 0), ('day_upstream', 20, 20)]
+
+
+def test_year_by_month():
+    year = days_between('2024-01-01', '2024-12-31')
+    # Vue mensuelle, janvier stocké : février à décembre en un seul bloc annuel
+    plan = plan_range(year, ['energy'], granularity='month', stored=year[:31])
+    assert sources(plan) == [('rollup', 31, 0), ('yield_year', 335, 1)]
+    assert plan['steps'][1]['blocks'] == ['2024']
+    assert plan['cost_ms'] == 251.55
+    # Sans stockage ni cache : 366 journées, 12 mois ou 1 année
+    assert plan['alternatives'] == {
+        'day_upstream': {'calls': 366, 'cost_ms': 91518.3},
+        'yield_month': {'calls': 12, 'cost_ms': 3000.0},
+        'yield_year': {'calls': 1, 'cost_ms': 250.0}
+    }
+    # Vue journalière : un bloc annuel ne donne que des totaux mensuels
+    plan = plan_range(year, ['energy'], stored=year[:31])
+    assert [step['source'] for step in plan['steps']] == ['rollup', 'yield_month']
+    assert plan['upstream_calls'] == 11
+
+
+def test_year_block_needs_more_than_one_call():
+    # Un seul mois à récupérer : bloc mensuel, pas annuel
+    days = days_between('2025-05-01', '2025-06-30')
+    plan = plan_range(days, ['energy'], granularity='month', stored=days[:31])
+    assert sources(plan) == [('rollup', 31, 0), ('yield_month', 30, 1)]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        plan_range(JUNE, ['power'])
+    with pytest.raises(ValueError):
+        plan_range(JUNE, [])
+    with pytest.raises(ValueError):
+        plan_range(JUNE, ['energy'], accuracy='rough')
+    with pytest.raises(ValueError):
+        plan_range(JUNE, ['energy'], granularity='week')
+
+
+def test_explain():
+    lines = explain(plan_range(JUNE, ['energy'], stored=JUNE[:27]))
+    assert lines[0] == ("Plan energy (approx, day) sur 30 jours : 1 appel(s) amont, "
+                        "coût estimé 251.35 ms, résultat approx")
+    assert lines[1] == "  -> rollup        2025-06-01..2025-06-27 : 27 jour(s), 0 appel(s), 1.35 ms (exact)"
+    assert lines[2] == ("  -> yield_month   2025-06-28..2025-06-30 : 3 jour(s), blocs 2025-06, "
+                        "1 appel(s), 250.0 ms (approx)")
+    assert lines[3] == "  (sans stockage ni cache, day_upstream : 30 appel(s), 7501.5 ms)"
@@ -0,0 +1,86 @@
+"""
+Tests des esquisses de quantiles (app.sketch)
+GAMMA = 1,01 / 0,99 : ln(100) / ln(GAMMA) = 230,25, la valeur 100 tombe dans le
+seau 231, dont le milieu relatif 2 × GAMMA^231 / (GAMMA + 1) vaut 100,49.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from app.sketch import RELATIVE_ACCURACY, PowerSketch
+
+
+def test_from_values():
+    sketch = PowerSketch.from_values([0.0, 0.5, math.nan, 100.0, 100.0, 100.0, 1000.0])
+    assert sketch.keys.tolist() == [231, 346]
+    assert sketch.counts.tolist() == [3, 1]
+    assert (sketch.zeros, sketch.count) == (2, 6)
+    assert (sketch.min, sketch.max) == (0.0, 1000.0)
+
+
+def test_quantile():
+    sketch = PowerSketch.from_values([0.0, 0.0, 100.0, 100.0, 100.0, 1000.0])
+    # Rang 0,2 × 5 = 1 : deuxième valeur nulle
+    assert sketch.quantile(0.2) == 0.0
+    # Rang 0,5 × 5 = 2,5 : troisième valeur (seau 231)
+    assert sketch.quantile(0.5) == pytest.approx(100.49456770856492)
+    # Maximum exact
+    assert sketch.quantile(1.0) == 1000.0
+    # Sans les nulles : rang 0,5 × 3 = 1,5 dans [100, 100, 100, 1000]
+    assert sketch.quantile(0.5, nonzero=True) == pytest.approx(100.49456770856492)
+    assert sketch.quantile(0.0, nonzero=True) == pytest.approx(100.49456770856492)
+
+
+def test_quantile_bounded_by_extremes():
+    # Le milieu du seau (250,6) est ramené à la seule valeur observée
+    sketch = PowerSketch.from_values([250.0, 250.0])
+    assert sketch.quantile(0.0) == 250.0
+    assert sketch.quantile(1.0) == 250.0
+
+
+def test_quantile_accuracy():
+    values = np.random.default_rng(7).lognormal(7, 1.5, 20000)
+    sketch = PowerSketch.from_values(values)
+    ordered = np.sort(values)
+    for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999):
+        exact = ordered[int(q * (values.size - 1))]
+        assert abs(sketch.quantile(q) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_empty():
+    assert PowerSketch().quantile(0.5) is None
+    assert PowerSketch.from_values([math.nan]).count == 0
+    assert PowerSketch.merge([]).quantile(0.5) is None
+    # Uniquement des nulles : aucun quantile hors nuit
+    assert PowerSketch.from_values([0.0, 0.2]).quantile(0.5, nonzero=True) is None
+
+
+def test_merge_equals_sketch_of_union():
+    rng = np.random.default_rng(3)
+    parts = [rng.uniform(0, 5000, 288) for _ in range(3)]
+    parts[1][:100] = 0
+    merged = PowerSketch.merge([PowerSketch.from_values(part) for part in parts] + [PowerSketch()])
+    whole = PowerSketch.from_values(np.concatenate(parts))
+    assert merged.keys.tolist() == whole.keys.tolist()
+    assert merged.counts.tolist() == whole.counts.tolist()
+    assert (merged.zeros, merged.min, merged.max) == (whole.zeros, whole.min, whole.max)
+
+
+def test_merge_counts():
+    merged = PowerSketch.merge([PowerSketch.from_values([100.0, 0.0]), PowerSketch.from_values([100.0, 1000.0])])
+    assert merged.keys.tolist() == [231, 346]
+    assert merged.counts.tolist() == [2, 1]
+    assert (merged.zeros, merged.min, merged.max) == (1, 0.0, 1000.0)
+
+
+def test_row_round_trip():
+    sketch = PowerSketch.from_values([0.0, 100.0, 1000.0])
+    restored = PowerSketch.from_row(*sketch.to_row())
+    assert restored.keys.tolist() == [231, 346]
+    assert restored.counts.tolist() == [1, 1]
+    assert (restored.zeros, restored.min, restored.max) == (1, 0.0, 1000.0)
+    # Esquisse vide : extrêmes stockés à NULL
+    row = PowerSketch().to_row()
+    assert row[3:] == (None, None)
+    assert math.isnan(PowerSketch.from_row(*row).min)
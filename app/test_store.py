@@ -0,0 +1,132 @@
+"""
+Tests du stockage des séries (app.store) sur une journée synthétique en UTC :
+production de 1200 W de 12h à 13h (créneaux 144 à 155), soit 1,2 kWh,
+consommation de 500 W sur la même heure.
+"""
+import numpy as np
+import pytest
+import pytz
+
+from app.store import CHANNELS, SLOT_SECONDS, SeriesStore, day_grid
+
+DAY = '2025-06-02'
+BASE_TS, SLOTS = day_grid(DAY, pytz.utc)
+NOON = 144
+
+
+def stats(yield_power, consume_power=None, start=NOON):
+    """Réponse queryPlantPowerStatistics : un point toutes les 5 min à partir du créneau start"""
+    yield_power = list(yield_power)
+    consume_power = [500.0] * len(yield_power) if consume_power is None else list(consume_power)
+    return {'timePoint': [BASE_TS + (start + i) * SLOT_SECONDS for i in range(len(yield_power))],
+            'yieldPower': yield_power, 'consumePower': consume_power}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path / 'series.db'), tz=pytz.utc)
+
+
+def grid(store, channel='yieldPower'):
+    return store.get_days('1', [DAY], channels=[channel])[0][channel]['mean']
+
+
+def rollup(store, column):
+    return store.get_rollups([DAY])[column][0]
+
+
+def test_merge_new_day(store):
+    # Journée absente : enregistrée entière, créneaux renseignés par canal
+    changes = store.merge_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 12), complete=False)
+    assert changes == {channel: 12 if channel in ('yieldPower', 'consumePower') else 0 for channel in CHANNELS}
+    assert rollup(store, 'production') == pytest.approx(1.2)
+
+
+def test_merge_unchanged_day(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 12), complete=True)
+    updated_at = store.day_status('1', [DAY])[DAY]['updated_at']
+    # Même contenu amont : empreintes identiques, rien n'est relu ni réécrit
+    assert store.merge_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 12), complete=True) == {}
+    # Écart sous la précision float32 du stockage : même empreinte
+    assert store.merge_day('1', DAY, BASE_TS, SLOTS, stats([1200.00001] * 12), complete=True) == {}
+    assert store.day_status('1', [DAY])[DAY]['updated_at'] == updated_at
+
+
+def test_merge_revised_points(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 12), complete=False)
+    # Point 12h05 révisé à 2400 W, point 13h ajouté ; consommation inchangée
+    revised = stats([1200.0, 2400.0] + [1200.0] * 11, [500.0] * 12)
+    assert store.merge_day('1', DAY, BASE_TS, SLOTS, revised, complete=True) == {'yieldPower': 2}
+
+    values = grid(store)
+    assert values[[NOON, NOON + 1, NOON + 12]].tolist() == [1200, 2400, 1200]
+    assert np.isnan(values[NOON + 13])
+    # Pyramide et cumul recalculés : 1,2 kWh + 100 Wh révisés (1200 W × 5 min) + 100 Wh ajoutés
+    assert store.get_days('1', [DAY], level=12, channels=['yieldPower'])[0]['yieldPower']['max'][12] == 2400
+    assert rollup(store, 'production') == pytest.approx(1.4)
+    assert rollup(store, 'peak_w') == 2400
+    assert store.day_status('1', [DAY])[DAY]['complete']
+    # Révision enregistrée : le même contenu n'est plus signalé
+    assert store.merge_day('1', DAY, BASE_TS, SLOTS, revised, complete=True) == {}
+
+
+def test_merge_keeps_points_missing_upstream(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 12), complete=True)
+    # Réponse tronquée (6 points) : les points absents conservent la valeur stockée
+    assert store.merge_day('1', DAY, BASE_TS, SLOTS, stats([1200.0] * 6), complete=False) == {}
+    assert grid(store)[NOON:NOON + 12].tolist() == [1200] * 12
+    assert rollup(store, 'production') == pytest.approx(1.2)
+    # Une journée close ne redevient pas ouverte
+    assert store.day_status('1', [DAY])[DAY]['complete']
+
+
+# Heure de 12h avec une pointe à 3000 W (12h30) et une mesure manquante (12h35) :
+# (10 × 1200 + 3000) W × 5 min = 1,25 kWh
+PEAK_HOUR = [1200.0] * 6 + [3000.0, np.nan] + [1200.0] * 4
+
+
+def energy_kwh(entry, channel='yieldPower'):
+    return float(np.nansum(entry[channel]['mean'])) * entry['step'] / 3600 / 1000
+
+
+def test_compact_15min_preserves_energy_and_peak(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats(PEAK_HOUR), complete=True)
+    assert store.compact(before_15min='2025-06-03') == {'15min': 1, 'hour': 0}
+
+    # Niveau 5 min supprimé : lecture repliée sur le 15 min
+    entry = store.get_days('1', [DAY])[0]
+    assert (entry['level'], entry['step'], entry['points']) == (3, 900, 96)
+    # Point 12h30-12h45 incomplet : moyenne « énergie » (3000 + 1200) / 3, pas (3000 + 1200) / 2
+    assert entry['yieldPower']['mean'][50] == pytest.approx(1400)
+    assert entry['yieldPower']['max'][50] == 3000
+    assert entry['yieldPower']['min'][50] == 1200
+    assert energy_kwh(entry) == pytest.approx(1.25)
+    assert rollup(store, 'production') == pytest.approx(1.25)
+    assert rollup(store, 'peak_w') == 3000
+
+
+def test_compact_hour_preserves_energy_and_peak(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats(PEAK_HOUR), complete=True)
+    store.compact(before_15min='2025-06-03')
+    # Deuxième palier depuis le 15 min : niveaux 5 et 15 min supprimés
+    assert store.compact(before_hour='2025-06-03') == {'15min': 0, 'hour': 1}
+
+    entry = store.get_days('1', [DAY], level=3)[0]
+    assert (entry['level'], entry['step'], entry['points']) == (12, 3600, 24)
+    assert entry['yieldPower']['mean'][12] == pytest.approx(1250)
+    assert (entry['yieldPower']['min'][12], entry['yieldPower']['max'][12]) == (1200, 3000)
+    assert energy_kwh(entry) == pytest.approx(1.25)
+    assert energy_kwh(store.get_days('1', [DAY], level=0)[0]) == pytest.approx(1.25)
+    # Cumul et esquisses conservés : énergie, pointe et quantiles de la journée
+    assert rollup(store, 'production') == pytest.approx(1.25)
+    assert rollup(store, 'peak_w') == 3000
+    assert store.get_sketches('1', [DAY])['sketches']['yieldPower'].max == 3000
+
+
+def test_compact_skips_open_and_recent_days(store):
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats(PEAK_HOUR), complete=False)
+    # Journée en cours : jamais compactée ; date limite exclue
+    assert store.compact(before_15min='2025-06-03', before_hour='2025-06-03') == {'15min': 0, 'hour': 0}
+    store.put_day('1', DAY, BASE_TS, SLOTS, stats(PEAK_HOUR), complete=True)
+    assert store.compact(before_15min=DAY, before_hour=DAY) == {'15min': 0, 'hour': 0}
+    assert store.get_days('1', [DAY])[0]['level'] == 1
@@ -0,0 +1,127 @@
+"""
+Tests du flux SSE (app.stream) : historique, rejeu Last-Event-ID et reset
+"""
+import threading
+
+import pytest
+
+from app.leader import LeaseLost
+from app.stream import EventBroker, SlotPoller, format_sse
+
+
+def event_ids(blocks):
+    """Identifiants (ou 'reset') des blocs SSE"""
+    ids = []
+    for block in blocks:
+        if block.startswith('id: '):
+            ids.append(int(block.split('\n', 1)[0][4:]))
+        elif 'event: reset' in block:
+            ids.append('reset')
+    return ids
+
+
+def replay(broker, last_id):
+    """Blocs envoyés immédiatement à un client qui (re)se connecte"""
+    return [block for _, block in broker._replay(last_id)]
+
+
+def test_format_sse():
+    assert format_sse(7, 'tempo', {'couleur': 'BLEU', 'é': 1}) == 'id: 7\nevent: tempo\ndata: {"couleur":"BLEU","é":1}\n\n'
+    assert format_sse(None, 'reset', {}) == 'event: reset\ndata: {}\n\n'
+
+
+def test_publish_ids_and_latest_state():
+    broker = EventBroker(history_size=10)
+    assert [broker.publish(kind, {'n': n}) for n, kind in enumerate(['realtime', 'points', 'realtime'])] == [1, 2, 3]
+    # Nouveau client : dernier état de chaque type, dans l'ordre des identifiants
+    assert event_ids(replay(broker, None)) == [2, 3]
+
+
+def test_replay_after_last_event_id():
+    broker = EventBroker(history_size=10)
+    for n in range(5):
+        broker.publish('points', {'n': n})
+    assert event_ids(replay(broker, 2)) == [3, 4, 5]
+    assert replay(broker, 5) == []
+
+
+def test_replay_expired_history():
+    # Historique de 3 : événements 3, 4, 5 conservés
+    broker = EventBroker(history_size=3)
+    for n in range(5):
+        broker.publish('realtime' if n % 2 else 'points', {'n': n})
+    # Dernier reçu 2 : l'événement 3 suit directement, pas de trou
+    assert event_ids(replay(broker, 2)) == [3, 4, 5]
+    # Dernier reçu 1 : l'événement 2 est perdu, reset puis dernier état de chaque type
+    assert event_ids(replay(broker, 1)) == ['reset', 4, 5]
+
+
+def test_replay_unknown_id_after_restart():
+    broker = EventBroker()
+    broker.publish('realtime', {'n': 1})
+    blocks = replay(broker, 42)
+    assert blocks[0] == 'event: reset\ndata: {"reason":"history_expired"}\n\n'
+    assert event_ids(blocks) == ['reset', 1]
+
+
+def test_listen_heartbeat_and_wakeup():
+    broker = EventBroker()
+    broker.publish('realtime', {'n': 1})
+    stream = broker.listen(last_id=1, heartbeat=0.01)
+    # Rien de nouveau : commentaire keep-alive
+    assert next(stream) == ': ping\n\n'
+
+    stream = broker.listen(last_id=1, heartbeat=5)
+    threading.Timer(0.05, broker.publish, ('points', {'n': 2})).start()
+    # Réveillé par la publication, sans attendre le keep-alive
+    assert event_ids([next(stream)]) == [2]
+
+
+class FakeLease:
+    def __init__(self, leader=True):
+        self.leader = leader
+
+    def check(self):
+        if not self.leader:
+            raise LeaseLost('bail perdu')
+
+
+class FakeShared:
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+
+def test_slot_poller_publishes_changes_only():
+    broker = EventBroker()
+    poller = SlotPoller(broker, collect=None)
+    snapshot = {'realtime': {'power': 1200}, 'points': [{'t': 300}, {'t': 600}],
+                'tempo': {'success': True, 'couleur': 'BLEU', 'horaire': 'HP'}}
+    poller.publish(snapshot)
+    # Même instantané : rien de nouveau
+    poller.publish(snapshot)
+    # Nouveau point seulement
+    poller.publish({**snapshot, 'points': [{'t': 300}, {'t': 600}, {'t': 900}]})
+
+    blocks = replay(broker, 0)
+    assert [block.split('\n')[1] for block in blocks] == ['event: realtime', 'event: points', 'event: tempo',
+                                                          'event: points']
+    assert blocks[3].endswith('data: {"points":[{"t":900}]}\n\n')
+
+
+def test_slot_poller_lease_lost():
+    broker = EventBroker()
+    shared = FakeShared()
+    poller = SlotPoller(broker, collect=lambda: {'realtime': {'power': 1}}, lease=FakeLease(leader=False), shared=shared)
+    # Bail perdu pendant la collecte : ni partage ni publication
+    with pytest.raises(LeaseLost):
+        poller.poll_once()
+    assert shared.values == {}
+    assert replay(broker, None) == []
+
+    poller.lease.leader = True
+    poller.poll_once()
+    assert shared.values[SlotPoller.SNAPSHOT_KEY] == {'realtime': {'power': 1}}
+    assert event_ids(replay(broker, None)) == [1]
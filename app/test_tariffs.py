@@ -0,0 +1,130 @@
+"""
+Tests du comparateur de contrats (app.tariffs)
+Journée synthétique : consommation constante de 1200 W (0,1 kWh par créneau),
+production de 2400 W de 10h à 14h (48 créneaux à 0,2 kWh). Sur la journée :
+consommation 28,8 kWh, autoconsommation 4,8 kWh, soutirage 24 kWh dont 9,6 kWh
+en heures creuses (22h-6h, 96 créneaux), injection 4,8 kWh.
+"""
+import numpy as np
+import pytest
+import pytz
+
+from app.store import SLOT_SECONDS
+from app.tariffs import _hc_mask, _parse_window, compare_plans, energy_flows, local_minutes, parse_plans, price_matrix
+
+PARIS = pytz.timezone('Europe/Paris')
+
+# 2025-06-02 00:00 heure de Paris (UTC+2)
+JUNE_MIDNIGHT = 1748815200
+# 2025-03-30 00:00 heure de Paris (UTC+1), journée de 23 h
+SPRING_MIDNIGHT = 1743289200
+
+
+def make_day(day, base_ts, slots=288):
+    """Journée du stockage : 1200 W consommés, 2400 W produits de 10h à 14h (heure locale du créneau)"""
+    consumption = np.full(slots, 1200.0)
+    production = np.zeros(slots)
+    production[120:168] = 2400.0
+    return {'day': day, 'base_ts': base_ts, 'slots': slots, 'points': slots, 'step': SLOT_SECONDS,
+            'yieldPower': {'mean': production}, 'consumePower': {'mean': consumption}}
+
+
+def test_parse_window():
+    assert _parse_window('22:00-06:00') == (1320, 360)
+    assert _parse_window('12:30-24:00') == (750, 1440)
+    with pytest.raises(ValueError):
+        _parse_window('25:00-06:00')
+    with pytest.raises(ValueError):
+        _parse_window('22h-6h')
+
+
+def test_hc_mask_across_midnight():
+    minutes = np.array([0, 359, 360, 1319, 1320, 1439])
+    assert _hc_mask(minutes, ((1320, 360),)).tolist() == [True, True, False, False, True, True]
+    # Deux plages disjointes dans la journée
+    assert _hc_mask(minutes, ((0, 1), (360, 1320))).tolist() == [True, False, True, True, False, False]
+
+
+def test_local_minutes_dst():
+    # Le 30 mars 2025, 2h UTC+1 devient 3h UTC+2 : le créneau de 2h après minuit est à 3h locale
+    timestamps = SPRING_MIDNIGHT + np.array([0, 3600, 7200, 7500])
+    assert local_minutes(timestamps, PARIS).tolist() == [0, 60, 180, 185]
+
+
+def test_energy_flows():
+    flows = energy_flows([make_day('2025-06-02', JUNE_MIDNIGHT)], PARIS)
+    assert flows['days'] == ['2025-06-02']
+    assert flows['minute'][:3].tolist() == [0, 5, 10]
+    assert flows['consumption'].sum() == pytest.approx(28.8)
+    assert flows['self_consumed'].sum() == pytest.approx(4.8)
+    assert flows['import'].sum() == pytest.approx(24.0)
+    assert flows['export'].sum() == pytest.approx(4.8)
+    assert flows['hours'][0] == pytest.approx(1 / 12)
+
+
+def test_energy_flows_short_day():
+    # 276 créneaux ; la production (indices 120 à 167) couvre alors 11h à 15h locale
+    flows = energy_flows([make_day('2025-03-30', SPRING_MIDNIGHT, slots=276)], PARIS)
+    assert flows['minute'][[23, 24, 120, 275]].tolist() == [115, 180, 660, 1435]
+    assert flows['import'].sum() == pytest.approx(22.8)
+
+
+def test_parse_plans_errors():
+    with pytest.raises(ValueError):
+        parse_plans([{'type': 'base', 'name': 'a', 'price': 0.2}, {'type': 'base', 'name': 'a', 'price': 0.3}], [0.1])
+    with pytest.raises(ValueError):
+        parse_plans([{'type': 'hphc', 'hp': 0.25}], [0.1])
+    with pytest.raises(ValueError):
+        parse_plans([{'type': 'curve', 'prices': [0.1] * 7}], [0.1])
+    with pytest.raises(ValueError):
+        parse_plans([], [0.1])
+
+
+def test_price_matrix():
+    flows = energy_flows([make_day('2025-06-02', JUNE_MIDNIGHT)], PARIS)
+    plans = parse_plans([
+        {'type': 'hphc', 'name': 'hphc', 'hp': 0.25, 'hc': 0.15},
+        {'type': 'curve', 'name': 'curve', 'prices': [hour / 100 for hour in range(24)]},
+        {'type': 'tempo', 'name': 'tempo', 'rates': {'bleu': {'HP': 0.2, 'HC': 0.1},
+                                                     'blanc': {'HP': 0.3, 'HC': 0.12},
+                                                     'rouge': {'HP': 0.7, 'HC': 0.15}}}
+    ], [0.1])
+    tempo = {'2025-06-02': {'couleur': 'ROUGE', 'tarif_hp': 0.5, 'tarif_hc': 0.11}}
+    matrix = price_matrix(plans, flows, tempo)
+    # Créneaux de 0h, 6h, 10h15 et 22h
+    slots = [0, 72, 123, 264]
+    assert matrix[0, slots].tolist() == [0.15, 0.25, 0.25, 0.15]
+    assert matrix[1, slots].tolist() == [0.0, 0.06, 0.1, 0.22]
+    assert matrix[2, slots].tolist() == [0.15, 0.7, 0.7, 0.15]
+    # Couleur absente des tarifs du contrat : tarifs de repli de la journée
+    tempo['2025-06-02']['couleur'] = 'inconnue'
+    assert price_matrix(plans, flows, tempo)[2, slots].tolist() == [0.11, 0.5, 0.5, 0.11]
+    with pytest.raises(ValueError):
+        price_matrix(plans, flows)
+
+
+def test_compare_plans():
+    flows = energy_flows([make_day('2025-06-02', JUNE_MIDNIGHT)], PARIS)
+    plans = parse_plans([
+        {'type': 'base', 'name': 'base', 'price': 0.2, 'subscription': 365},
+        {'type': 'hphc', 'name': 'hphc', 'hp': 0.25, 'hc': 0.15}
+    ], [0.1])
+    comparison = compare_plans(plans, flows)
+    assert comparison['energy'] == {'consumption_kwh': 28.8, 'self_consumed_kwh': 4.8,
+                                    'import_kwh': 24.0, 'export_kwh': 4.8}
+    hphc, base = comparison['results']
+
+    # HP/HC : 9,6 kWh × 0,15 + 14,4 kWh × 0,25 - 4,8 kWh × 0,1 ; sans panneaux 9,6 × 0,15 + 19,2 × 0,25
+    assert (hphc['plan'], hphc['rank']) == ('hphc', 1)
+    assert hphc['energy_cost'] == pytest.approx(5.04)
+    assert hphc['cost'] == pytest.approx(4.56)
+    assert hphc['cost_without_solar'] == pytest.approx(6.24)
+    assert hphc['savings'] == pytest.approx(1.68)
+    assert hphc['avg_import_price'] == pytest.approx(0.21)
+
+    # Base : 24 kWh × 0,2 + abonnement d'une journée (365 €/an) - 0,48 € de revente
+    assert (base['plan'], base['rank']) == ('base', 2)
+    assert base['subscription'] == pytest.approx(1.0)
+    assert base['cost'] == pytest.approx(5.32)
+    assert base['cost_without_solar'] == pytest.approx(6.76)
+    assert base['delta_vs_best'] == pytest.approx(0.76)
@@ -0,0 +1,143 @@
+"""
+Traçage léger des requêtes (spans) et profilage à la demande
+Chaque requête HTTP ouvre une trace (contextvars) ; les appels amont
+(HyxiAPIClient, TempoAPI) et les phases des handlers y ajoutent des spans.
+Hors requête tracée, span() ne coûte qu'une lecture de contextvar. Les
+tâches parallèles lancées avec contextvars.copy_context() partagent la trace
+de la requête qui les a créées.
+
+La trace est restituée dans l'en-tête Server-Timing (durée cumulée et nombre
+d'occurrences par nom de span) et peut être journalisée en JSON.
+"""
+import contextvars
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+CURRENT_TRACE = contextvars.ContextVar('current_trace', default=None)
+
+
+class Trace:
+    """Spans d'une requête (ajouts thread-safe : tâches parallèles incluses)"""
+
+    def __init__(self, name: str, max_spans: int = 2000):
+        self.name = name
+        self.start = time.perf_counter()
+        self.max_spans = max_spans
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, duration: float, error: bool = False):
+        span = {'name': name, 'start_ms': round((start - self.start) * 1000, 2),
+                'dur_ms': round(duration * 1000, 2), 'thread': threading.current_thread().name}
+        if error:
+            span['error'] = True
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def elapsed(self) -> float:
+        """Durée écoulée depuis le début de la trace (s)"""
+        return time.perf_counter() - self.start
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{nom: {'dur_ms': cumul, 'count': occurrences}} dans l'ordre de première apparition"""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            total = totals.setdefault(span['name'], {'dur_ms': 0.0, 'count': 0})
+            total['dur_ms'] += span['dur_ms']
+            total['count'] += 1
+        return totals
+
+    def server_timing(self) -> str:
+        """
+        Valeur de l'en-tête Server-Timing
+        Les spans parallèles se chevauchent : leur cumul peut dépasser 'total'.
+        """
+        entries = []
+        for name, total in self.summary().items():
+            entry = f"{name};dur={total['dur_ms']:.1f}"
+            if total['count'] > 1:
+                entry += f';desc="x{total["count"]}"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ', '.join(entries)
+
+    def to_json(self, **fields) -> str:
+        """Trace complète en une ligne JSON (journalisation structurée)"""
+        with self._lock:
+            spans = list(self.spans)
+        return json.dumps({'trace': self.name, 'total_ms': round(self.elapsed() * 1000, 2),
+                           'spans': spans, 'dropped': self.dropped, **fields}, ensure_ascii=False)
+
+
+def start_trace(name: str) -> Trace:
+    """Ouvre la trace de la requête courante"""
+    trace = Trace(name)
+    CURRENT_TRACE.set(trace)
+    return trace
+
+
+def end_trace(trace: Trace):
+    """Ferme la trace si elle est encore la trace courante (threads réutilisés entre requêtes)"""
+    if CURRENT_TRACE.get() is trace:
+        CURRENT_TRACE.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return CURRENT_TRACE.get()
+
+
+@contextmanager
+def span(name: str):
+    """Mesure le bloc dans la trace courante (sans effet hors requête tracée)"""
+    trace = CURRENT_TRACE.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        trace.add(name, start, time.perf_counter() - start, error)
+
+
+def record(name: str, start: float, error: bool = False):
+    """Ajoute un span déjà chronométré (start : time.perf_counter() au début)"""
+    trace = CURRENT_TRACE.get()
+    if trace is not None:
+        trace.add(name, start, time.perf_counter() - start, error)
+
+
+def profile_summary(profiler, top: int = 30) -> Dict[str, Any]:
+    """
+    Résumé cProfile d'une requête (fonctions triées par temps cumulé)
+    Seul le thread de la requête est profilé ; les tâches parallèles
+    apparaissent comme des attentes.
+    """
+    import io
+    import pstats  # Chargé au premier profilage seulement
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, function), (primitive_calls, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{filename}:{line}({function})",
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3)
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return {'total_ms': round(stats.total_tt * 1000, 2), 'functions': len(rows), 'top': rows[:top]}
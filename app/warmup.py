@@ -0,0 +1,136 @@
+"""
+Préchauffage au démarrage d'un worker
+Les tâches (token, installations, journée en cours, saison Tempo, agrégats du
+mois...) sont lancées en parallèle dans un thread d'arrière-plan, sous une
+limite de temps globale : le worker sert les requêtes dès son import, et
+l'endpoint de disponibilité indique quand le préchauffage est terminé.
+
+Le préchauffage n'est lancé que par le serveur (voir start) : un script qui
+importe l'application n'interroge pas l'API pour autant.
+
+Une tâche qui dépasse la limite n'est pas interrompue (elle finit de remplir
+les caches en arrière-plan) mais n'est plus attendue.
+
+Plusieurs workers (Gunicorn) démarrent en même temps : avec un cache partagé,
+un seul worker réserve le préchauffage et interroge l'amont ; les autres
+attendent sa fin puis exécutent les mêmes tâches, servies par le cache partagé
+et le stockage local (copies locales au processus, ex : jours Tempo).
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class WarmUp:
+    """Tâches de préchauffage concurrentes bornées par une limite de temps"""
+
+    # Clés du cache partagé : réservation du préchauffage, fin du préchauffage du worker réservataire
+    CLAIM_KEY = 'warmup:claim'
+    DONE_KEY = 'warmup:done'
+
+    def __init__(self, timeout: float = 20, workers: int = 4, shared=None, poll_interval: float = 0.2):
+        """
+        Args:
+            timeout: Durée maximale (s) avant de déclarer le worker prêt
+            workers: Tâches exécutées simultanément
+            shared: Cache partagé entre workers (add/get/set, voir app.cache) ; None = chaque
+                worker préchauffe seul
+            poll_interval: Période (s) de vérification de la fin du préchauffage réservé
+        """
+        self.timeout = timeout
+        self.workers = workers
+        self.shared = shared
+        self.poll_interval = poll_interval
+        self.role = 'owner'
+        self.tasks: List[Tuple[str, Callable[[], Any]]] = []
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name: str, fn: Callable[[], Any]):
+        """Ajoute une tâche (fn sans argument ; une exception la marque en échec)"""
+        self.tasks.append((name, fn))
+
+    def start(self):
+        """Lance le préchauffage dans un thread d'arrière-plan (idempotent, sans effet après skip)"""
+        if self.started_at is not None:
+            return
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.time()
+                self._thread = threading.Thread(target=self.run, name='warm-up', daemon=True)
+                self._thread.start()
+
+    def skip(self):
+        """Préchauffage désactivé : le worker est prêt immédiatement"""
+        self.started_at = self.finished_at = time.time()
+        self._done.set()
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Exécute les tâches en parallèle jusqu'à la limite de temps
+
+        Returns:
+            {nom: {'status': 'ok' | 'error' | 'timeout', 'duration_ms', 'error'?}}
+        """
+        if self.started_at is None:
+            self.started_at = time.time()
+        deadline = self.started_at + self.timeout
+
+        if self.shared is not None and not self.shared.add(self.CLAIM_KEY, self.started_at, ttl=self.timeout):
+            # Un autre worker interroge l'amont : attendre sa fin, les tâches liront ensuite ses résultats
+            self.role = 'follower'
+            while self.shared.get(self.DONE_KEY) is None and time.time() < deadline:
+                time.sleep(self.poll_interval)
+
+        def timed(name, fn):
+            start = time.perf_counter()
+            try:
+                fn()
+                result = {'status': 'ok'}
+            except Exception as e:
+                print(f"Erreur préchauffage {name}: {e}")
+                result = {'status': 'error', 'error': str(e)}
+            result['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self.results[name] = result
+
+        # Pas de with : l'arrêt attendrait les tâches qui dépassent la limite
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='warm-up')
+        futures = {executor.submit(contextvars.copy_context().run, timed, name, fn): name
+                   for name, fn in self.tasks}
+        wait(futures, timeout=max(deadline - time.time(), 0))
+        executor.shutdown(wait=False)
+        if self.shared is not None and self.role == 'owner':
+            self.shared.set(self.DONE_KEY, time.time(), ttl=self.timeout)
+
+        for name in futures.values():
+            self.results.setdefault(name, {'status': 'timeout'})
+        self.finished_at = time.time()
+        self._done.set()
+        failed = [name for name, result in self.results.items() if result['status'] != 'ok']
+        print(f"🔥 Préchauffage terminé en {self.finished_at - self.started_at:.2f} s"
+              + (f" (incomplet : {', '.join(failed)})" if failed else ""))
+        return self.results
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin du préchauffage (True si terminé)"""
+        return self._done.wait(timeout)
+
+    def describe(self) -> Dict[str, Any]:
+        """État pour l'endpoint de disponibilité"""
+        now = self.finished_at or time.time()
+        return {
+            'ready': self.ready,
+            'role': self.role,
+            'elapsed_ms': round((now - self.started_at) * 1000, 1) if self.started_at else 0,
+            'tasks': {name: dict(self.results.get(name, {'status': 'pending'})) for name, _ in self.tasks}
+        }
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des chemins de calcul (sans appel réseau)
+Données synthétiques 5 min (jour, mois, année, plusieurs années) produites par
+fake_upstream.Synthetic ; client Hyxi et API Tempo remplacés par des bouchons
+renvoyant ces données. Chaque chemin est chronométré (médiane, min, max sur
+plusieurs passes, caches amont chauds), puis mesuré une fois sous tracemalloc
+(pic mémoire, mémoire et blocs conservés).
+
+Les mesures peuvent être enregistrées comme référence (--save) et comparées à
+une référence précédente (--compare) : code de sortie 1 si un chemin régresse
+au-delà du seuil.
+
+Exemples :
+    python benchmark.py --save avant
+    python benchmark.py --compare avant --threshold 15
+    python benchmark.py --sizes day,month --only day_period,realtime --repeat 10
+"""
+import argparse
+import contextlib
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+import fake_upstream
+
+# Références enregistrées (répertoire ignoré par git, comme le stockage local)
+BASELINE_DIR = os.path.join('data', 'benchmarks')
+
+# Dernière journée des données synthétiques (fixe : mesures reproductibles)
+END_DATE = '2025-06-30'
+
+
+# Catalogue comparé par le chemin 'tariffs' : 40 contrats × 3 prix de revente
+TARIFF_PLANS = (
+    [{'name': 'Base', 'type': 'base', 'price': 0.2516, 'subscription': 140},
+     {'name': 'Tempo', 'type': 'tempo', 'subscription': 150}]
+    + [{'name': f'HPHC {i}', 'type': 'hphc', 'hp': 0.27 + i * 0.002, 'hc': 0.2068 - i * 0.002,
+        'hc_windows': ['22:00-06:00'] if i % 2 else ['23:00-07:00'], 'subscription': 150} for i in range(18)]
+    + [{'name': f'Courbe {i}', 'type': 'curve', 'prices': [0.15 + 0.01 * ((hour + i) % 24) for hour in range(24)]}
+       for i in range(20)]
+)
+
+# Grille simulée par le chemin 'battery' : 5 capacités × 5 puissances × 2 rendements = 50 scénarios
+BATTERY_GRID = ((2.5, 5, 10, 15, 20), (1.5, 2.5, 3.5, 5, 7.5), (0.9, 0.95))
+
+
+def configure_environment(workdir):
+    """Isole l'application : stockage et cache temporaires, amont injoignable si un appel échappe aux bouchons"""
+    os.environ.update({
+        'HYXI_API_BASE_URL': 'http://127.0.0.1:9',
+        'TEMPO_API_BASE_URL': 'http://127.0.0.1:9',
+        'HYXI_ACCESS_KEY': 'bench-ak',
+        'HYXI_SECRET_KEY': 'bench-sk',
+        'PLANT_ID': 'FAKE0001',
+        'STORE_PATH': os.path.join(workdir, 'hyxi.db'),
+        'CACHE_URL': 'memory://',
+        'LEADER_ELECTION': 'False',
+        'FLEET_POLLING': 'False',
+        'WARMUP_ENABLED': 'False',
+        'DEBUG': 'False'
+    })
+
+
+class Dataset:
+    """Séries 5 min et agrégats journaliers synthétiques sur une période se terminant à END_DATE"""
+
+    def __init__(self, synthetic, plant_id, days):
+        self.plant_id = plant_id
+        end = datetime.strptime(END_DATE, '%Y-%m-%d')
+        self.days = [(end - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days - 1, -1, -1)]
+        self.per_day = {day: synthetic.day(plant_id, day) for day in self.days}
+
+        # Réponse queryPlantPowerStatistics couvrant toute la période (boucles par point)
+        keys = list(self.per_day[self.days[0]].keys())
+        self.series = {key: [value for day in self.days for value in self.per_day[day][key]] for key in keys}
+
+        # Réponse queryPlantYieldStatistics (un point par jour, kWh)
+        to_kwh = 300 / 3600 / 1000
+        self.daily = {'timePoint': [], 'yield': [], 'consume': [], 'buyYield': [], 'sellYield': []}
+        for day in self.days:
+            data = self.per_day[day]
+            self.daily['timePoint'].append(data['timePoint'][0])
+            for key, channel in (('yield', 'yieldPower'), ('consume', 'consumePower'),
+                                 ('buyYield', 'buyPower'), ('sellYield', 'sellPower')):
+                self.daily[key].append(round(sum(data[channel]) * to_kwh, 2))
+
+    @property
+    def points(self):
+        return len(self.series['timePoint'])
+
+
+class Upstream:
+    """Bouchons du client Hyxi et de l'API Tempo (données du jeu courant)"""
+
+    def __init__(self, synthetic, plant_id):
+        self.synthetic = synthetic
+        self.plant_id = plant_id
+        self.dataset = None
+        self.calls = 0
+        self.now = datetime.strptime(END_DATE, '%Y-%m-%d').timestamp() + 86400
+
+    def _ok(self, data):
+        self.calls += 1
+        return {'code': '0', 'success': True, 'data': data}
+
+    def plant_info(self, plant_id):
+        return self._ok({k: v for k, v in self.synthetic.plant(self.plant_id).items() if k != 'baseLoad'})
+
+    def power_statistics(self, plant_id, date_str):
+        return self._ok(self.dataset.series)
+
+    def yield_statistics(self, plant_id, time_type, start_time):
+        return self._ok(self.dataset.daily)
+
+    def weather(self, plant_id):
+        return self._ok(self.synthetic.weather(self.plant_id, self.now))
+
+    def tempo_day(self, date_str):
+        from app.tempo import TempoAPI
+
+        self.calls += 1
+        code = self.synthetic.tempo_code(date_str, self.now) or 1
+        couleur = TempoAPI.COULEURS[code]
+        name = couleur['nom'].lower()
+        return {'success': True, 'date': date_str, 'couleur': couleur['nom'], 'couleur_emoji': couleur['emoji'],
+                'couleur_css': couleur['css'], 'tarif_hp': fake_upstream.TEMPO_TARIFS[f"{name}HP"],
+                'tarif_hc': fake_upstream.TEMPO_TARIFS[f"{name}HC"]}
+
+    def tempo_now(self):
+        self.calls += 1
+        return {'couleur': 'BLEU', 'couleur_emoji': '🔵', 'horaire': 'HP', 'tarif_kwh': 0.1494,
+                'libelle': 'Bleu-HP', 'timestamp': END_DATE}
+
+    def patches(self, server):
+        """Remplace les appels amont du serveur par les bouchons"""
+        from app.tempo import TempoAPI
+
+        client = server.hyxi_client
+        return [
+            mock.patch.object(client, 'get_plant_info', self.plant_info),
+            mock.patch.object(client, 'get_plant_power_statistics', self.power_statistics),
+            mock.patch.object(client, 'get_plant_yield_statistics', self.yield_statistics),
+            mock.patch.object(client, 'get_plant_weather', self.weather),
+            mock.patch.object(TempoAPI, 'get_day_info', self.tempo_day),
+            mock.patch.object(TempoAPI, 'get_current_info', self.tempo_now)
+        ]
+
+
+def build_cases(server, upstream, store, modes):
+    """
+    Chemins mesurés : (nom, mode, préparation, appel)
+    Les chemins « jour » reçoivent toute la période en une réponse 5 min : leurs
+    boucles par point sont ainsi mesurées à l'échelle d'un mois, d'une année...
+    """
+    import analyze_metrics
+    from app import battery, day_profile, tariffs
+    from app.downsample import concat_days
+    from app.store import CHANNELS, day_grid
+
+    def prime_day(dataset):
+        """Réponse 5 min du jeu courant dans le cache de créneau (comme après le premier appel)"""
+        upstream.dataset = dataset
+        server.fetch_day_statistics(dataset.days[0], refresh=True)
+        server.fetch_day_statistics(server.now_tz().strftime('%Y-%m-%d'), refresh=True)
+
+    def day_period(dataset):
+        reference_date = server.TIMEZONE.localize(datetime.strptime(dataset.days[0], '%Y-%m-%d'))
+        return server._handle_day_period(reference_date)
+
+    def aggregated(dataset):
+        start = server.TIMEZONE.localize(datetime.strptime(dataset.days[0], '%Y-%m-%d'))
+        end = server.TIMEZONE.localize(datetime.strptime(dataset.days[-1], '%Y-%m-%d'))
+        capacity = server.fetch_plant_info()['data']['capacity']
+        return server._process_aggregated_data(dataset.daily, 'month', start, end, capacity)
+
+    def realtime(dataset):
+        payload = server.build_realtime_payload()
+        if payload.get('error'):
+            raise RuntimeError(payload.get('message'))
+        return payload
+
+    def analyze(dataset):
+        return analyze_metrics.analyze_production_data(dataset.series, dataset.days[-1], 0.1494)
+
+    def store_ingest(dataset):
+        for day in dataset.days:
+            base_ts, slots = day_grid(day, server.TIMEZONE)
+            store.put_day(dataset.plant_id, day, base_ts, slots, dataset.per_day[day], True)
+
+    def store_read(dataset):
+        return concat_days(store.get_days(dataset.plant_id, dataset.days), CHANNELS)
+
+    def power_sketches(dataset):
+        merged = store.get_sketches(dataset.plant_id, dataset.days)
+        return {channel: [sketch.quantile(q) for q in (0.5, 0.95, 0.99)]
+                for channel, sketch in merged['sketches'].items()}
+
+    def typical_day(dataset):
+        series = store.get_days(dataset.plant_id, dataset.days, channels=('yieldPower', 'consumePower'))
+        matrices = day_profile.day_matrix(series, server.TIMEZONE, ('yieldPower', 'consumePower'))
+        groups = day_profile.day_groups(dataset.days, ('weekday', 'tempo'), server.get_tempo_tarifs(dataset.days))
+        return day_profile.typical_day(matrices, groups, (0.1, 0.5, 0.9))
+
+    def set_dataset(dataset):
+        upstream.dataset = dataset
+
+    def prime_tariffs(dataset):
+        """Journées dans le stockage et couleurs Tempo en cache"""
+        store_ingest(dataset)
+        server.get_tempo_tarifs(dataset.days)
+
+    def tariff_compare(dataset):
+        plans = tariffs.parse_plans(TARIFF_PLANS, [0.004, 0.04, 0.1])
+        series = store.get_days(dataset.plant_id, dataset.days, channels=('yieldPower', 'consumePower'))
+        flows = tariffs.energy_flows(series, server.TIMEZONE)
+        return tariffs.compare_plans(plans, flows, server.get_tempo_tarifs(dataset.days))
+
+    def battery_sweep(dataset):
+        series = store.get_days(dataset.plant_id, dataset.days, channels=('yieldPower', 'consumePower'))
+        flows = tariffs.energy_flows(series, server.TIMEZONE)
+        plans = tariffs.parse_plans([{'type': 'tempo'}], [0.004])
+        prices = tariffs.price_matrix(plans, flows, server.get_tempo_tarifs(dataset.days))[0]
+        return battery.sweep(flows, prices, battery.scenario_grid(*BATTERY_GRID), 0.004)
+
+    cases = []
+    for mode in modes:
+        cases += [
+            ('day_period', mode, prime_day, day_period),
+            ('aggregated', mode, set_dataset, aggregated),
+            ('realtime', mode, prime_day, realtime)
+        ]
+    cases += [
+        ('analyze', '-', set_dataset, analyze),
+        ('store_ingest', '-', set_dataset, store_ingest),
+        ('store_read', '-', store_ingest, store_read),
+        ('power_sketches', '-', store_ingest, power_sketches),
+        ('profile', '-', prime_tariffs, typical_day),
+        ('tariffs', '-', prime_tariffs, tariff_compare),
+        ('battery', '-', prime_tariffs, battery_sweep)
+    ]
+    return cases
+
+
+def measure(fn, dataset, repeat, max_time, memory):
+    """
+    Chronomètre fn(dataset) : une passe de chauffe, puis jusqu'à repeat passes
+    (moins si le budget max_time est dépassé), puis une passe sous tracemalloc
+
+    Returns:
+        {'runs', 'median_ms', 'min_ms', 'max_ms', 'peak_kib', 'retained_kib', 'retained_blocks'}
+    """
+    start = time.perf_counter()
+    fn(dataset)
+    warm = time.perf_counter() - start
+    runs = max(1, min(repeat, math.ceil(max_time / max(warm, 1e-9))))
+
+    durations = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        fn(dataset)
+        durations.append(time.perf_counter() - start)
+
+    result = {
+        'runs': runs,
+        'median_ms': round(statistics.median(durations) * 1000, 3),
+        'min_ms': round(min(durations) * 1000, 3),
+        'max_ms': round(max(durations) * 1000, 3)
+    }
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        value = fn(dataset)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        del value
+        diff = after.compare_to(before, 'filename')
+        result.update({
+            'peak_kib': round(peak / 1024, 1),
+            'retained_kib': round(sum(stat.size_diff for stat in diff) / 1024, 1),
+            'retained_blocks': sum(stat.count_diff for stat in diff)
+        })
+    return result
+
+
+def git_revision():
+    """Révision courante (None hors dépôt git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Écarts de médiane avec la référence
+
+    Returns:
+        {clé: écart en %} et liste des clés en régression (> threshold % et > min_delta_ms,
+        le bruit des chemins de moins d'une milliseconde n'étant pas significatif)
+    """
+    deltas, regressions = {}, []
+    for key, row in results.items():
+        previous = baseline.get('results', {}).get(key)
+        if not previous or not previous.get('median_ms'):
+            continue
+        delta = (row['median_ms'] - previous['median_ms']) / previous['median_ms'] * 100
+        deltas[key] = delta
+        if delta > threshold and row['median_ms'] - previous['median_ms'] > min_delta_ms:
+            regressions.append(key)
+    return deltas, regressions
+
+
+def print_report(results, deltas, regressions):
+    """Affiche les mesures sous forme de tableau"""
+    print(f"\n{'Chemin':<28} {'Points':>8} {'Passes':>6} {'Médiane ms':>11} {'Min ms':>9} "
+          f"{'Pic KiB':>10} {'Conservé KiB':>13} {'Δ réf.':>9}")
+    print('-' * 102)
+    for key, row in results.items():
+        delta = f"{deltas[key]:+.1f}%" if key in deltas else ''
+        flag = ' ⚠️' if key in regressions else ''
+        print(f"{key:<28} {row['points']:>8} {row['runs']:>6} {row['median_ms']:>11.2f} {row['min_ms']:>9.2f} "
+              f"{row.get('peak_kib', ''):>10} {row.get('retained_kib', ''):>13} {delta:>9}{flag}")
+
+
+def parse_args():
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Banc d\'essai des chemins de calcul (données synthétiques, amont simulé)')
+    parser.add_argument('--sizes', default='day,month,year,years',
+                        help='Tailles de jeu de données : day, month, year, years (défaut: toutes)')
+    parser.add_argument('--years', type=int, default=3, help='Nombre d\'années du jeu « years » (défaut: 3)')
+    parser.add_argument('--only', help='Chemins à mesurer, séparés par des virgules (défaut: tous)')
+    parser.add_argument('--modes', default='simple,resale', help='Modes de calcul du revenu (défaut: simple,resale)')
+    parser.add_argument('--repeat', type=int, default=5, help='Passes chronométrées par chemin (défaut: 5)')
+    parser.add_argument('--max-time', type=float, default=10, help='Budget en secondes par chemin (défaut: 10)')
+    parser.add_argument('--no-memory', action='store_true', help='Sans passe tracemalloc')
+    parser.add_argument('--save', metavar='NAME', help=f'Enregistrer les mesures dans {BASELINE_DIR}/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='Comparer à une référence enregistrée')
+    parser.add_argument('--threshold', type=float, default=10, help='Régression signalée au-delà de ce %% (défaut: 10)')
+    parser.add_argument('--min-delta-ms', type=float, default=1,
+                        help='Écart absolu minimal pour signaler une régression (défaut: 1 ms)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sizes = {'day': 1, 'month': 30, 'year': 365, 'years': 365 * args.years}
+    selected_sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in selected_sizes if size not in sizes]
+    if unknown:
+        print(f"❌ Taille inconnue : {', '.join(unknown)} (day, month, year, years)")
+        return 1
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    only = {name.strip() for name in args.only.split(',')} if args.only else None
+
+    baseline = None
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f"{args.compare}.json")
+        try:
+            with open(path, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Référence illisible ({path}): {e}")
+            return 1
+
+    workdir = tempfile.mkdtemp(prefix='hyxi-bench-')
+    configure_environment(workdir)
+    # Import après configuration : Config lit l'environnement au chargement
+    import pytz
+    from app import server
+    from app.store import SeriesStore
+
+    synthetic = fake_upstream.Synthetic(1, pytz.timezone(server.Config.TIMEZONE))
+    plant_id = next(iter(synthetic.plants))
+    upstream = Upstream(synthetic, plant_id)
+    store = SeriesStore(os.path.join(workdir, 'bench.db'), tz=server.TIMEZONE)
+
+    results = {}
+    with contextlib.ExitStack() as stack:
+        for patch in upstream.patches(server):
+            stack.enter_context(patch)
+        stack.enter_context(server.app.test_request_context('/'))
+        devnull = stack.enter_context(open(os.devnull, 'w'))
+
+        for size in selected_sizes:
+            print(f"🧪 Jeu « {size} » ({sizes[size]} jours)...")
+            dataset = Dataset(synthetic, plant_id, sizes[size])
+            for name, mode, prepare, fn in build_cases(server, upstream, store, modes):
+                if only and name not in only:
+                    continue
+                key = f"{name}[{mode}]/{size}" if mode != '-' else f"{name}/{size}"
+                with mock.patch.object(server.Config, 'RESALE_ENABLED', mode == 'resale'), \
+                        contextlib.redirect_stdout(devnull):
+                    prepare(dataset)
+                    row = measure(fn, dataset, args.repeat, args.max_time, not args.no_memory)
+                results[key] = {'points': dataset.points, **row}
+                print(f"   {key:<28} {row['median_ms']:>10.2f} ms")
+
+    if not results:
+        print("❌ Aucun chemin mesuré")
+        return 1
+
+    deltas, regressions = compare(results, baseline, args.threshold, args.min_delta_ms) if baseline else ({}, [])
+    print_report(results, deltas, regressions)
+    print(f"\n📡 Appels amont simulés : {upstream.calls}")
+
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'repeat': args.repeat,
+            'results': results
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✅ Référence enregistrée : {path}")
+
+    if baseline:
+        print(f"📊 Comparaison avec « {args.compare} » (révision {baseline.get('revision') or '?'}, seuil {args.threshold:g} %)")
+        if regressions:
+            print(f"❌ {len(regressions)} régression(s) : {', '.join(regressions)}")
+            return 1
+        print("✅ Aucune régression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
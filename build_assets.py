@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Build des ressources statiques du dashboard
+Vérifie Chart.js et son plugin d'annotations (app/static/vendor/) contre leurs
+empreintes SRI épinglées (app/static/vendor.lock.json), en les téléchargeant
+s'ils sont absents, puis génère app/static/dist/ : fichiers empreintés,
+variantes .gz/.br et manifest.json. Le build échoue si une bibliothèque
+épinglée est absente ou ne correspond pas à son empreinte ; une bibliothèque
+non épinglée reste chargée depuis le CDN (avertissement).
+
+Usage :
+    python build_assets.py            # build complet
+    python build_assets.py --offline  # sans téléchargement (bibliothèques déjà présentes dans vendor/)
+    python build_assets.py --pin      # télécharge les versions de assets.VENDOR et épingle leurs empreintes
+"""
+import sys
+
+from app import assets
+
+
+def main():
+    args = sys.argv[1:]
+
+    try:
+        if '--pin' in args:
+            print("📌 Épinglage des bibliothèques tierces...")
+            for name, digest in assets.pin_vendor().items():
+                print(f"  ✅ {name} : {digest}")
+            print("  ℹ️ Committer app/static/vendor/ et app/static/vendor.lock.json")
+
+        print("🔨 Build des ressources statiques...")
+        manifest = assets.build(fetch='--offline' not in args)
+    except assets.VendorError as e:
+        print(f"  ❌ {e}")
+        return 1
+
+    for name in assets.VENDOR:
+        if name not in manifest:
+            print(f"  ⚠️ {name} non épinglé : servi depuis le CDN (python build_assets.py --pin)")
+
+    for name, target in manifest.items():
+        print(f"  ✅ {name} -> dist/{target}")
+    if assets.brotli is None:
+        print("  ℹ️ Module brotli non installé : variantes .gz uniquement")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
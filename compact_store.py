@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Compaction de l'historique local (stockage SQLite des séries)
+Conserve la résolution 5 min sur la fenêtre récente, puis 15 min, puis
+horaire ; les énergies journalières et les pics sont préservés. Le serveur
+effectue cette compaction une fois par jour ; ce script permet de la lancer
+manuellement (par ex. avec d'autres fenêtres) et de récupérer l'espace disque.
+
+Exemples :
+    python compact_store.py
+    python compact_store.py --keep-5min 90 --keep-15min 365 --vacuum
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.store import SeriesStore
+from config import Config
+import pytz
+
+
+def parse_args():
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Compaction de l'historique 5 min du stockage local")
+    parser.add_argument('--keep-5min', type=int, default=Config.RETENTION_5MIN_DAYS,
+                        help=f'Jours conservés en 5 min (défaut: {Config.RETENTION_5MIN_DAYS}, 0 = illimité)')
+    parser.add_argument('--keep-15min', type=int, default=Config.RETENTION_15MIN_DAYS,
+                        help=f'Jours conservés en 15 min (défaut: {Config.RETENTION_15MIN_DAYS}, 0 = illimité)')
+    parser.add_argument('--vacuum', action='store_true',
+                        help="Récupérer l'espace disque libéré (bloque la base pendant l'opération)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(Config.STORE_PATH):
+        print(f"❌ Stockage introuvable: {Config.STORE_PATH}")
+        return 1
+
+    tz = pytz.timezone(Config.TIMEZONE)
+    store = SeriesStore(Config.STORE_PATH, tz=tz)
+    today = datetime.now(tz)
+
+    def cutoff(days):
+        return (today - timedelta(days=days)).strftime('%Y-%m-%d') if days > 0 else None
+
+    size_before = os.path.getsize(Config.STORE_PATH)
+    start = time.time()
+    counts = store.compact(before_15min=cutoff(args.keep_5min), before_hour=cutoff(args.keep_15min))
+    print(f"🗜️ {counts['15min']} journées compactées en 15 min, {counts['hour']} en horaire "
+          f"({time.time() - start:.1f}s)")
+
+    if args.vacuum:
+        store.vacuum()
+        size_after = os.path.getsize(Config.STORE_PATH)
+        print(f"✅ Taille du stockage: {size_before / 1e6:.1f} Mo -> {size_after / 1e6:.1f} Mo")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,6 +15,9 @@ class Config:
     HYXI_SECRET_KEY = os.getenv('HYXI_SECRET_KEY')
     HYXI_APPLICATION = os.getenv('HYXI_APPLICATION', 'test')
 
+    # API Couleur Tempo
+    TEMPO_API_BASE_URL = os.getenv('TEMPO_API_BASE_URL', 'https://www.api-couleur-tempo.fr/api')  # Remplaçable par le faux amont (fake_upstream.py)
+
     # Configuration de la centrale solaire
     PLANT_ID = os.getenv('PLANT_ID')
     PLANT_NAME = os.getenv('PLANT_NAME', 'Ma_Centrale_Solaire')
@@ -34,3 +37,68 @@ class Config:
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
+
+    # Requêtes groupées (/api/batch)
+    BATCH_MAX_QUERIES = int(os.getenv('BATCH_MAX_QUERIES', 20))  # Sous-requêtes par batch ; au-delà : 400
+
+    # Démarrage : préchauffage des caches en arrière-plan (voir /api/ready)
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'  # Token, installations, journée en cours, saison Tempo, agrégats du mois
+    WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', 20))  # Durée maximale (s) avant de déclarer le worker prêt
+    WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', 4))  # Tâches de préchauffage exécutées simultanément
+
+    # Flux temps réel (SSE)
+    STREAM_POLL_INTERVAL = int(os.getenv('STREAM_POLL_INTERVAL', 300))  # Durée d'un créneau amont (s)
+    STREAM_POLL_OFFSET = int(os.getenv('STREAM_POLL_OFFSET', 30))  # Délai après le début du créneau avant interrogation (s)
+    ADAPTIVE_POLLING = os.getenv('ADAPTIVE_POLLING', 'True').lower() == 'true'  # Cadence réduite la nuit (lever/coucher du soleil)
+    POLL_NIGHT_INTERVAL = int(os.getenv('POLL_NIGHT_INTERVAL', 1800))  # Période de collecte nocturne (s)
+    POLL_DAYLIGHT_MARGIN = int(os.getenv('POLL_DAYLIGHT_MARGIN', 1800))  # Pleine cadence avant le lever / après le coucher (s)
+    STREAM_HISTORY_SIZE = int(os.getenv('STREAM_HISTORY_SIZE', 500))  # Événements conservés pour le rejeu Last-Event-ID
+
+    # Stockage local des séries 5 min (SQLite)
+    STORE_PATH = os.getenv('STORE_PATH', 'data/hyxi.db')
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 4))  # Journées récupérées en parallèle auprès de l'API
+    RECONCILE_DAYS = int(os.getenv('RECONCILE_DAYS', 3))  # Journées closes revérifiées en amont (0 = désactivé)
+    RECONCILE_INTERVAL = int(os.getenv('RECONCILE_INTERVAL', 3600))  # Période de réconciliation par installation (s)
+    RETENTION_5MIN_DAYS = int(os.getenv('RETENTION_5MIN_DAYS', 365))  # Résolution 5 min conservée (jours, 0 = illimitée)
+    RETENTION_15MIN_DAYS = int(os.getenv('RETENTION_15MIN_DAYS', 1095))  # Puis 15 min, ensuite horaire (jours, 0 = illimitée)
+
+    # Analyses longues (/api/energy/tariffs, battery, power, profile, plan, range)
+    ANALYSIS_MAX_DAYS = int(os.getenv('ANALYSIS_MAX_DAYS', 1096))  # Période maximale (jours) ; au-delà : 400
+
+    # Planificateur des vues agrégées (semaine, mois, année)
+    PLANNER_UPSTREAM_MS = float(os.getenv('PLANNER_UPSTREAM_MS', 250))  # Coût estimé d'un appel amont (ms), comparé aux lectures locales
+    YIELD_CACHE_TTL = int(os.getenv('YIELD_CACHE_TTL', 86400))  # Conservation (s) des blocs yieldStatistics d'un mois ou d'une année clos
+
+    # Simulation de batterie (/api/energy/battery)
+    BATTERY_WORKERS = int(os.getenv('BATTERY_WORKERS', min(os.cpu_count() or 1, 4)))  # Processus du pool de simulation, par worker web (0 ou 1 = processus courant)
+    BATTERY_MAX_SCENARIOS = int(os.getenv('BATTERY_MAX_SCENARIOS', 200))  # Scénarios maximum par requête
+
+    # Graphiques longue durée : nombre de points par défaut et maximum (paramètre max_points)
+    CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', 1000))
+    CHART_MAX_POINTS_LIMIT = int(os.getenv('CHART_MAX_POINTS_LIMIT', 5000))
+
+    # Compression gzip/brotli des réponses (taille minimale en octets)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+    # Observabilité
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'  # Endpoint /metrics (format Prometheus) et instrumentation des routes
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'True').lower() == 'true'  # Spans par requête (appels amont, phases des handlers) dans l'en-tête Server-Timing
+    TRACE_LOG = os.getenv('TRACE_LOG', 'False').lower() == 'true'  # Journalise chaque trace en une ligne JSON
+    TRACE_LOG_MIN_MS = float(os.getenv('TRACE_LOG_MIN_MS', 0))  # Durée minimale (ms) d'une requête journalisée
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')  # Jeton (en-tête X-Profile-Token) autorisant ?profile=1 ; vide = profilage désactivé
+    PROFILE_TOP = int(os.getenv('PROFILE_TOP', 30))  # Fonctions listées dans le résumé cProfile
+
+    # Cache partagé entre workers : memory://, sqlite:///data/cache.db ou redis://host:6379/0
+    CACHE_URL = os.getenv('CACHE_URL', 'memory://')
+
+    # Plusieurs répliques : élection d'un leader seul autorisé à interroger l'API amont
+    LEADER_ELECTION = os.getenv('LEADER_ELECTION', 'False').lower() == 'true'
+    COORDINATION_PATH = os.getenv('COORDINATION_PATH', 'data/coordination.db')  # Bail + instantané partagé (volume commun)
+    LEADER_LEASE_TTL = int(os.getenv('LEADER_LEASE_TTL', 60))  # Reprise par une autre réplique au plus après ce délai (s)
+
+    # Plusieurs installations
+    HYXI_RATE_LIMIT = float(os.getenv('HYXI_RATE_LIMIT', 10))  # Requêtes/s vers l'API Hyxi, tous threads confondus (0 = illimité)
+    PLANT_PAGE_SIZE = int(os.getenv('PLANT_PAGE_SIZE', 100))  # Taille des pages de découverte des installations
+    PLANT_DISCOVERY_TTL = int(os.getenv('PLANT_DISCOVERY_TTL', 3600))  # Durée de cache de la liste des installations (s)
+    FLEET_POLLING = os.getenv('FLEET_POLLING', 'False').lower() == 'true'  # Ingestion de toutes les installations à chaque créneau
+    FLEET_WORKERS = int(os.getenv('FLEET_WORKERS', 16))  # Installations interrogées simultanément
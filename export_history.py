@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Export de l'historique 5 minutes (tous les canaux) sur une plage de dates
+Lit le stockage local ; les journées absentes ou incomplètes sont récupérées
+en parallèle auprès de l'API Hyxi (sauf --offline). L'écriture se fait par
+blocs de journées : la mémoire reste bornée quelle que soit la plage.
+
+Exemples :
+    python export_history.py --start 2024-01-01 --end 2024-12-31 --format parquet
+    python export_history.py --start 2024-06-01 --format csv --output juin.csv --offline
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.export import FORMATS, iter_chunks, write_arrow, write_csv, write_npz
+from app.server import SERIES_STORE, iter_days
+from app.store import CHANNELS
+from config import Config
+
+EXTENSIONS = {'csv': 'csv', 'parquet': 'parquet', 'arrow': 'arrow', 'npz': 'npz'}
+
+
+def parse_args():
+    """Arguments de la ligne de commande"""
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    parser = argparse.ArgumentParser(description="Export de l'historique 5 min de la centrale")
+    parser.add_argument('--start', required=True, help='Date de début (YYYY-MM-DD)')
+    parser.add_argument('--end', default=yesterday, help='Date de fin incluse (YYYY-MM-DD, défaut: hier)')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='Format de sortie (défaut: csv)')
+    parser.add_argument('--output', help='Fichier de sortie (défaut: hyxi_<début>_<fin>.<ext>)')
+    parser.add_argument('--chunk-days', type=int, default=7, help='Journées par bloc écrit (défaut: 7)')
+    parser.add_argument('--offline', action='store_true',
+                        help="N'utiliser que le stockage local (aucun appel à l'API)")
+    return parser.parse_args()
+
+
+def date_range(start, end):
+    """Liste des dates YYYY-MM-DD de start à end inclus"""
+    start_dt = datetime.strptime(start, '%Y-%m-%d')
+    end_dt = datetime.strptime(end, '%Y-%m-%d')
+    return [(start_dt + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end_dt - start_dt).days + 1)]
+
+
+def stored_days(days, chunk_days):
+    """Parcourt les journées déjà présentes dans le stockage local, bloc par bloc"""
+    for i in range(0, len(days), chunk_days):
+        yield from SERIES_STORE.get_days(Config.PLANT_ID, days[i:i + chunk_days], level=1, channels=CHANNELS)
+
+
+def main():
+    args = parse_args()
+
+    try:
+        days = date_range(args.start, args.end)
+    except ValueError:
+        print("❌ Dates invalides (format attendu: YYYY-MM-DD)")
+        return 1
+    if not days:
+        print("❌ La date de fin précède la date de début")
+        return 1
+
+    output = args.output or f"hyxi_{days[0]}_{days[-1]}.{EXTENSIONS[args.format]}"
+    print(f"📤 Export {args.format} du {days[0]} au {days[-1]} ({len(days)} jours) vers {output}")
+
+    if args.offline:
+        entries = stored_days(days, args.chunk_days)
+    else:
+        entries = iter_days(days, level=1, channels=CHANNELS, chunk_days=args.chunk_days)
+    chunks = iter_chunks(entries, days_per_chunk=args.chunk_days)
+
+    start = time.time()
+    try:
+        if args.format == 'csv':
+            rows = write_csv(chunks, output)
+        elif args.format == 'npz':
+            rows = write_npz(chunks, output)
+        else:
+            rows = write_arrow(chunks, output, args.format)
+    except ImportError:
+        print(f"❌ Le format {args.format} nécessite pyarrow (pip install pyarrow)")
+        return 1
+
+    print(f"✅ {rows} lignes exportées en {time.time() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
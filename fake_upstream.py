@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Serveur local imitant l'API Hyxi Cloud et l'API Couleur Tempo
+Permet de mesurer les performances hors ligne, sans identifiants réels :
+- vérification des signatures HMAC-SHA512 (même schéma que HyxiAPIClient._generate_signature)
+- données synthétiques réalistes (courbes 5 min, agrégats jour/mois/année, météo, jours Tempo)
+- latence, taux d'erreur et limite de débit configurables
+- enregistrement des réponses réelles (--record) et rejeu (--replay)
+
+Routes Hyxi sous /api/..., Tempo sous /tempo/api/... ; compteurs d'appels
+sur /__fake__/stats (remis à zéro par POST /__fake__/reset).
+
+Exemples :
+    python fake_upstream.py --port 8081 --plants 20 --latency-ms 150 --error-rate 0.01
+    HYXI_API_BASE_URL=http://localhost:8081 TEMPO_API_BASE_URL=http://localhost:8081/tempo/api \\
+        HYXI_ACCESS_KEY=fake-ak HYXI_SECRET_KEY=fake-sk PLANT_ID=FAKE0001 python -m flask --app app.server run
+    python fake_upstream.py --record cassettes/ --access-key AK --secret-key SK   # proxy vers les API réelles
+    python fake_upstream.py --replay cassettes/                                    # rejeu hors ligne
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+import requests
+from flask import Flask, jsonify, request
+
+HYXI_URL = 'https://open.hyxicloud.com'
+TEMPO_URL = 'https://www.api-couleur-tempo.fr/api'
+
+# Tolérance sur l'horodatage des requêtes signées (ms) et durée de vie des tokens (s)
+TIMESTAMP_SKEW_MS = 5 * 60 * 1000
+TOKEN_TTL = 7200
+
+# En-têtes transmis à l'API réelle en mode enregistrement (signature incluse)
+PROXIED_HEADERS = ('Content-Type', 'AccessKey', 'Timestamp', 'Nonce', 'Sign', 'Sign-headers', 'Authorization')
+
+# Tarifs Tempo servis par /tempo/api/tarifs
+TEMPO_TARIFS = {'bleuHC': 0.1232, 'bleuHP': 0.1494, 'blancHC': 0.1391,
+                'blancHP': 0.173, 'rougeHC': 0.146, 'rougeHP': 0.6468}
+
+
+def _seed(*parts):
+    """Graine déterministe (mêmes données pour une installation et une date)"""
+    return int.from_bytes(hashlib.sha256('|'.join(map(str, parts)).encode()).digest()[:8], 'little')
+
+
+def sun_times(day, latitude=46.0):
+    """
+    Lever et coucher approximatifs (heure locale française, décimale)
+    Durée du jour selon la saison, midi solaire vers 13h30 l'été et 12h30 l'hiver.
+    """
+    doy = day.timetuple().tm_yday
+    amplitude = 3.9 * latitude / 46.0
+    daylight = 12 + amplitude * np.sin(2 * np.pi * (doy - 80) / 365)
+    noon = 13.5 if 88 <= doy <= 300 else 12.5
+    return noon - daylight / 2, noon + daylight / 2
+
+
+def _hour_minute(hours):
+    return f"{int(hours):02d}:{int(round((hours % 1) * 60)) % 60:02d}"
+
+
+class Synthetic:
+    """Données synthétiques d'un parc d'installations"""
+
+    def __init__(self, plants, tz, seed=0):
+        """
+        Args:
+            plants: Nombre d'installations (FAKE0001, FAKE0002, ...)
+            tz: Fuseau horaire des installations (pytz)
+            seed: Graine commune (autre parc pour une autre valeur)
+        """
+        self.tz = tz
+        self.seed = seed
+        self.plants = OrderedDict()
+        for i in range(plants):
+            rng = random.Random(_seed(seed, 'plant', i))
+            plant_id = f"FAKE{i + 1:04d}"
+            self.plants[plant_id] = {
+                'plantId': plant_id,
+                'plantName': f"Centrale_{i + 1}",
+                'capacity': round(rng.uniform(3, 12), 2),
+                'status': 1,
+                'baseLoad': rng.uniform(150, 450)
+            }
+
+    def plant(self, plant_id):
+        return self.plants.get(plant_id)
+
+    def day(self, plant_id, date_str, now=None):
+        """
+        Courbes 5 min d'une journée (points jusqu'au créneau en cours pour aujourd'hui)
+        Returns:
+            dict: timePoint (s) + yieldPower, consumePower, buyPower, sellPower, chargedPower, dischargedPower (W)
+        """
+        plant = self.plants[plant_id]
+        day = datetime.strptime(date_str, '%Y-%m-%d')
+        start = int(self.tz.localize(day).timestamp())
+        end = int(self.tz.localize(day + timedelta(days=1)).timestamp())
+        stamps = np.arange(start, end, 300, dtype=np.int64)
+        if now is not None:
+            stamps = stamps[stamps + 300 <= now]
+
+        rng = np.random.default_rng(_seed(self.seed, plant_id, date_str))
+        hours = (stamps - start) / 3600.0
+        sunrise, sunset = sun_times(day)
+        # Cloche de ciel clair, voile nuageux du jour et passages nuageux
+        phase = np.clip((hours - sunrise) / (sunset - sunrise), 0, 1)
+        clear_sky = np.sin(np.pi * phase) ** 1.5
+        cloudiness = rng.uniform(0.25, 1.0)
+        passing = np.clip(1 - rng.gamma(0.6, 0.25, stamps.size), 0.15, 1)
+        production = plant['capacity'] * 1000 * 0.85 * clear_sky * cloudiness * passing
+
+        # Talon, pics du matin et du soir, appareils ponctuels
+        morning = 900 * np.exp(-((hours - 7.5) / 0.8) ** 2)
+        evening = 1400 * np.exp(-((hours - 19.5) / 1.5) ** 2)
+        spikes = rng.binomial(1, 0.04, stamps.size) * rng.uniform(500, 2500, stamps.size)
+        consumption = plant['baseLoad'] + morning + evening + spikes + rng.normal(0, 40, stamps.size).clip(-100)
+
+        production = np.round(production, 1)
+        consumption = np.round(np.maximum(consumption, 50), 1)
+        zeros = [0.0] * stamps.size
+        return {
+            'timePoint': stamps.tolist(),
+            'yieldPower': production.tolist(),
+            'consumePower': consumption.tolist(),
+            'buyPower': np.maximum(consumption - production, 0).round(1).tolist(),
+            'sellPower': np.maximum(production - consumption, 0).round(1).tolist(),
+            'chargedPower': zeros,
+            'dischargedPower': list(zeros)
+        }
+
+    def day_energy(self, plant_id, date_str, now=None):
+        """Énergies d'une journée (kWh) : yield, consume, buyYield, sellYield"""
+        data = self.day(plant_id, date_str, now)
+        to_kwh = 300 / 3600 / 1000
+        return {
+            'yield': round(sum(data['yieldPower']) * to_kwh, 2),
+            'consume': round(sum(data['consumePower']) * to_kwh, 2),
+            'buyYield': round(sum(data['buyPower']) * to_kwh, 2),
+            'sellYield': round(sum(data['sellPower']) * to_kwh, 2)
+        }
+
+    def yield_statistics(self, plant_id, time_type, start_time, now):
+        """
+        Agrégats de queryPlantYieldStatistics
+        - time_type 2 : un point par jour du mois (startTime yyyy-MM)
+        - time_type 3 : un point par mois de l'année (startTime yyyy)
+        - time_type 1 : un point par heure du jour (startTime yyyy-MM-dd)
+        """
+        today = datetime.fromtimestamp(now, self.tz).date()
+        result = {'timePoint': [], 'yield': [], 'consume': [], 'buyYield': [], 'sellYield': []}
+
+        def append(timestamp, energy):
+            result['timePoint'].append(timestamp)
+            for key in ('yield', 'consume', 'buyYield', 'sellYield'):
+                result[key].append(energy[key])
+
+        if time_type == 2:
+            first = datetime.strptime(str(start_time), '%Y-%m').date()
+            day = first
+            while day.month == first.month and day <= today:
+                date_str = day.strftime('%Y-%m-%d')
+                append(int(self.tz.localize(datetime.combine(day, datetime.min.time())).timestamp()),
+                       self.day_energy(plant_id, date_str, now if day == today else None))
+                day += timedelta(days=1)
+        elif time_type == 3:
+            year = int(start_time)
+            for month in range(1, 13):
+                first = datetime(year, month, 1).date()
+                if first > today:
+                    break
+                totals = Counter()
+                day = first
+                while day.month == month and day <= today:
+                    totals.update(self.day_energy(plant_id, day.strftime('%Y-%m-%d'), now if day == today else None))
+                    day += timedelta(days=1)
+                append(int(self.tz.localize(datetime.combine(first, datetime.min.time())).timestamp()),
+                       {key: round(value, 2) for key, value in totals.items()})
+        else:
+            data = self.day(plant_id, str(start_time), now)
+            to_kwh = 300 / 3600 / 1000
+            for i in range(0, len(data['timePoint']), 12):
+                append(data['timePoint'][i], {
+                    'yield': round(sum(data['yieldPower'][i:i + 12]) * to_kwh, 3),
+                    'consume': round(sum(data['consumePower'][i:i + 12]) * to_kwh, 3),
+                    'buyYield': round(sum(data['buyPower'][i:i + 12]) * to_kwh, 3),
+                    'sellYield': round(sum(data['sellPower'][i:i + 12]) * to_kwh, 3)
+                })
+        return result
+
+    def weather(self, plant_id, now):
+        """Prévisions sur 7 jours avec lever/coucher du soleil"""
+        today = datetime.fromtimestamp(now, self.tz).date()
+        days = []
+        for i in range(7):
+            day = today + timedelta(days=i)
+            rng = random.Random(_seed(self.seed, 'weather', plant_id, day))
+            sunrise, sunset = sun_times(datetime.combine(day, datetime.min.time()))
+            days.append({
+                'date': day.strftime('%Y-%m-%d'),
+                'sunrise': _hour_minute(sunrise),
+                'sunset': _hour_minute(sunset),
+                'tempMax': round(rng.uniform(8, 30), 1),
+                'tempMin': round(rng.uniform(-2, 15), 1),
+                'weather': rng.choice(['Sunny', 'Cloudy', 'Overcast', 'Rain'])
+            })
+        return {'days': days}
+
+    def tempo_code(self, date_str, now):
+        """Couleur Tempo d'une date (1 bleu, 2 blanc, 3 rouge, 0 inconnue au-delà de demain)"""
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+        if day > datetime.fromtimestamp(now, self.tz).date() + timedelta(days=1):
+            return 0
+        draw = random.Random(_seed(self.seed, 'tempo', date_str)).random()
+        winter = day.month in (11, 12, 1, 2, 3) and day.weekday() < 6
+        if winter and draw < 0.15:
+            return 3
+        if draw < (0.35 if winter else 0.05):
+            return 2
+        return 1
+
+
+class TokenBucket:
+    """Limite de débit non bloquante (réponse 429 au-delà)"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class Cassette:
+    """Réponses enregistrées, une par fichier JSON (clé : méthode, chemin, paramètres, corps)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(method, path, params, body):
+        canonical = json.dumps([method, path, sorted(params.items()), body], sort_keys=True, default=str)
+        slug = path.strip('/').replace('/', '_')[:60]
+        return f"{slug}-{hashlib.sha1(canonical.encode()).hexdigest()[:16]}.json"
+
+    def load(self, key):
+        try:
+            with open(os.path.join(self.directory, key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key, status, payload):
+        path = os.path.join(self.directory, key)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'status': status, 'body': payload}, f, ensure_ascii=False, indent=1)
+        os.replace(path + '.tmp', path)
+
+
+def create_app(access_key='fake-ak', secret_key='fake-sk', plants=3, tz_name='Europe/Paris',
+               latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, rate_limit=0.0, seed=0,
+               record=None, replay=None, hyxi_url=HYXI_URL, tempo_url=TEMPO_URL, verify=True):
+    """
+    Application Flask du faux amont
+
+    Args:
+        access_key, secret_key: Identifiants acceptés (signature HMAC-SHA512 vérifiée)
+        plants: Nombre d'installations synthétiques
+        latency_ms, jitter_ms: Latence ajoutée à chaque réponse (moyenne, écart-type)
+        error_rate: Proportion de réponses 503 injectées (0-1)
+        rate_limit: Requêtes/s acceptées sur l'API Hyxi (0 = illimité), 429 au-delà
+        record: Répertoire où enregistrer les réponses des API réelles (mode proxy)
+        replay: Répertoire de réponses enregistrées à rejouer (synthétique sinon)
+        verify: Vérifier signatures et tokens (désactivé en mode proxy : l'amont réel vérifie)
+    """
+    app = Flask(__name__)
+    tz = pytz.timezone(tz_name)
+    synthetic = Synthetic(plants, tz, seed)
+    bucket = TokenBucket(rate_limit) if rate_limit > 0 else None
+    recorder = Cassette(record) if record else None
+    player = Cassette(replay) if replay else None
+    tokens = {}           # {token: expiration}
+    nonces = OrderedDict()  # nonces récents (rejeu refusé)
+    stats = Counter()
+    lock = threading.Lock()
+
+    def hyxi_error(status, message):
+        return jsonify({'code': str(status), 'success': False, 'message': message}), status
+
+    def hyxi_ok(data):
+        return jsonify({'code': '0', 'success': True, 'message': 'success', 'data': data})
+
+    def sign(token, timestamp, nonce, content):
+        string_to_sign = f"{request.path}\n{request.method}\n{hashlib.sha512(content.encode()).hexdigest()}\n"
+        digest = hmac.new(secret_key.encode(), f"{access_key}{token}{timestamp}{nonce}{string_to_sign}".encode(),
+                          hashlib.sha512).digest()
+        return base64.b64encode(digest).decode()
+
+    def check_signature(token, content):
+        """Message d'erreur si la requête n'est pas correctement signée, sinon None"""
+        headers = request.headers
+        if headers.get('AccessKey') != access_key:
+            return 'AccessKey inconnue'
+        timestamp, nonce = headers.get('Timestamp', ''), headers.get('Nonce', '')
+        if not timestamp.isdigit() or abs(int(timestamp) - time.time() * 1000) > TIMESTAMP_SKEW_MS:
+            return 'Timestamp invalide ou expiré'
+        if not hmac.compare_digest(headers.get('Sign', ''), sign(token, timestamp, nonce, content)):
+            return 'Signature invalide'
+        with lock:
+            if nonce in nonces:
+                return 'Nonce déjà utilisé'
+            nonces[nonce] = True
+            while len(nonces) > 100000:
+                nonces.popitem(last=False)
+        return None
+
+    def proxy(base_url, path):
+        """Transmet la requête à l'API réelle et enregistre la réponse"""
+        forwarded = {name: request.headers[name] for name in PROXIED_HEADERS if name in request.headers}
+        response = requests.request(request.method, base_url + path, headers=forwarded,
+                                    params=request.args, data=request.get_data(), timeout=30)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {'code': str(response.status_code), 'success': False, 'message': response.text[:200]}
+        return response.status_code, payload
+
+    @app.before_request
+    def inject_faults():
+        if request.path.startswith('/__fake__'):
+            return None
+        with lock:
+            stats['total'] += 1
+            endpoint = '/tempo/api/jourTempo' if '/jourTempo/' in request.path else request.path
+            stats[f"{request.method} {endpoint}"] += 1
+        if latency_ms or jitter_ms:
+            time.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+        if error_rate and random.random() < error_rate:
+            with lock:
+                stats['injected_errors'] += 1
+            return hyxi_error(503, 'Erreur injectée')
+        if bucket is not None and request.path.startswith('/api/') and not bucket.allow():
+            with lock:
+                stats['rate_limited'] += 1
+            return hyxi_error(429, 'Too many requests')
+
+        body = request.get_json(silent=True) if request.method == 'POST' else None
+        key = Cassette.key(request.method, request.path, request.args.to_dict(), body)
+        if player is not None and not request.path.endswith('/token'):
+            recorded = player.load(key)
+            if recorded is not None:
+                with lock:
+                    stats['replayed'] += 1
+                return jsonify(recorded['body']), recorded['status']
+        if recorder is not None:
+            if request.path.startswith('/tempo/api/'):
+                status, payload = proxy(tempo_url, request.path[len('/tempo/api'):])
+            else:
+                status, payload = proxy(hyxi_url, request.path)
+            if not request.path.endswith('/token'):
+                recorder.save(key, status, payload)
+            return jsonify(payload), status
+        return None
+
+    def authorize():
+        """Vérifie token et signature d'une requête Hyxi authentifiée (erreur Flask ou None)"""
+        if not verify:
+            return None
+        token = request.headers.get('Authorization', '')
+        with lock:
+            expires_at = tokens.get(token)
+        if expires_at is None or expires_at < time.time():
+            return hyxi_error(401, 'Token invalide ou expiré')
+        message = check_signature(token, '')
+        return hyxi_error(401, message) if message else None
+
+    def body_param(name, default=None):
+        return (request.get_json(silent=True) or {}).get(name, default)
+
+    def known_plant(plant_id):
+        return synthetic.plant(plant_id) is not None
+
+    # === API Hyxi Cloud ===
+
+    @app.route('/api/authorization/v1/token', methods=['POST'])
+    def token():
+        if verify:
+            message = check_signature('', 'grantType:1')
+            if message:
+                return hyxi_error(401, message)
+        access_token = uuid.uuid4().hex
+        with lock:
+            tokens[f"Bearer {access_token}"] = time.time() + TOKEN_TTL
+            stats['tokens'] += 1
+        return hyxi_ok({'access_token': access_token, 'expires_in': str(TOKEN_TTL)})
+
+    @app.route('/api/plant/v1/page')
+    def plant_page():
+        error = authorize()
+        if error:
+            return error
+        page_size = int(request.args.get('pageSize', 10))
+        page = int(request.args.get('currentPage', 1))
+        plants = list(synthetic.plants.values())[(page - 1) * page_size:page * page_size]
+        return hyxi_ok({
+            'list': [{k: v for k, v in plant.items() if k != 'baseLoad'} for plant in plants],
+            'total': len(synthetic.plants), 'pageSize': page_size, 'currentPage': page
+        })
+
+    @app.route('/api/plant/v1/info')
+    def plant_info():
+        error = authorize()
+        if error:
+            return error
+        plant = synthetic.plant(request.args.get('plantId'))
+        if plant is None:
+            return hyxi_error(404, 'Installation inconnue')
+        return hyxi_ok({**{k: v for k, v in plant.items() if k != 'baseLoad'},
+                        'timeZone': tz_name, 'address': 'France'})
+
+    @app.route('/api/plant/v1/queryPlantPowerStatistics', methods=['POST'])
+    def power_statistics():
+        error = authorize()
+        if error:
+            return error
+        plant_id, date_str = body_param('plantId'), body_param('startTime')
+        if not known_plant(plant_id):
+            return hyxi_error(404, 'Installation inconnue')
+        now = time.time()
+        if date_str > datetime.fromtimestamp(now, tz).strftime('%Y-%m-%d'):
+            return hyxi_ok({'timePoint': []})
+        return hyxi_ok(synthetic.day(plant_id, date_str, now))
+
+    @app.route('/api/plant/v1/queryPlantYieldStatistics', methods=['POST'])
+    def yield_statistics():
+        error = authorize()
+        if error:
+            return error
+        plant_id = body_param('plantId')
+        if not known_plant(plant_id):
+            return hyxi_error(404, 'Installation inconnue')
+        return hyxi_ok(synthetic.yield_statistics(plant_id, int(body_param('timeType', 2)),
+                                                  body_param('startTime'), time.time()))
+
+    @app.route('/api/plant/v1/queryPowerGeneration', methods=['POST'])
+    def power_generation():
+        error = authorize()
+        if error:
+            return error
+        plant_id = body_param('plantId')
+        if not known_plant(plant_id):
+            return hyxi_error(404, 'Installation inconnue')
+        now = time.time()
+        today = datetime.fromtimestamp(now, tz)
+        month = synthetic.yield_statistics(plant_id, 2, today.strftime('%Y-%m'), now)
+        return hyxi_ok({
+            'dayElectricity': month['yield'][-1] if month['yield'] else 0,
+            'monthElectricity': round(sum(month['yield']), 2),
+            'yearElectricity': round(sum(synthetic.yield_statistics(plant_id, 3, today.year, now)['yield']), 2)
+        })
+
+    @app.route('/api/plant/v1/weather', methods=['POST'])
+    def weather():
+        error = authorize()
+        if error:
+            return error
+        plant_id = body_param('plantId')
+        if not known_plant(plant_id):
+            return hyxi_error(404, 'Installation inconnue')
+        return hyxi_ok(synthetic.weather(plant_id, time.time()))
+
+    # === API Couleur Tempo ===
+
+    @app.route('/tempo/api/jourTempo/<date_str>')
+    def tempo_day(date_str):
+        return jsonify({'dateJour': date_str, 'codeJour': synthetic.tempo_code(date_str, time.time()),
+                        'periode': f"{date_str[:4]}-{int(date_str[:4]) + 1}"})
+
+    @app.route('/tempo/api/now')
+    def tempo_now():
+        now = time.time()
+        local = datetime.fromtimestamp(now, tz)
+        code = synthetic.tempo_code(local.strftime('%Y-%m-%d'), now)
+        horaire = 1 if 6 <= local.hour < 22 else 2
+        couleur = {1: 'bleu', 2: 'blanc', 3: 'rouge'}[code]
+        suffix = 'HP' if horaire == 1 else 'HC'
+        return jsonify({'codeCouleur': code, 'codeHoraire': horaire,
+                        'tarifKwh': TEMPO_TARIFS[f"{couleur}{suffix}"],
+                        'libTarif': f"{couleur.capitalize()}-{suffix}"})
+
+    @app.route('/tempo/api/tarifs')
+    def tempo_tarifs():
+        return jsonify({**TEMPO_TARIFS, 'dateDebut': '2025-02-01'})
+
+    # === Pilotage ===
+
+    @app.route('/__fake__/stats')
+    def fake_stats():
+        with lock:
+            return jsonify(dict(stats))
+
+    @app.route('/__fake__/reset', methods=['POST'])
+    def fake_reset():
+        with lock:
+            stats.clear()
+        return jsonify({'success': True})
+
+    return app
+
+
+def parse_args():
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description='Faux serveur Hyxi Cloud + Tempo pour les tests de charge')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--access-key', default='fake-ak', help='AccessKey acceptée (défaut: fake-ak)')
+    parser.add_argument('--secret-key', default='fake-sk', help='Clé secrète de signature (défaut: fake-sk)')
+    parser.add_argument('--plants', type=int, default=3, help="Nombre d'installations synthétiques (défaut: 3)")
+    parser.add_argument('--timezone', default='Europe/Paris')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latence moyenne ajoutée (ms)')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Écart-type de la latence (ms)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Proportion de réponses 503 (0-1)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requêtes/s acceptées, 429 au-delà (0 = illimité)')
+    parser.add_argument('--seed', type=int, default=0, help='Graine des données synthétiques')
+    parser.add_argument('--record', metavar='DIR', help='Proxy vers les API réelles en enregistrant les réponses')
+    parser.add_argument('--replay', metavar='DIR', help='Rejouer les réponses enregistrées (synthétique sinon)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    app = create_app(
+        access_key=args.access_key, secret_key=args.secret_key, plants=args.plants, tz_name=args.timezone,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, seed=args.seed, record=args.record, replay=args.replay,
+        verify=args.record is None
+    )
+    print(f"🧪 Faux amont sur http://{args.host}:{args.port} ({args.plants} installations)")
+    print(f"   HYXI_API_BASE_URL=http://{args.host}:{args.port}")
+    print(f"   TEMPO_API_BASE_URL=http://{args.host}:{args.port}/tempo/api")
+    if args.record:
+        print(f"⏺️  Enregistrement des réponses réelles dans {args.record}")
+    if args.replay:
+        print(f"▶️  Rejeu depuis {args.replay}")
+    app.run(host=args.host, port=args.port, threaded=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
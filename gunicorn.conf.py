@@ -0,0 +1,42 @@
+"""
+Configuration Gunicorn : point d'entrée de production multi-workers
+    gunicorn -c gunicorn.conf.py app.server:app
+
+Chaque worker est un processus distinct : le cache partagé (CACHE_URL) évite
+que le token Hyxi, les jours Tempo et les résultats du créneau en cours soient
+récupérés une fois par worker.
+"""
+import multiprocessing
+import os
+
+# Valeurs par défaut adaptées à la production (surchargées par l'environnement)
+os.environ.setdefault('DEBUG', 'False')
+os.environ.setdefault('CACHE_URL', 'sqlite:///data/cache.db')
+os.environ.setdefault('LEADER_ELECTION', 'True')  # Un seul worker interroge l'API amont
+
+from config import Config  # noqa: E402 (après les valeurs par défaut ci-dessus)
+
+bind = f"{Config.HOST}:{Config.PORT}"
+
+# Un worker par cœur ; threads pour les flux SSE et les appels amont en attente
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+
+# Avec gthread, le timeout surveille le worker et non la durée des requêtes (flux SSE)
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Pas de preload : les pools de threads et connexions SQLite sont créés dans chaque worker
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """Préchauffage des caches dès le chargement de l'application dans le worker (voir /api/ready)"""
+    from app.server import WARM_UP
+
+    WARM_UP.start()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Test de charge de l'application contre le faux amont (fake_upstream.py)
+N clients concurrents rejouent un mélange de routes du tableau de bord ;
+le rapport donne les latences p50/p95/p99 par route et le nombre d'appels
+amont par requête (compteurs du faux amont).
+
+--cold-start mesure plutôt le démarrage : l'application est lancée dans un
+nouveau processus (python -m app), sans puis avec préchauffage, et le
+rapport donne le délai avant écoute, avant disponibilité (/api/ready) et la
+latence de la première requête de chaque route.
+
+Par défaut, faux amont et application sont démarrés dans ce processus
+(stockage et cache isolés dans un répertoire temporaire) ; --target et
+--upstream visent des instances déjà lancées.
+
+Exemples :
+    python load_test.py --clients 20 --duration 30
+    python load_test.py --clients 50 --requests 2000 --latency-ms 200 --error-rate 0.02
+    python load_test.py --target http://localhost:5000 --upstream http://localhost:8081
+    python load_test.py --cold-start --latency-ms 150
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+from werkzeug.serving import make_server
+
+# Mélange de routes (chemin, poids) proche de l'usage du tableau de bord
+ROUTE_MIX = [
+    ('/api/plant/realtime', 6),
+    ('/api/energy/production?period=day', 5),
+    ('/api/energy/production?period=week', 2),
+    ('/api/energy/production?period=month', 2),
+    ('/api/energy/production?period=year', 1),
+    ('/api/energy/production?period=day&date={yesterday}', 1),
+    ('/api/tempo/now', 3),
+    ('/api/tempo/tomorrow', 1),
+    ('/api/summary', 2),
+    ('/api/schedule', 1)
+]
+
+
+def serve(app, port=0):
+    """Sert une application WSGI dans un thread, retourne son URL"""
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def start_upstream(args):
+    """Démarre le faux amont dans ce processus, retourne son URL"""
+    import fake_upstream
+
+    return serve(fake_upstream.create_app(
+        plants=args.plants, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, rate_limit=args.rate_limit, replay=args.replay
+    ))
+
+
+def app_environment(upstream, workdir):
+    """Variables d'environnement de l'application branchée sur le faux amont (stockage dans workdir)"""
+    return {
+        'HYXI_API_BASE_URL': upstream,
+        'TEMPO_API_BASE_URL': f"{upstream}/tempo/api",
+        'HYXI_ACCESS_KEY': 'fake-ak',
+        'HYXI_SECRET_KEY': 'fake-sk',
+        'PLANT_ID': 'FAKE0001',
+        'STORE_PATH': os.path.join(workdir, 'hyxi.db'),
+        'CACHE_URL': 'memory://',
+        'LEADER_ELECTION': 'False',
+        'FLEET_POLLING': 'False',
+        'DEBUG': 'False'
+    }
+
+
+def start_in_process(args):
+    """Démarre le faux amont puis l'application (configurée par variables d'environnement)"""
+    upstream = start_upstream(args)
+    os.environ.update(app_environment(upstream, tempfile.mkdtemp(prefix='hyxi-load-')))
+    # Import après configuration : Config lit l'environnement au chargement
+    from app.server import app
+
+    return serve(app), upstream
+
+
+def free_port():
+    """Port TCP libre sur la boucle locale"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(upstream, warmup, timeout=60):
+    """
+    Démarre l'application dans un nouveau processus (python -m app) et mesure
+    son démarrage puis la latence de la première requête de chaque route
+
+    Returns:
+        {'listening_s', 'ready_s', 'startup_calls', 'first_requests': {route: ms}, 'first_calls'}
+    """
+    port = free_port()
+    target = f"http://127.0.0.1:{port}"
+    env = {**os.environ, **app_environment(upstream, tempfile.mkdtemp(prefix='hyxi-cold-')),
+           'HOST': '127.0.0.1', 'PORT': str(port), 'WARMUP_ENABLED': str(warmup)}
+    requests.post(f"{upstream}/__fake__/reset", timeout=5)
+
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'app'], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {'warmup': warmup}
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"l'application s'est arrêtée (code {process.returncode})")
+            try:
+                status = requests.get(f"{target}/api/ready", timeout=5).status_code
+            except requests.ConnectionError:
+                time.sleep(0.02)
+                continue
+            result.setdefault('listening_s', round(time.perf_counter() - start, 3))
+            if status == 200:
+                result['ready_s'] = round(time.perf_counter() - start, 3)
+                break
+            time.sleep(0.02)
+        else:
+            raise RuntimeError(f"application non prête après {timeout} s")
+        result['startup_calls'] = upstream_stats(upstream).get('total', 0)
+
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+        result['first_requests'] = {}
+        for path, _ in ROUTE_MIX:
+            route = path.format(yesterday=yesterday)
+            request_start = time.perf_counter()
+            requests.get(target + route, timeout=60)
+            result['first_requests'][path.split('&date=')[0]] = round((time.perf_counter() - request_start) * 1000, 1)
+        result['first_calls'] = upstream_stats(upstream).get('total', 0) - result['startup_calls']
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def print_cold_start(results):
+    """Affiche les mesures de démarrage à froid (sans puis avec préchauffage)"""
+    print(f"\n{'':<45} " + ' '.join(f"{'warm-up ' + ('on' if r['warmup'] else 'off'):>14}" for r in results))
+    print('-' * (46 + 15 * len(results)))
+    print(f"{'Écoute (s)':<45} " + ' '.join(f"{r['listening_s']:>14}" for r in results))
+    print(f"{'Prêt /api/ready (s)':<45} " + ' '.join(f"{r['ready_s']:>14}" for r in results))
+    print(f"{'Appels amont au démarrage':<45} " + ' '.join(f"{r['startup_calls']:>14}" for r in results))
+    for route in results[0]['first_requests']:
+        print(f"{route:<45} " + ' '.join(f"{r['first_requests'][route]:>11} ms" for r in results))
+    print(f"{'Appels amont des premières requêtes':<45} " + ' '.join(f"{r['first_calls']:>14}" for r in results))
+
+
+def upstream_stats(upstream):
+    """Compteurs du faux amont (vide si indisponible)"""
+    try:
+        return requests.get(f"{upstream}/__fake__/stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return {}
+
+
+def run_clients(target, clients, duration, total_requests, think_ms):
+    """
+    Lance les clients concurrents
+
+    Returns:
+        {route: [(latence en s, code HTTP), ...]}
+    """
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    routes = [path.format(yesterday=yesterday) for path, _ in ROUTE_MIX]
+    weights = [weight for _, weight in ROUTE_MIX]
+    results = defaultdict(list)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration if duration else None
+    remaining = [total_requests]
+
+    def take():
+        """True tant que le budget (durée ou nombre de requêtes) n'est pas épuisé"""
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        with lock:
+            remaining[0] -= 1
+            return remaining[0] >= 0
+
+    def client(index):
+        rng = random.Random(index)
+        session = requests.Session()
+        while take():
+            route = rng.choices(routes, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = session.get(target + route, timeout=60).status_code
+            except requests.RequestException:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                results[route.split('&date=')[0]].append((elapsed, status))
+            if think_ms:
+                time.sleep(rng.expovariate(1000 / think_ms))
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    return results
+
+
+def summarize(samples):
+    """Nombre, erreurs et percentiles (ms) d'une liste de mesures"""
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    errors = sum(1 for _, status in samples if status == 0 or status >= 500)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if latencies.size else (0, 0, 0)
+    return {'count': len(samples), 'errors': errors, 'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1), 'p99_ms': round(float(p99), 1)}
+
+
+def print_report(report):
+    """Affiche le rapport sous forme de tableau"""
+    print(f"\n{'Route':<45} {'Req':>6} {'Err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print('-' * 87)
+    for route, row in sorted(report['routes'].items()):
+        print(f"{route:<45} {row['count']:>6} {row['errors']:>5} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+    total = report['total']
+    print('-' * 87)
+    print(f"{'TOTAL':<45} {total['count']:>6} {total['errors']:>5} {total['p50_ms']:>9} {total['p95_ms']:>9} {total['p99_ms']:>9}")
+    print(f"\n⏱️  Débit : {report['throughput']} req/s sur {report['duration']} s")
+    upstream = report.get('upstream')
+    if upstream:
+        print(f"📡 Appels amont : {upstream['calls']} ({upstream['calls_per_request']} par requête, "
+              f"{upstream['errors']} erreurs injectées, {upstream['rate_limited']} limités)")
+        for endpoint, count in sorted(upstream['endpoints'].items(), key=lambda item: -item[1]):
+            print(f"   {count:>6}  {endpoint}")
+
+
+def parse_args():
+    """Arguments de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Test de charge contre le faux amont Hyxi/Tempo")
+    parser.add_argument('--target', help="URL d'une application déjà lancée (défaut: démarrée dans ce processus)")
+    parser.add_argument('--upstream', help="URL du faux amont utilisé par --target (compteurs d'appels)")
+    parser.add_argument('--clients', type=int, default=10, help='Clients concurrents (défaut: 10)')
+    parser.add_argument('--duration', type=float, default=20, help='Durée du test en secondes (défaut: 20)')
+    parser.add_argument('--requests', type=int, help='Nombre total de requêtes (remplace --duration)')
+    parser.add_argument('--think-ms', type=float, default=0, help='Pause moyenne entre deux requêtes d\'un client')
+    parser.add_argument('--warmup', type=int, default=1, help='Passes de préchauffage du mélange de routes (défaut: 1)')
+    parser.add_argument('--plants', type=int, default=3, help='Installations du faux amont (défaut: 3)')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Latence amont moyenne (défaut: 50)')
+    parser.add_argument('--jitter-ms', type=float, default=20, help='Écart-type de la latence amont (défaut: 20)')
+    parser.add_argument('--error-rate', type=float, default=0, help='Proportion de réponses amont 503 (0-1)')
+    parser.add_argument('--rate-limit', type=float, default=0, help='Requêtes/s acceptées par l\'amont (0 = illimité)')
+    parser.add_argument('--replay', metavar='DIR', help='Rejouer des réponses enregistrées par fake_upstream.py --record')
+    parser.add_argument('--cold-start', action='store_true',
+                        help='Mesurer le démarrage à froid et la première requête par route (sans puis avec préchauffage)')
+    parser.add_argument('--json', metavar='FILE', help='Écrire le rapport JSON dans ce fichier')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.cold_start:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        upstream = args.upstream or start_upstream(args)
+        print(f"🧪 Amont : {upstream}")
+        print("🧊 Démarrages à froid (python -m app)...")
+        results = [cold_start(upstream, warmup) for warmup in (False, True)]
+        print_cold_start(results)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+            print(f"✅ Rapport écrit dans {args.json}")
+        return 0
+
+    if args.target:
+        target, upstream = args.target.rstrip('/'), args.upstream
+    else:
+        # Journal des requêtes werkzeug illisible sous charge
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        target, upstream = start_in_process(args)
+    print(f"🎯 Application : {target}")
+    print(f"🧪 Amont : {upstream or '(non suivi)'}")
+
+    # Préchauffage : token, caches et stockage (exclu des mesures)
+    for _ in range(args.warmup):
+        run_clients(target, 1, 0, len(ROUTE_MIX), 0)
+
+    before = upstream_stats(upstream) if upstream else {}
+    print(f"🚀 {args.clients} clients, "
+          + (f"{args.requests} requêtes" if args.requests else f"{args.duration:g} s") + "...")
+    start = time.perf_counter()
+    results = run_clients(target, args.clients, None if args.requests else args.duration,
+                          args.requests or 0, args.think_ms)
+    duration = time.perf_counter() - start
+    after = upstream_stats(upstream) if upstream else {}
+
+    all_samples = [sample for samples in results.values() for sample in samples]
+    if not all_samples:
+        print("❌ Aucune requête effectuée")
+        return 1
+    report = {
+        'clients': args.clients,
+        'duration': round(duration, 2),
+        'throughput': round(len(all_samples) / duration, 1),
+        'routes': {route: summarize(samples) for route, samples in results.items()},
+        'total': summarize(all_samples)
+    }
+    if after:
+        delta = {key: after.get(key, 0) - before.get(key, 0) for key in after}
+        report['upstream'] = {
+            'calls': delta.get('total', 0),
+            'calls_per_request': round(delta.get('total', 0) / len(all_samples), 3),
+            'errors': delta.get('injected_errors', 0),
+            'rate_limited': delta.get('rate_limited', 0),
+            'endpoints': {key: value for key, value in delta.items() if ' ' in key and value}
+        }
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✅ Rapport écrit dans {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -39,7 +39,7 @@ if ! command -v docker &> /dev/null; then
     echo "📍 URL: http://localhost:5000"
     echo "========================================="
     echo ""
-    python app/server.py
+    python -m app
 
 else
     echo "🐳 Docker détecté - Utilisation de Docker Compose"